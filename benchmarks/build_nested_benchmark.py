@@ -0,0 +1,76 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Benchmark for transform_utils.build_nested with a few thousand deep
+SSM parameter paths, compared with the previous recursive builder.
+
+Usage:
+    PYTHONPATH=lambda_layers/dependencies/python \
+        python benchmarks/build_nested_benchmark.py [--paths 5000] [--depth 12]
+"""
+
+import argparse
+import timeit
+
+import transform_utils
+
+
+def recursive_build_nested(paths):
+    """ Previous recursive implementation, kept for comparison """
+    def helper(path, value, container):
+        segs = path.split('/')
+        head = segs[0]
+        tail = segs[1:]
+
+        if not tail:
+            container[head] = value
+        elif not head or 'gurum' in head:
+            helper('/'.join(tail), value, container)
+        else:
+            if head not in container:
+                container[head] = {}
+            helper('/'.join(tail), value, container[head])
+
+    container = {}
+    for path, value in paths.items():
+        helper(path, value, container)
+
+    return container
+
+
+def generate_paths(count, depth):
+    paths = {}
+    for i in range(count):
+        segments = ['level{}-{}'.format(level, (i >> level) % 8) for level in range(depth - 1)]
+        paths['/gurum/{}/param-{}'.format('/'.join(segments), i)] = 'value-{}'.format(i)
+
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--paths', type=int, default=5000)
+    parser.add_argument('--depth', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    paths = generate_paths(args.paths, args.depth)
+    assert transform_utils.build_nested(paths) == recursive_build_nested(paths)
+
+    print('{} paths, depth {}'.format(args.paths, args.depth))
+    for name, func in [('recursive', recursive_build_nested),
+                       ('iterative', transform_utils.build_nested)]:
+        best = min(timeit.repeat(lambda: func(paths), number=1, repeat=args.repeat))
+        print('{:>10}: {:8.2f} ms'.format(name, best * 1000))
+
+    container = transform_utils.build_nested(paths)
+    path, value = next(iter(paths.items()))
+    best = min(timeit.repeat(
+        lambda: transform_utils.insert_nested(container, path, value),
+        number=1000, repeat=args.repeat))
+    print('{:>10}: {:8.2f} us'.format('insert', best * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Cold start benchmark for every handler module in src/. Each handler is
+measured in a fresh interpreter: the import time reported by
+`python -X importtime` and the latency of its first invocation, with AWS
+calls answered by empty responses so no credentials are needed. Fails
+when a handler regresses past the stored baseline.
+
+Usage:
+    python benchmarks/cold_start_benchmark.py [--repeat 3] [--output results.json]
+    python benchmarks/cold_start_benchmark.py --update-baseline
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, 'src')
+LAYER = os.path.join(ROOT, 'lambda_layers', 'dependencies', 'python')
+BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines', 'cold_start_benchmark.json')
+
+HANDLER_NAMES = ['get', 'post', 'put', 'patch', 'delete']
+
+# Runs in the fresh interpreter, prints the timings as JSON. boto3 is
+# imported by the first invocation, so it is part of its latency.
+INVOKE = '''
+import json, sys, time
+start = time.perf_counter()
+import {module} as handler
+imported = time.perf_counter()
+
+import boto3
+from botocore.awsrequest import AWSResponse
+
+def empty_response(**kwargs):
+    return AWSResponse(None, 200, {{}}, None), {{}}
+
+boto3.setup_default_session()
+boto3.DEFAULT_SESSION.events.register('before-call.*.*', empty_response)
+
+event = {{
+    'claims': {{'email': 'user@example.com', 'groups': 'team1', 'roles': 'owner'}},
+    'params': {{'name': 'benchmark'}},
+    'headers': {{}},
+    'body-json': ['{{"name": "benchmark", "items": [{{"name": "benchmark"}}], "names": ["benchmark"]}}']
+}}
+try:
+    getattr(handler, '{function}')(event, None)
+except Exception:
+    pass
+invoked = time.perf_counter()
+
+print(json.dumps({{
+    'import_ms': (imported - start) * 1000,
+    'first_invocation_ms': (invoked - imported) * 1000
+}}))
+'''
+
+
+def find_handlers():
+    handlers = []
+    for directory, _, files in os.walk(SRC):
+        if 'tests' in directory.split(os.sep) or '__pycache__' in directory:
+            continue
+        for filename in sorted(files):
+            if not filename.endswith('.py'):
+                continue
+            with open(os.path.join(directory, filename)) as source:
+                content = source.read()
+            for function in HANDLER_NAMES:
+                if 'def {}(event'.format(function) in content:
+                    handlers.append((directory, filename[:-3], function))
+
+    return sorted(handlers)
+
+
+def environment(directory):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([directory, LAYER])
+    env.setdefault('AWS_DEFAULT_REGION', 'eu-west-1')
+    env.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+    env.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+    env.setdefault('PLATFORM_PRIORITY_LEDGER', 'memory')
+
+    return env
+
+
+def import_time(directory, module):
+    """ Cumulative import time of a module in microseconds, from -X importtime
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+        env=environment(directory), cwd=directory,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+
+    raise RuntimeError('Unable to import {}: {}'.format(module, result.stderr[-500:]))
+
+
+def first_invocation(directory, module, function):
+    result = subprocess.run(
+        [sys.executable, '-c', INVOKE.format(module=module, function=function)],
+        env=environment(directory), cwd=directory,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, tolerance, slack):
+    """ Returns the regressions of the results against the baseline.
+    Increases below slack ms are interpreter start up noise.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+
+        for key in ['import_ms', 'first_invocation_ms']:
+            if result[key] > max(expected[key] * (1 + tolerance), expected[key] + slack):
+                regressions.append('{} {}: {:.2f} ms, baseline {:.2f} ms'.format(
+                    name, key, result[key], expected[key]))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Write the results as JSON to a file')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Store the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='Allowed relative increase (default 0.5)')
+    parser.add_argument('--slack-ms', type=float, default=20.0,
+                        help='Increase always allowed, in ms (default 20)')
+    args = parser.parse_args()
+
+    results = {}
+    print('{:<52} {:>10} {:>10}'.format('handler', 'import ms', 'first ms'))
+    for directory, module, function in find_handlers():
+        name = '{}.{}'.format(os.path.relpath(os.path.join(directory, module), SRC), function)
+        imports = min(import_time(directory, module) for _ in range(args.repeat)) / 1000
+        invocation = min(
+            first_invocation(directory, module, function)['first_invocation_ms']
+            for _ in range(args.repeat))
+
+        results[name] = {'import_ms': round(imports, 2), 'first_invocation_ms': round(invocation, 2)}
+        print('{:<52} {:>10.2f} {:>10.2f}'.format(name, imports, invocation))
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+            output.write('\n')
+        print('Baseline written to {}'.format(args.baseline))
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('No baseline at {}, run with --update-baseline'.format(args.baseline))
+        return 0
+
+    with open(args.baseline) as baseline:
+        regressions = compare(results, json.load(baseline), args.tolerance, args.slack_ms)
+
+    for regression in regressions:
+        print('REGRESSION {}'.format(regression))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
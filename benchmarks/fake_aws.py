@@ -0,0 +1,575 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+In-memory stand-in for the AWS services used by the managers, for load
+testing the handlers offline. Real boto3 clients are registered with
+aws_clients, their calls are answered by stateful in-memory backends
+from a botocore before-call hook, so parameter validation, paginators
+and modeled exceptions (client.exceptions.*) behave as with AWS.
+
+Covers CloudFormation (stacks with tags, parameters, outputs and events),
+the Resource Groups Tagging API lookup of stacks, the SSM parameter tree,
+ELBv2 listener rules and CodePipeline states. Latency and throttling can
+be injected on every call.
+
+Basic Usage:
+    >>> aws = FakeAWS(latency=0.02, throttle_rate=0.01)
+    >>> aws.cloudformation.add_stack('gurum-app1', tags={'groups': 'team1'})
+    >>> aws.install()
+"""
+
+import collections
+import copy
+import datetime
+import itertools
+import random
+import threading
+import time
+import uuid
+
+import boto3
+from botocore import xform_name
+from botocore.awsrequest import AWSResponse
+
+import aws_clients
+
+ACCOUNT_ID = '012345678901'
+
+# Error code returned by each service when a call is throttled
+THROTTLING_CODES = {
+    'cloudformation': 'Throttling',
+    'ssm': 'ThrottlingException',
+    'elbv2': 'Throttling',
+    'codepipeline': 'ThrottlingException',
+    'resourcegroupstaggingapi': 'ThrottledException'
+}
+
+
+class FakeError(Exception):
+    """Error returned to the client as a modeled service error"""
+
+    def __init__(self, code, message='', status_code=400):
+        Exception.__init__(self, message)
+        self.code = code
+        self.message = message
+        self.status_code = status_code
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _page(items, token, page_size):
+    """ Returns a page of items and the token of the next page, tokens
+    are the offsets of the pages.
+    """
+    offset = int(token) if token else 0
+    end = offset + page_size
+
+    return items[offset:end], str(end) if end < len(items) else None
+
+
+class CloudFormationBackend:
+    """Stacks by name, newest events first. Deleted stacks can only be
+    described by their StackId, as with CloudFormation.
+    """
+
+    PAGE_SIZE = 100
+    EVENTS_PAGE_SIZE = 100
+
+    def __init__(self, region):
+        self.region = region
+        self.stacks = collections.OrderedDict()
+        self.deleted = {}
+        self.names = {}
+        self.events = collections.defaultdict(list)
+
+    def add_stack(
+            self,
+            name,
+            parameters=None,
+            outputs=None,
+            tags=None,
+            status='CREATE_COMPLETE',
+            description='',
+            events=2):
+        """ Adds a stack with its parameters, outputs and tags as dicts,
+        and a number of synthetic events.
+        """
+        stack_id = 'arn:aws:cloudformation:{}:{}:stack/{}/{}'.format(
+            self.region, ACCOUNT_ID, name, uuid.uuid4())
+        created = _now()
+        self.stacks[name] = {
+            'StackId': stack_id,
+            'StackName': name,
+            'Description': description,
+            'CreationTime': created,
+            'LastUpdatedTime': created,
+            'StackStatus': status,
+            'Parameters': [
+                {'ParameterKey': key, 'ParameterValue': value}
+                for key, value in (parameters or {}).items()
+            ],
+            'Outputs': [
+                {'OutputKey': key, 'OutputValue': value}
+                for key, value in (outputs or {}).items()
+            ],
+            'Tags': [{'Key': key, 'Value': value} for key, value in (tags or {}).items()]
+        }
+        self.names[stack_id] = name
+
+        for number in range(events):
+            self.add_event(name, 'Resource{}'.format(number), 'CREATE_COMPLETE')
+        self.add_event(name, name, status)
+
+        return self.stacks[name]
+
+    def add_event(self, name, logical_id, status, reason=None):
+        stack = self.stacks[name]
+        event = {
+            'StackId': stack['StackId'],
+            'StackName': name,
+            'EventId': str(uuid.uuid4()),
+            'LogicalResourceId': logical_id,
+            'ResourceStatus': status,
+            'Timestamp': _now()
+        }
+        if reason:
+            event['ResourceStatusReason'] = reason
+
+        self.events[stack['StackId']].insert(0, event)
+
+    def get_stack(self, name):
+        stack = self.stacks.get(self.names.get(name, name)) or self.deleted.get(name)
+
+        if stack is None:
+            raise FakeError('ValidationError', 'Stack with id {} does not exist'.format(name))
+
+        return stack
+
+    def describe_stacks(self, StackName=None, NextToken=None):
+        if StackName:
+            return {'Stacks': [self.get_stack(StackName)]}
+
+        stacks, token = _page(list(self.stacks.values()), NextToken, self.PAGE_SIZE)
+        response = {'Stacks': stacks}
+        if token:
+            response['NextToken'] = token
+
+        return response
+
+    def describe_stack_events(self, StackName, NextToken=None):
+        stack = self.get_stack(StackName)
+        events, token = _page(self.events[stack['StackId']], NextToken, self.EVENTS_PAGE_SIZE)
+        response = {'StackEvents': events}
+        if token:
+            response['NextToken'] = token
+
+        return response
+
+    def create_stack(self, StackName, Parameters=None, Tags=None, **kwargs):
+        if StackName in self.stacks:
+            raise FakeError('AlreadyExistsException', 'Stack [{}] already exists'.format(StackName))
+
+        stack = self.add_stack(
+            StackName,
+            parameters={param['ParameterKey']: param['ParameterValue'] for param in Parameters or []},
+            tags={tag['Key']: tag['Value'] for tag in Tags or []},
+            events=0)
+
+        return {'StackId': stack['StackId']}
+
+    def update_stack(self, StackName, Parameters=None, Tags=None, UsePreviousTemplate=False, **kwargs):
+        stack = self.stacks.get(StackName)
+        if stack is None:
+            raise FakeError('ValidationError', 'Stack [{}] does not exist'.format(StackName))
+        if stack['StackStatus'] == 'ROLLBACK_COMPLETE':
+            raise FakeError(
+                'ValidationError',
+                'Stack:{} is in ROLLBACK_COMPLETE state and can not be updated.'.format(stack['StackId']))
+
+        current = {param['ParameterKey']: param['ParameterValue'] for param in stack['Parameters']}
+        unknown = [
+            param['ParameterKey'] for param in Parameters or []
+            if UsePreviousTemplate and param['ParameterKey'] not in current
+        ]
+        if unknown:
+            raise FakeError(
+                'ValidationError',
+                'Parameters: [{}] do not exist in the template'.format(', '.join(unknown)))
+
+        for param in Parameters or []:
+            if not param.get('UsePreviousValue'):
+                current[param['ParameterKey']] = param['ParameterValue']
+
+        stack['Parameters'] = [
+            {'ParameterKey': key, 'ParameterValue': value} for key, value in current.items()
+        ]
+        if Tags is not None:
+            stack['Tags'] = Tags
+        stack['StackStatus'] = 'UPDATE_COMPLETE'
+        stack['LastUpdatedTime'] = _now()
+        self.add_event(StackName, StackName, 'UPDATE_IN_PROGRESS', 'User Initiated')
+        self.add_event(StackName, StackName, 'UPDATE_COMPLETE')
+
+        return {'StackId': stack['StackId']}
+
+    def delete_stack(self, StackName, **kwargs):
+        # Deleting a missing stack succeeds, as with CloudFormation
+        stack = self.stacks.pop(StackName, None)
+
+        if stack is not None:
+            stack['StackStatus'] = 'DELETE_COMPLETE'
+            self.names.pop(stack['StackId'])
+            self.deleted[stack['StackId']] = stack
+
+        return {}
+
+
+class TaggingBackend:
+    """Resource Groups Tagging API lookup of the CloudFormation stacks"""
+
+    PAGE_SIZE = 100
+
+    def __init__(self, cloudformation):
+        self.cloudformation = cloudformation
+
+    def get_resources(self, TagFilters=None, PaginationToken=None, ResourcesPerPage=None, **kwargs):
+        def matches(stack):
+            tags = {tag['Key']: tag['Value'] for tag in stack['Tags']}
+            return all(
+                tag_filter['Key'] in tags and
+                (not tag_filter.get('Values') or tags[tag_filter['Key']] in tag_filter['Values'])
+                for tag_filter in TagFilters or []
+            )
+
+        resources = [
+            {'ResourceARN': stack['StackId'], 'Tags': stack['Tags']}
+            for stack in self.cloudformation.stacks.values()
+            if matches(stack)
+        ]
+        resources, token = _page(resources, PaginationToken, ResourcesPerPage or self.PAGE_SIZE)
+        response = {'ResourceTagMappingList': resources}
+        if token:
+            response['PaginationToken'] = token
+
+        return response
+
+
+class SSMBackend:
+    """Parameter tree by name"""
+
+    PAGE_SIZE = 10
+
+    def __init__(self, region):
+        self.region = region
+        self.parameters = {}
+
+    def add_parameter(self, name, value, parameter_type='String'):
+        current = self.parameters.get(name)
+        self.parameters[name] = {
+            'Name': name,
+            'Type': parameter_type,
+            'Value': value,
+            'Version': current['Version'] + 1 if current else 1,
+            'LastModifiedDate': _now(),
+            'ARN': 'arn:aws:ssm:{}:{}:parameter{}'.format(self.region, ACCOUNT_ID, name)
+        }
+
+        return self.parameters[name]
+
+    def get_parameter(self, Name, **kwargs):
+        if Name not in self.parameters:
+            raise FakeError('ParameterNotFound')
+
+        return {'Parameter': self.parameters[Name]}
+
+    def get_parameters(self, Names, **kwargs):
+        return {
+            'Parameters': [self.parameters[name] for name in Names if name in self.parameters],
+            'InvalidParameters': [name for name in Names if name not in self.parameters]
+        }
+
+    def get_parameters_by_path(self, Path, Recursive=False, NextToken=None, MaxResults=None, **kwargs):
+        prefix = Path.rstrip('/') + '/'
+        names = sorted(
+            name for name in self.parameters
+            if name.startswith(prefix) and (Recursive or '/' not in name[len(prefix):])
+        )
+        names, token = _page(names, NextToken, MaxResults or self.PAGE_SIZE)
+        response = {'Parameters': [self.parameters[name] for name in names]}
+        if token:
+            response['NextToken'] = token
+
+        return response
+
+    def put_parameter(self, Name, Value, Type='String', Overwrite=False, **kwargs):
+        if Name in self.parameters and not Overwrite:
+            raise FakeError('ParameterAlreadyExists')
+
+        return {'Version': self.add_parameter(Name, Value, Type)['Version']}
+
+    def delete_parameter(self, Name):
+        if self.parameters.pop(Name, None) is None:
+            raise FakeError('ParameterNotFound')
+
+        return {}
+
+
+class ELBv2Backend:
+    """Listener rules by listener ARN, the default rule last"""
+
+    PAGE_SIZE = 100
+
+    def __init__(self, region):
+        self.region = region
+        self.listeners = {}
+        self._rule_ids = itertools.count(1)
+
+    def add_listener(self, name='gurum', priorities=()):
+        listener_arn = 'arn:aws:elasticloadbalancing:{}:{}:listener/app/{}/{}'.format(
+            self.region, ACCOUNT_ID, name, uuid.uuid4().hex[:16])
+        self.listeners[listener_arn] = []
+
+        for priority in priorities:
+            self.add_rule(listener_arn, priority)
+        self.add_rule(listener_arn, 'default')
+
+        return listener_arn
+
+    def add_rule(self, listener_arn, priority):
+        rule = {
+            'RuleArn': '{}/rule/{}'.format(listener_arn, next(self._rule_ids)),
+            'Priority': str(priority),
+            'Conditions': [],
+            'Actions': [],
+            'IsDefault': priority == 'default'
+        }
+        rules = self.listeners[listener_arn]
+        rules.insert(len(rules) - 1 if rules and rules[-1]['IsDefault'] else len(rules), rule)
+
+        return rule
+
+    def describe_rules(self, ListenerArn=None, Marker=None, PageSize=None, **kwargs):
+        if ListenerArn not in self.listeners:
+            raise FakeError('ListenerNotFound', 'One or more listeners not found')
+
+        rules, marker = _page(self.listeners[ListenerArn], Marker, PageSize or self.PAGE_SIZE)
+        response = {'Rules': rules}
+        if marker:
+            response['NextMarker'] = marker
+
+        return response
+
+
+class CodePipelineBackend:
+    """Pipeline states and executions by pipeline name"""
+
+    def __init__(self):
+        self.pipelines = {}
+
+    def add_pipeline(self, name, stages=None, executions=5, pending_approval=None):
+        """ Adds a pipeline with the given {stage: [actions]} and recent
+        executions. pending_approval is an approval token left pending on
+        the ApprovalStage/Approval action.
+        """
+        stages = stages or collections.OrderedDict([
+            ('Source', ['GitHub']),
+            ('Build', ['CodeBuild']),
+            ('ApprovalStage', ['Approval']),
+            ('Deploy', ['CloudFormation'])
+        ])
+        now = _now()
+
+        stage_states = []
+        for stage, actions in stages.items():
+            action_states = []
+            for action in actions:
+                latest = {'status': 'Succeeded', 'lastStatusChange': now, 'percentComplete': 100}
+                if stage == 'ApprovalStage' and pending_approval:
+                    latest = {'status': 'InProgress', 'lastStatusChange': now, 'token': pending_approval}
+                action_states.append({'actionName': action, 'latestExecution': latest})
+            stage_states.append({'stageName': stage, 'actionStates': action_states})
+
+        self.pipelines[name] = {
+            'pipelineName': name,
+            'pipelineVersion': 1,
+            'stageStates': stage_states,
+            'created': now,
+            'updated': now,
+            'executions': [
+                {
+                    'pipelineExecutionId': str(uuid.uuid4()),
+                    'status': 'Succeeded',
+                    'startTime': now - datetime.timedelta(hours=number + 1),
+                    'lastUpdateTime': now - datetime.timedelta(hours=number)
+                }
+                for number in range(executions)
+            ]
+        }
+
+        return self.pipelines[name]
+
+    def _get_pipeline(self, name):
+        if name not in self.pipelines:
+            raise FakeError('PipelineNotFoundException', 'Pipeline {} not found'.format(name))
+
+        return self.pipelines[name]
+
+    def get_pipeline_state(self, name):
+        pipeline = self._get_pipeline(name)
+
+        return {key: value for key, value in pipeline.items() if key != 'executions'}
+
+    def list_pipeline_executions(self, pipelineName, maxResults=None, nextToken=None):
+        executions, token = _page(self._get_pipeline(pipelineName)['executions'], nextToken, maxResults or 100)
+        response = {'pipelineExecutionSummaries': executions}
+        if token:
+            response['nextToken'] = token
+
+        return response
+
+    def put_approval_result(self, pipelineName, stageName, actionName, result, token):
+        pipeline = self._get_pipeline(pipelineName)
+        action = next((
+            action
+            for stage in pipeline['stageStates'] if stage['stageName'] == stageName
+            for action in stage['actionStates'] if action['actionName'] == actionName
+        ), None)
+
+        if action is None:
+            raise FakeError('ActionNotFoundException')
+        if action['latestExecution'].get('token') != token:
+            raise FakeError('InvalidApprovalTokenException')
+
+        approved_at = _now()
+        action['latestExecution'] = {
+            'status': 'Succeeded' if result['status'] == 'Approved' else 'Failed',
+            'lastStatusChange': approved_at,
+            'summary': result['summary']
+        }
+
+        return {'approvedAt': approved_at}
+
+
+class FakeAWS:
+    """In-memory AWS account for a region.
+
+    Args:
+        region (string): Region of the clients and resource ARNs.
+        latency (float): Seconds added to every call.
+        jitter (float): Maximum random seconds added on top of latency.
+        throttle_rate (float): Probability of a call being throttled.
+        max_calls_per_second (int): Calls per operation and second over
+            which calls are throttled, as with the API rate limits.
+        seed (int): Seed of the injected jitter and throttling.
+    """
+
+    def __init__(
+            self,
+            region='eu-west-1',
+            latency=0.0,
+            jitter=0.0,
+            throttle_rate=0.0,
+            max_calls_per_second=None,
+            seed=None):
+        self.region = region
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.max_calls_per_second = max_calls_per_second
+
+        self.cloudformation = CloudFormationBackend(region)
+        self.ssm = SSMBackend(region)
+        self.elbv2 = ELBv2Backend(region)
+        self.codepipeline = CodePipelineBackend()
+        self.tagging = TaggingBackend(self.cloudformation)
+
+        self.backends = {
+            'cloudformation': self.cloudformation,
+            'ssm': self.ssm,
+            'elbv2': self.elbv2,
+            'codepipeline': self.codepipeline,
+            'resourcegroupstaggingapi': self.tagging
+        }
+
+        self.calls = collections.Counter()
+        self.throttled = collections.Counter()
+
+        self._random = random.Random(seed)
+        self._windows = collections.defaultdict(collections.deque)
+        self._lock = threading.RLock()
+
+    def client(self, service):
+        """ Returns a boto3 client answered by the backend of a service
+        """
+        client = boto3.client(
+            service,
+            region_name=self.region,
+            aws_access_key_id='fake',
+            aws_secret_access_key='fake')
+        service_id = client.meta.service_model.service_id.hyphenize()
+
+        client.meta.events.register(
+            'before-parameter-build.{}.*'.format(service_id), self._capture_params)
+        client.meta.events.register(
+            'before-call.{}.*'.format(service_id),
+            lambda model, context, **kwargs: self._call(service, model, context))
+
+        return client
+
+    def install(self):
+        """ Registers a client of every service with aws_clients
+        """
+        for service in self.backends:
+            aws_clients.register_client(service, self.client(service), self.region)
+
+    @staticmethod
+    def _capture_params(params, context, **kwargs):
+        context['fake_aws_params'] = dict(params)
+
+    def _call(self, service, model, context):
+        operation = '{}.{}'.format(service, model.name)
+        params = context.pop('fake_aws_params', {})
+
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        with self._lock:
+            self.calls[operation] += 1
+
+            try:
+                if self._is_throttled(operation):
+                    self.throttled[operation] += 1
+                    raise FakeError(THROTTLING_CODES[service], 'Rate exceeded')
+
+                method = getattr(self.backends[service], xform_name(model.name), None)
+                if method is None:
+                    raise NotImplementedError('{} is not implemented by the fake backend'.format(operation))
+
+                parsed = copy.deepcopy(method(**params))
+                status_code = 200
+            except FakeError as ex:
+                parsed = {'Error': {'Code': ex.code, 'Message': ex.message}}
+                status_code = ex.status_code
+
+        parsed['ResponseMetadata'] = {'RequestId': str(uuid.uuid4()), 'HTTPStatusCode': status_code}
+
+        return AWSResponse(None, status_code, {}, None), parsed
+
+    def _is_throttled(self, operation):
+        if self.throttle_rate and self._random.random() < self.throttle_rate:
+            return True
+
+        if self.max_calls_per_second:
+            now = time.monotonic()
+            window = self._windows[operation]
+            while window and window[0] <= now - 1:
+                window.popleft()
+            if len(window) >= self.max_calls_per_second:
+                return True
+            window.append(now)
+
+        return False
@@ -0,0 +1,418 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Benchmark suite running the real handlers against botocore Stubber backed
+clients with synthetic data. Reports the latency, the peak allocations
+and the number of AWS calls of every scenario and size, and fails when a
+result regresses past the stored baseline.
+
+Usage:
+    python benchmarks/handler_benchmark.py [--sizes 10 1000 20000] [--repeat 5] [--warmup 3]
+    python benchmarks/handler_benchmark.py --update-baseline
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines', 'handler_benchmark.json')
+
+ENVIRONMENT = {
+    'PLATFORM_PREFIX': 'gurum',
+    'PLATFORM_REGION': 'eu-west-1',
+    'PLATFORM_BUCKET': 'products',
+    'PLATFORM_TAGS_PRODUCT_TYPE': 'product-type',
+    'PLATFORM_TAGS_PRODUCT_FLAVOR': 'product-flavor',
+    'PLATFORM_TAGS_VERSION': 'platform-version',
+    'PLATFORM_TAGS_OWNER': 'owner',
+    'PLATFORM_TAGS_REGION': 'region',
+    'PLATFORM_TAGS_GROUPS': 'groups',
+    'PLATFORM_PRIORITY_LEDGER': 'memory',
+    'PLATFORM_DEPLOYMENT_ROLE': 'arn:aws:iam::012345678901:role/gurum-deployment',
+    'PLATFORM_LOG_LEVEL': 'WARNING',
+    'AWS_XRAY_SDK_ENABLED': 'false',
+    'PLATFORM_METRICS_ENABLED': 'false',
+    'PLATFORM_THROTTLE_RATE': '0',
+    'AWS_DEFAULT_REGION': 'eu-west-1',
+    'AWS_ACCESS_KEY_ID': 'benchmark',
+    'AWS_SECRET_ACCESS_KEY': 'benchmark'
+}
+
+for key, value in ENVIRONMENT.items():
+    os.environ.setdefault(key, value)
+
+sys.path.insert(0, os.path.join(ROOT, 'lambda_layers', 'dependencies', 'python'))
+for handler_dir in ['apps', 'events', os.path.join('pipelines', 'name', 'states')]:
+    sys.path.insert(0, os.path.join(ROOT, 'src', handler_dir))
+
+import logging  # noqa: E402
+
+import boto3  # noqa: E402
+from botocore.stub import Stubber, ANY  # noqa: E402
+
+import aws_clients  # noqa: E402
+import elb_helper  # noqa: E402
+import platform_config  # noqa: E402
+
+from inventory import INVENTORY  # noqa: E402
+from parameter_store import PARAMETER_CACHE  # noqa: E402
+
+import create_app  # noqa: E402
+import describe_pipeline_state  # noqa: E402
+import list_apps  # noqa: E402
+import list_events  # noqa: E402
+
+logging.disable(logging.WARNING)
+
+CREATED_AT = datetime.datetime(2019, 1, 1, tzinfo=datetime.timezone.utc)
+LISTENER_ARN = 'arn:aws:elasticloadbalancing:eu-west-1:012345678901:listener/app/gurum/1/1'
+CLAIMS = {'email': 'user@example.com', 'groups': 'team1', 'roles': 'owner'}
+
+
+def stack(number, stack_type='app'):
+    name = 'gurum-{}{}'.format(stack_type, number)
+    return {
+        'StackId': 'arn:aws:cloudformation:eu-west-1:012345678901:stack/{}/{}'.format(name, number),
+        'StackName': name,
+        'CreationTime': CREATED_AT,
+        'LastUpdatedTime': CREATED_AT + datetime.timedelta(minutes=number),
+        'StackStatus': 'UPDATE_COMPLETE',
+        'Parameters': [
+            {'ParameterKey': 'DesiredCount', 'ParameterValue': '2'},
+            {'ParameterKey': 'Priority', 'ParameterValue': str(number + 1)}
+        ],
+        'Outputs': [
+            {'OutputKey': 'PipelineName', 'OutputValue': '{}-Pipeline'.format(name)}
+        ],
+        'Tags': [
+            {'Key': 'platform-version', 'Value': 'latest'},
+            {'Key': 'product-type', 'Value': stack_type},
+            {'Key': 'product-flavor', 'Value': 'ecs-fargate'},
+            {'Key': 'groups', 'Value': 'team1'},
+            {'Key': 'owner', 'Value': 'user@example.com'}
+        ]
+    }
+
+
+def pages(items, page_size, key, token='NextToken'):
+    """ Splits items into stubbed response pages with their expected params
+    """
+    result = []
+    for start in range(0, max(len(items), 1), page_size):
+        page = {key: items[start:start + page_size]}
+        if start + page_size < len(items):
+            page[token] = 'page-{}'.format(start + page_size)
+        result.append(page)
+
+    return result
+
+
+class Scenario:
+    """A handler invocation and the stubbed responses it consumes.
+    setup(size) registers the stubbed clients and returns the event.
+    """
+
+    def __init__(self, name, handler, setup, max_size=None):
+        self.name = name
+        self.handler = handler
+        self.setup = setup
+        self.max_size = max_size
+
+    def size(self, size):
+        return min(size, self.max_size) if self.max_size else size
+
+
+def client(service, stubbers):
+    stubbed = boto3.client(service, region_name='eu-west-1')
+    stubber = Stubber(stubbed)
+    aws_clients.register_client(service, stubbed)
+    stubbers[service] = stubber
+
+    return stubber
+
+
+def setup_list_apps(lookup):
+    def setup(size, stubbers):
+        platform_config.PLATFORM_STACK_LOOKUP = lookup
+        stacks = [stack(number) for number in range(size)]
+        cloudformation = client('cloudformation', stubbers)
+
+        max_describes = platform_config.PLATFORM_STACK_LOOKUP_MAX_DESCRIBES
+
+        if lookup == 'tags':
+            tagging = client('resourcegroupstaggingapi', stubbers)
+            resources = [{'ResourceARN': item['StackId']} for item in stacks]
+            tagged = pages(resources, 100, 'ResourceTagMappingList', 'PaginationToken')
+            # The lookup stops paging once the group is too large to describe
+            for page in tagged[:max_describes // 100 + 1]:
+                tagging.add_response('get_resources', page, None)
+
+        if lookup == 'tags' and size <= max_describes:
+            for item in stacks:
+                cloudformation.add_response('describe_stacks', {'Stacks': [item]}, None)
+        else:
+            for page in pages(stacks, 100, 'Stacks'):
+                cloudformation.add_response('describe_stacks', page, None)
+
+        return {'claims': CLAIMS, 'params': {}, 'headers': {}}
+
+    return setup
+
+
+def setup_describe_pipeline_state(size, stubbers):
+    cloudformation = client('cloudformation', stubbers)
+    codepipeline = client('codepipeline', stubbers)
+
+    pipeline = stack(0, stack_type='pipeline')
+    cloudformation.add_response('describe_stacks', {'Stacks': [pipeline]}, None)
+
+    stages = []
+    for stage in range(max(size // 10, 1)):
+        stages.append({
+            'stageName': 'Stage{}'.format(stage),
+            'actionStates': [
+                {
+                    'actionName': 'Action{}'.format(action),
+                    'latestExecution': {
+                        'status': 'Succeeded',
+                        'lastStatusChange': CREATED_AT,
+                        'percentComplete': 100
+                    }
+                }
+                for action in range(min(size, 10))
+            ]
+        })
+    codepipeline.add_response(
+        'get_pipeline_state',
+        {'pipelineName': 'gurum-pipeline0-Pipeline', 'stageStates': stages},
+        None)
+
+    return {'claims': CLAIMS, 'params': {'name': 'pipeline0'}, 'headers': {}}
+
+
+def setup_list_events(since):
+    def setup(size, stubbers):
+        cloudformation = client('cloudformation', stubbers)
+        events = [
+            {
+                'StackId': stack(0)['StackId'],
+                'StackName': 'gurum-app0',
+                'EventId': 'event-{}'.format(number),
+                'LogicalResourceId': 'Resource{}'.format(number),
+                'ResourceStatus': 'UPDATE_COMPLETE',
+                'Timestamp': CREATED_AT - datetime.timedelta(seconds=number)
+            }
+            for number in range(size)
+        ]
+        # Only the first page is consumed, the cursor is within it
+        cloudformation.add_response('describe_stack_events', pages(events, 100, 'StackEvents')[0], None)
+
+        params = {'name': 'app0'}
+        if since:
+            params['since_event_id'] = 'event-{}'.format(min(5, size - 1))
+
+        return {'claims': CLAIMS, 'params': params, 'headers': {}}
+
+    return setup
+
+
+def setup_create_app(size, stubbers):
+    ssm = client('ssm', stubbers)
+    elbv2 = client('elbv2', stubbers)
+    cloudformation = client('cloudformation', stubbers)
+
+    ssm.add_response(
+        'get_parameters',
+        {'Parameters': [{
+            'Name': '/gurum/platform/loadbalancer/listener-arn',
+            'Type': 'String',
+            'Value': LISTENER_ARN
+        }]},
+        None)
+
+    rules = [
+        {'RuleArn': '{}/rule/{}'.format(LISTENER_ARN, number), 'Priority': str(number + 1)}
+        for number in range(size)
+    ]
+    for page in pages(rules, 400, 'Rules', 'NextMarker'):
+        elbv2.add_response('describe_rules', page, None)
+
+    cloudformation.add_response('create_stack', {'StackId': stack(size)['StackId']}, {
+        'StackName': 'gurum-benchmark',
+        'TemplateURL': ANY,
+        'TimeoutInMinutes': 15,
+        'Parameters': ANY,
+        'Capabilities': ANY,
+        'RoleARN': ANY,
+        'Tags': ANY
+    })
+
+    return {
+        'claims': CLAIMS,
+        'headers': {},
+        'body-json': [json.dumps({'name': 'benchmark', 'config': {'DesiredCount': '2'}})]
+    }
+
+
+SCENARIOS = [
+    Scenario('list_apps.get', list_apps.get, setup_list_apps('scan')),
+    Scenario('list_apps.get[tags]', list_apps.get, setup_list_apps('tags'), max_size=2000),
+    Scenario('describe_pipeline_state.get', describe_pipeline_state.get,
+             setup_describe_pipeline_state, max_size=500),
+    Scenario('list_events.get', list_events.get, setup_list_events(False)),
+    Scenario('list_events.get[since]', list_events.get, setup_list_events(True)),
+    Scenario('create_app.post', create_app.post, setup_create_app, max_size=50000)
+]
+
+
+def reset():
+    aws_clients.reset()
+    INVENTORY.clear()
+    PARAMETER_CACHE.invalidate()
+    elb_helper.OCCUPANCY_CACHE.clear()
+
+
+def invoke(scenario, size, trace=False):
+    """ Runs a scenario once on cold caches, returns the latency in ms,
+    the peak of traced allocations in KiB and the number of AWS calls.
+    As with timeit, the garbage collector is paused while timing so
+    collections triggered by earlier runs don't land in the measurement.
+    """
+    reset()
+    stubbers = {}
+    event = scenario.setup(size, stubbers)
+    calls = []
+
+    for stubber in stubbers.values():
+        stubber.client.meta.events.register(
+            'before-parameter-build.*.*',
+            lambda event_name, **kwargs: calls.append(event_name))
+        stubber.activate()
+
+    if trace:
+        tracemalloc.start()
+
+    gc.collect()
+    gc.disable()
+    start = time.perf_counter()
+    try:
+        scenario.handler(event, None)
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        gc.enable()
+        peak = tracemalloc.get_traced_memory()[1] / 1024 if trace else None
+        if trace:
+            tracemalloc.stop()
+
+    for stubber in stubbers.values():
+        stubber.assert_no_pending_responses()
+        stubber.deactivate()
+
+    return elapsed, peak, len(calls)
+
+
+def run(sizes, repeat, warmup=3):
+    results = {}
+    for scenario in SCENARIOS:
+        for size in sorted(set(scenario.size(size) for size in sizes)):
+            # Discarded runs warming up the code paths, allocator and
+            # botocore loaders the scenario touches first
+            for _ in range(warmup):
+                invoke(scenario, size)
+
+            latencies = []
+            for _ in range(repeat):
+                latency, _, calls = invoke(scenario, size)
+                latencies.append(latency)
+            _, peak, _ = invoke(scenario, size, trace=True)
+
+            key = '{}/{}'.format(scenario.name, size)
+            results[key] = {
+                'latency_ms': round(statistics.median(latencies), 3),
+                'peak_kib': round(peak, 1),
+                'aws_calls': calls
+            }
+            print('{:<40} {:>10.3f} {:>12.1f} {:>10}'.format(
+                key, results[key]['latency_ms'], results[key]['peak_kib'], calls))
+
+    return results
+
+
+def compare(results, baseline, latency_tolerance, memory_tolerance, latency_slack=1.0):
+    """ Returns the regressions of the results against the baseline.
+    Latency increases below latency_slack ms are scheduling noise.
+    """
+    regressions = []
+    for key, result in sorted(results.items()):
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+
+        if result['aws_calls'] > expected['aws_calls']:
+            regressions.append('{}: {} AWS calls, baseline {}'.format(
+                key, result['aws_calls'], expected['aws_calls']))
+        if result['latency_ms'] > max(
+                expected['latency_ms'] * (1 + latency_tolerance),
+                expected['latency_ms'] + latency_slack):
+            regressions.append('{}: {:.3f} ms, baseline {:.3f} ms'.format(
+                key, result['latency_ms'], expected['latency_ms']))
+        if result['peak_kib'] > expected['peak_kib'] * (1 + memory_tolerance):
+            regressions.append('{}: {:.1f} KiB peak, baseline {:.1f} KiB'.format(
+                key, result['peak_kib'], expected['peak_kib']))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 20000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=3,
+                        help='Discarded runs before measuring each scenario (default 3)')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Store the results as the new baseline')
+    parser.add_argument('--latency-tolerance', type=float, default=0.5,
+                        help='Allowed relative latency increase (default 0.5)')
+    parser.add_argument('--latency-slack-ms', type=float, default=1.0,
+                        help='Latency increase always allowed, in ms (default 1.0)')
+    parser.add_argument('--memory-tolerance', type=float, default=0.2,
+                        help='Allowed relative peak allocation increase (default 0.2)')
+    args = parser.parse_args()
+
+    print('{:<40} {:>10} {:>12} {:>10}'.format('scenario/size', 'median ms', 'peak KiB', 'AWS calls'))
+    results = run(args.sizes, args.repeat, args.warmup)
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+            output.write('\n')
+        print('Baseline written to {}'.format(args.baseline))
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('No baseline at {}, run with --update-baseline'.format(args.baseline))
+        return 0
+
+    with open(args.baseline) as baseline:
+        regressions = compare(
+            results, json.load(baseline),
+            args.latency_tolerance, args.memory_tolerance, args.latency_slack_ms)
+
+    for regression in regressions:
+        print('REGRESSION {}'.format(regression))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,301 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Load test of the handlers against the in-memory fake AWS backend of
+benchmarks/fake_aws.py. Seeds a platform of stacks, parameters, listener
+rules and pipelines, then invokes a weighted mix of handlers from
+concurrent workers sharing the warm caches, and reports the throughput
+and the latency percentiles of every handler.
+
+Usage:
+    python benchmarks/load_test.py [--stacks 2000] [--requests 2000] [--concurrency 8]
+        [--latency-ms 20] [--jitter-ms 10] [--throttle-rate 0.01] [--client-rate 50]
+        [--output results.json]
+"""
+
+import argparse
+import collections
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('PLATFORM_PRIORITY_LEDGER', 'memory')
+os.environ.setdefault('PLATFORM_DEPLOYMENT_ROLE', 'arn:aws:iam::012345678901:role/gurum-deployment')
+os.environ.setdefault('PLATFORM_LOG_LEVEL', 'WARNING')
+os.environ.setdefault('AWS_XRAY_SDK_ENABLED', 'false')
+os.environ.setdefault('PLATFORM_METRICS_ENABLED', 'false')
+
+sys.path.insert(0, os.path.join(ROOT, 'lambda_layers', 'dependencies', 'python'))
+for handler_dir in ['apps', os.path.join('apps', 'name'), 'services', 'events',
+                    os.path.join('pipelines', 'name', 'states')]:
+    sys.path.insert(0, os.path.join(ROOT, 'src', handler_dir))
+
+import logging  # noqa: E402
+
+import platform_config  # noqa: E402
+
+from diagnostics import DIAGNOSTICS  # noqa: E402
+
+import create_app  # noqa: E402
+import describe_app  # noqa: E402
+import describe_pipeline_state  # noqa: E402
+import list_apps  # noqa: E402
+import list_events  # noqa: E402
+import list_services  # noqa: E402
+import update_app  # noqa: E402
+
+from fake_aws import FakeAWS  # noqa: E402
+
+logging.disable(logging.CRITICAL)
+
+PERCENTILES = [50, 90, 99, 99.9]
+STACK_TYPES = [('app', 5), ('service', 3), ('pipeline', 2)]
+
+
+def seed(aws, stacks, groups):
+    """ Adds stacks of every type spread across groups, the platform
+    parameters, a listener rule per app and a pipeline per pipeline stack.
+    """
+    tags = platform_config.PLATFORM_TAGS
+    listener_arn = aws.elbv2.add_listener()
+    prefix = platform_config.PLATFORM_PREFIX
+
+    aws.ssm.add_parameter('/{}/platform/loadbalancer/listener-arn'.format(prefix), listener_arn)
+    aws.ssm.add_parameter('/{}/platform/vpc/id'.format(prefix), 'vpc-12345678')
+    aws.ssm.add_parameter('/{}/platform/ecs/cluster'.format(prefix), '{}-cluster'.format(prefix))
+
+    types = list(itertools.chain.from_iterable([stack_type] * weight for stack_type, weight in STACK_TYPES))
+    names = collections.defaultdict(list)
+
+    for number in range(stacks):
+        stack_type = types[number % len(types)]
+        group = 'team{}'.format(number // len(types) % groups)
+        name = '{}-{}{}'.format(prefix, stack_type, number)
+        parameters = {}
+        outputs = {}
+
+        if stack_type == 'app':
+            parameters = {'DesiredCount': '2', 'Priority': str(number + 1)}
+            aws.elbv2.add_rule(listener_arn, number + 1)
+        if stack_type == 'service':
+            parameters = {'ServiceBindings': 'app{}'.format(number - number % len(types))}
+        if stack_type == 'pipeline':
+            outputs = {'PipelineName': '{}-Pipeline'.format(name)}
+            aws.codepipeline.add_pipeline(outputs['PipelineName'])
+
+        aws.cloudformation.add_stack(
+            name,
+            parameters=parameters,
+            outputs=outputs,
+            description='Gurum {} stack'.format(stack_type),
+            tags={
+                tags['PRODUCT_TYPE']: stack_type,
+                tags['PRODUCT_FLAVOR']: 'ecs-fargate',
+                tags['VERSION']: 'latest',
+                tags['OWNER']: 'user@example.com',
+                tags['GROUPS']: group
+            },
+            events=8)
+        names[(stack_type, group)].append(name[len(prefix) + 1:])
+
+    return names
+
+
+class Workload:
+    """Weighted mix of handler invocations with their events"""
+
+    def __init__(self, names, groups, seed_value=None):
+        self.names = names
+        self.groups = groups
+        self.random = random.Random(seed_value)
+        self.created = itertools.count()
+        self.lock = threading.Lock()
+        self.mix = [
+            ('list_apps.get', list_apps.get, self.list_event, 30),
+            ('describe_app.get', describe_app.get, self.name_event('app'), 25),
+            ('list_events.get', list_events.get, self.name_event('app'), 15),
+            ('list_services.get', list_services.get, self.list_event, 10),
+            ('describe_pipeline_state.get', describe_pipeline_state.get, self.name_event('pipeline'), 10),
+            ('update_app.patch', update_app.patch, self.update_event, 5),
+            ('create_app.post', create_app.post, self.create_event, 5)
+        ]
+        self.weights = [weight for _, _, _, weight in self.mix]
+
+    def next(self):
+        with self.lock:
+            name, handler, event, _ = self.random.choices(self.mix, self.weights)[0]
+            group = 'team{}'.format(self.random.randrange(self.groups))
+
+            return name, handler, event(group)
+
+    def claims(self, group):
+        return {'email': 'user@example.com', 'groups': group, 'roles': 'owner'}
+
+    def list_event(self, group):
+        return {'claims': self.claims(group), 'params': {}, 'headers': {}}
+
+    def name_event(self, stack_type):
+        def event(group):
+            names = self.names[(stack_type, group)]
+            return {
+                'claims': self.claims(group),
+                'params': {'name': self.random.choice(names)},
+                'headers': {}
+            }
+
+        return event
+
+    def update_event(self, group):
+        event = self.name_event('app')(group)
+        event['body-json'] = [json.dumps({'config': {'DesiredCount': '3'}, 'upgrade_version': False})]
+
+        return event
+
+    def create_event(self, group):
+        return {
+            'claims': self.claims(group),
+            'headers': {},
+            'body-json': [json.dumps({
+                'name': 'loadtest{}'.format(next(self.created)),
+                'config': {'DesiredCount': '2'}
+            })]
+        }
+
+
+def status_code(invoke):
+    """ Returns the status code of a handler invocation, errors are
+    raised by response_builder.error with the response as JSON.
+    """
+    try:
+        return invoke()['statusCode']
+    except Exception as ex:
+        try:
+            return json.loads(str(ex))['statusCode']
+        except (ValueError, KeyError, TypeError):
+            return 'exception'
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(percent / 100 * len(values) + 0.5)) - 1)
+
+    return values[max(index, 0)]
+
+
+def run(workload, requests, concurrency):
+    latencies = collections.defaultdict(list)
+    statuses = collections.defaultdict(collections.Counter)
+    remaining = itertools.count()
+    lock = threading.Lock()
+
+    def worker():
+        while next(remaining) < requests:
+            name, handler, event = workload.next()
+            start = time.perf_counter()
+            code = status_code(lambda: handler(event, None))
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies[name].append(elapsed)
+                statuses[name][code] += 1
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    return latencies, statuses, time.perf_counter() - start
+
+
+def report(latencies, statuses, duration, aws):
+    results = {'handlers': {}}
+    every = list(itertools.chain.from_iterable(latencies.values()))
+
+    print('{:<30} {:>7} {:>9} {}  statuses'.format(
+        'handler', 'count', 'mean ms', ' '.join('{:>9}'.format('p{}'.format(p)) for p in PERCENTILES)))
+    for name in sorted(latencies) + ['total']:
+        values = every if name == 'total' else latencies[name]
+        result = {
+            'count': len(values),
+            'mean_ms': round(sum(values) / len(values), 3),
+            'max_ms': round(max(values), 3)
+        }
+        for percent in PERCENTILES:
+            result['p{}_ms'.format(percent)] = round(percentile(values, percent), 3)
+        if name != 'total':
+            result['statuses'] = {str(code): count for code, count in statuses[name].items()}
+            results['handlers'][name] = result
+        else:
+            results['total'] = result
+
+        print('{:<30} {:>7} {:>9.2f} {}  {}'.format(
+            name, result['count'], result['mean_ms'],
+            ' '.join('{:>9.2f}'.format(result['p{}_ms'.format(p)]) for p in PERCENTILES),
+            result.get('statuses', '')))
+
+    results['duration_s'] = round(duration, 3)
+    results['throughput_rps'] = round(len(every) / duration, 1)
+    results['aws_calls'] = dict(aws.calls)
+    results['aws_throttled'] = dict(aws.throttled)
+    results['client_throttling'] = {
+        name: count for name, count in DIAGNOSTICS.snapshot()['counters'].items()
+        if name.startswith('throttling.')
+    }
+
+    print('\n{} requests in {:.2f}s, {:.1f} requests/s, {} AWS calls, {} throttled'.format(
+        len(every), duration, results['throughput_rps'],
+        sum(aws.calls.values()), sum(aws.throttled.values())))
+    if results['client_throttling']:
+        print('Client-side throttling: {}'.format(results['client_throttling']))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--stacks', type=int, default=2000)
+    parser.add_argument('--groups', type=int, default=10)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Latency added to every AWS call')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Maximum random latency added on top')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Probability of an AWS call being throttled')
+    parser.add_argument('--max-calls-per-second', type=int, help='Throttle calls over this rate per operation')
+    parser.add_argument('--client-rate', type=float, default=platform_config.PLATFORM_THROTTLE_RATE,
+                        help='Calls per second of the client-side token bucket of each service, 0 disables it')
+    parser.add_argument('--stack-lookup', choices=['tags', 'scan'], default=platform_config.PLATFORM_STACK_LOOKUP)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write the results as JSON to a file')
+    args = parser.parse_args()
+
+    platform_config.PLATFORM_STACK_LOOKUP = args.stack_lookup
+    platform_config.PLATFORM_THROTTLE_RATE = args.client_rate
+
+    aws = FakeAWS(
+        region=platform_config.PLATFORM_REGION,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        throttle_rate=args.throttle_rate,
+        max_calls_per_second=args.max_calls_per_second,
+        seed=args.seed)
+    names = seed(aws, args.stacks, args.groups)
+    aws.install()
+
+    latencies, statuses, duration = run(Workload(names, args.groups, args.seed), args.requests, args.concurrency)
+    results = report(latencies, statuses, duration, aws)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
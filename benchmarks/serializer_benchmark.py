@@ -0,0 +1,60 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Benchmark for the response body serializers on large list payloads,
+comparing the stdlib serializer with orjson (when installed).
+
+Usage:
+    PYTHONPATH=lambda_layers/dependencies/python \
+        python benchmarks/serializer_benchmark.py [--stacks 10000]
+"""
+
+import argparse
+import datetime
+import json
+import timeit
+
+import json_serializer
+
+
+def generate_payload(count):
+    created_at = datetime.datetime(2019, 1, 1, tzinfo=datetime.timezone.utc)
+    apps = []
+    for i in range(count):
+        apps.append({
+            'name': 'app{}'.format(i),
+            'created_at': created_at + datetime.timedelta(minutes=i),
+            'updated_at': created_at + datetime.timedelta(hours=i),
+            'status': 'UPDATE_COMPLETE',
+            'tasks': str(i % 4)
+        })
+
+    return {'apps': apps, 'next_token': None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--stacks', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    payload = generate_payload(args.stacks)
+    serializers = [json_serializer.StdlibSerializer]
+    if json_serializer.orjson is not None:
+        serializers.append(json_serializer.OrjsonSerializer)
+    else:
+        print('orjson is not installed, only the stdlib serializer is measured')
+
+    expected = json.loads(json_serializer.StdlibSerializer.dumps(payload))
+
+    print('{} stacks'.format(args.stacks))
+    for serializer in serializers:
+        assert json.loads(serializer.dumps(payload)) == expected
+        best = min(timeit.repeat(lambda: serializer.dumps(payload), number=1, repeat=args.repeat))
+        print('{:>10}: {:8.2f} ms {:>10} bytes'.format(
+            serializer.name, best * 1000, len(serializer.dumps(payload))))
+
+
+if __name__ == '__main__':
+    main()
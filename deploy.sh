@@ -27,6 +27,14 @@ if [ ! -d "lambda_layers/aws-xray-sdk" ]; then
     pip3 install aws-xray-sdk --target lambda_layers/aws-xray-sdk/python
 fi
 
+# Build the Lambda Layer with the compiled response encoding libraries for the
+# Lambda runtime, rebuilding it whenever lambda_layers/encoding-requirements.txt changes.
+if [ ! -d "lambda_layers/encoding" ] || [ "lambda_layers/encoding-requirements.txt" -nt "lambda_layers/encoding" ]; then
+    rm -rf lambda_layers/encoding
+    pip3 install -r lambda_layers/encoding-requirements.txt --target lambda_layers/encoding/python \
+        --platform manylinux2014_x86_64 --python-version 3.7 --implementation cp --only-binary=:all:
+fi
+
 # Clear local pycache in lambda layer dependencies
 find lambda_layers -type d -name "__pycache__" -exec rm -r {} \;
 
@@ -1,11 +1,8 @@
-from aws_xray_sdk.core import patch_all
 from logger import configure_logger
 
 import platform_config
 import transform_utils
 
-patch_all()
-
 LOGGER = configure_logger(__name__)
 
 
@@ -18,7 +15,8 @@ ROLE_PERMISSIONS['owner'] = [
     'read',
     'update',
     'delete',
-    'transfer_ownership']
+    'transfer_ownership',
+    'diagnostics']
 ROLE_PERMISSIONS['admin'] = [
     'create',
     'read',
@@ -63,6 +61,16 @@ class Auth:
         if not self._tags_are_valid(tags, self.stack_type):
             raise PermissionError('Permission denied.', 403)
 
+    def has_permission(self):
+        """
+        Validate that the users roles give the required permission,
+        for operations that don't act on a stack.
+        """
+        try:
+            return self.required_permission in self._get_permissions_from_roles()
+        except PermissionError:
+            return False
+
     def _tags_are_valid(self, tags, stack_type):
         stack_tags = transform_utils.kv_to_dict(tags, 'Key', 'Value')
 
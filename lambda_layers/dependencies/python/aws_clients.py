@@ -0,0 +1,90 @@
+"""AWS Clients module
+
+Process wide registry of boto3 clients. Clients are created lazily on
+first use, keyed by service and region, and reused across warm
+invocations so the HTTPS connection pool is kept alive. boto3 itself
+is imported, and the SDK patched for tracing, on the first client.
+The calls of the clients are recorded by the metrics module.
+"""
+
+import threading
+
+from logger import configure_logger
+
+import metrics
+import platform_config
+import tracing
+
+LOGGER = configure_logger(__name__)
+
+_CLIENT_CONFIG = None
+_CLIENTS = {}
+_LOCK = threading.Lock()
+
+
+def get_client_config():
+    """ Returns the botocore Config shared by every client
+    """
+    global _CLIENT_CONFIG
+
+    if _CLIENT_CONFIG is None:
+        from botocore.config import Config
+
+        _CLIENT_CONFIG = Config(
+            max_pool_connections=platform_config.PLATFORM_CLIENT_MAX_POOL_CONNECTIONS,
+            connect_timeout=platform_config.PLATFORM_CLIENT_CONNECT_TIMEOUT,
+            read_timeout=platform_config.PLATFORM_CLIENT_READ_TIMEOUT,
+            retries={
+                'mode': platform_config.PLATFORM_CLIENT_RETRY_MODE,
+                'max_attempts': platform_config.PLATFORM_CLIENT_MAX_ATTEMPTS
+            }
+        )
+
+    return _CLIENT_CONFIG
+
+
+def get_client(service, region=None):
+    """ Returns the shared client for a service and region.
+
+    Args:
+        service (string): Name of the AWS service, e.g. 'cloudformation'.
+        region (string): Optional region, defaults to the platform region.
+    Basic Usage:
+        >>> client = get_client('cloudformation')
+    Returns:
+        Client: boto3 client for the service.
+    """
+    key = (service, region or platform_config.PLATFORM_REGION)
+    client = _CLIENTS.get(key)
+
+    if client is None:
+        with _LOCK:
+            client = _CLIENTS.get(key)
+
+            if client is None:
+                tracing.patch()
+                import boto3
+
+                LOGGER.debug('Creating %s client in %s', key[0], key[1])
+                client = boto3.client(
+                    key[0],
+                    region_name=key[1],
+                    config=get_client_config())
+                _CLIENTS[key] = metrics.instrument_client(client)
+
+    return client
+
+
+def register_client(service, client, region=None):
+    """ Registers a client to be returned for a service and region,
+    e.g. a stubbed client.
+    """
+    with _LOCK:
+        _CLIENTS[(service, region or platform_config.PLATFORM_REGION)] = metrics.instrument_client(client)
+
+
+def reset():
+    """ Drops every registered client.
+    """
+    with _LOCK:
+        _CLIENTS.clear()
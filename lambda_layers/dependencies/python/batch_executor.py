@@ -0,0 +1,205 @@
+"""Batch Executor module
+
+Runs the stack operations of a batch request on a bounded thread pool
+and collects a result for every item, so one failing item does not
+stop the rest of the batch.
+"""
+
+import json
+
+from concurrent.futures import ThreadPoolExecutor
+
+from exceptions import AlreadyExists, InvalidInput, NoSuchObject, \
+    PermissionDenied, UnknownParameter
+from logger import configure_logger
+
+import platform_config
+import response_builder
+import throttling
+
+LOGGER = configure_logger(__name__)
+
+# Status codes reported for items failing with a known exception
+ERROR_CODES = {
+    AlreadyExists: 409,
+    InvalidInput: 400,
+    NoSuchObject: 400,
+    PermissionDenied: 401,
+    UnknownParameter: 400
+}
+
+
+def get_batch_items(payload, key):
+    """ Returns the list of items of a batch payload validating
+    it is a non empty list within the batch size limit.
+
+    Args:
+        payload (dict): Request payload.
+        key (string): Key holding the list of items.
+    Returns:
+        List: List of items in the batch.
+    """
+    items = payload.get(key) if isinstance(payload, dict) else None
+
+    if not isinstance(items, list) or not items:
+        raise InvalidInput('{} must be a non empty list.'.format(key))
+
+    if len(items) > platform_config.PLATFORM_BATCH_MAX_ITEMS:
+        raise InvalidInput('A batch is limited to {} items.'.format(
+            platform_config.PLATFORM_BATCH_MAX_ITEMS))
+
+    return items
+
+
+def get_item_names(items):
+    """ Returns the name of every item of a batch, items are either
+    names or dicts with a name key.
+    """
+    names = []
+
+    for item in items:
+        name = item.get('name') if isinstance(item, dict) else item
+
+        if not isinstance(name, str) or not name:
+            raise InvalidInput('Every item must have a name.')
+
+        names.append(name)
+
+    return names
+
+
+def get_item_payload(item):
+    """ Returns the payload of a create or update item, which must be
+    an object. Raised for a single item, e.g. a bare name, the error is
+    reported as a 400 for that item only.
+    """
+    if not isinstance(item, dict):
+        raise InvalidInput('Every item must be an object.')
+
+    return item
+
+
+def get_item_event(event, name):
+    """ Returns the event a manager is created with for a single item,
+    with the claims of the batch request and the name of the item.
+    """
+    return {
+        'claims': event['claims'],
+        'params': {'name': name}
+    }
+
+
+def get_max_workers(payload):
+    """ Returns the concurrency for a batch, optionally lowered by
+    max_concurrency in the payload but never above the platform limit.
+    """
+    max_workers = platform_config.PLATFORM_BATCH_MAX_WORKERS
+
+    try:
+        requested = int(payload.get('max_concurrency', max_workers))
+    except (ValueError, TypeError) as ex:
+        raise InvalidInput('max_concurrency must be an integer.') from ex
+
+    return max(1, min(requested, max_workers))
+
+
+def handle_batch(event, key, manager_class, func, result_key, messages=None):
+    """ Handles a batch request, calling func with a manager for the
+    stack of every item. Items under 'items' are payloads and func is
+    called with the manager and the payload, items under 'names' are
+    names and func is called with the manager and the name.
+
+    Args:
+        event (dict): Batch request event.
+        key (string): Key holding the list of items, 'items' or 'names'.
+        manager_class (class): StackManager subclass handling an item.
+        func (function): Function performing the operation for an item.
+        result_key (string): Key of the results in the response.
+        messages (dict): Optional error messages by exception class.
+    Basic Usage:
+        >>> handle_batch(event, 'names', AppManager, delete_app, 'apps')
+    Returns:
+        Dict: Response with the result of every item under result_key.
+    """
+    try:
+        payload = json.loads(event['body-json'][0])
+        LOGGER.debug(
+            'Received payload: %s',
+            payload)
+
+        items = get_batch_items(payload, key)
+        names = get_item_names(items)
+        max_workers = get_max_workers(payload)
+    except (InvalidInput, ValueError) as ex:
+        return response_builder.error('{}'.format(ex), 400)
+
+    def run_item(item):
+        if key == 'names':
+            return func(manager_class(get_item_event(event, item)), item)
+
+        payload = get_item_payload(item)
+        return func(manager_class(get_item_event(event, payload['name'])), payload)
+
+    results = run_batch(run_item, items, max_workers, messages)
+
+    data = {}
+    data[result_key] = []
+
+    for name, result in zip(names, results):
+        result['name'] = name
+        data[result_key].append(result)
+
+    return response_builder.success(data)
+
+
+def run_batch(func, items, max_workers, messages=None):
+    """ Runs func for every item on a bounded thread pool.
+
+    Args:
+        func (function): Function called with each item.
+        items (list): Items to process.
+        max_workers (int): Maximum number of items processed at once.
+        messages (dict): Optional error messages by exception class,
+            defaults to the message of the exception.
+    Basic Usage:
+        >>> run_batch(create_app, [{'name': 'app1'}, {'name': 'app2'}], 4)
+    Returns:
+        List: List of results in the same order as the items
+        [
+            {
+                'status_code': 200,
+                'result': ...
+            },
+            {
+                'status_code': 409,
+                'error': 'AlreadyExists'
+            }
+        ]
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(func, item) for item in items]
+
+        return [_collect(future, messages or {}) for future in futures]
+
+
+def _collect(future, messages):
+    try:
+        return {
+            'status_code': 200,
+            'result': future.result()
+        }
+    except Exception as ex:
+        LOGGER.debug('Batch item failed: %s', ex, exc_info=True)
+
+        throttled = throttling.find_throttled(ex)
+        if throttled is not None:
+            return {
+                'status_code': 503,
+                'error': str(throttled),
+                'retry_after': throttled.retry_after
+            }
+
+        return {
+            'status_code': ERROR_CODES.get(type(ex), 500),
+            'error': messages.get(type(ex)) or str(ex) or type(ex).__name__
+        }
@@ -1,19 +1,74 @@
+import threading
+import time
+
+from collections import OrderedDict
+
+from diagnostics import DIAGNOSTICS
+
 
 class Cache:
     """
     Used as a cache for calls within threads.
     A single instance of this class is passed into all threads to act
     as a cache.
+
+    Args:
+        ttl (int): Optional number of seconds an entry is valid for,
+            0 or less disables the cache.
+        max_size (int): Optional maximum number of entries. The least
+            recently added entry is evicted when the limit is reached.
+        name (string): Optional name, the evictions and expirations of
+            named caches are counted in the diagnostics.
     """
 
-    def __init__(self):
-        self._stash = {}
+    def __init__(self, ttl=None, max_size=None, name=None):
+        self._stash = OrderedDict()
+        self._ttl = ttl
+        self._max_size = max_size
+        self._name = name
+        self._lock = threading.Lock()
 
     def check(self, key):
-        try:
-            return self._stash[key]
-        except KeyError:
-            return None
+        with self._lock:
+            try:
+                expires_at, value = self._stash[key]
+            except KeyError:
+                return None
+
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._stash[key]
+                self._count('expirations')
+                return None
+
+            return value
 
     def add(self, key, value):
-        self._stash[key] = value
+        if self._ttl is not None and self._ttl <= 0:
+            return
+
+        expires_at = time.monotonic() + self._ttl if self._ttl is not None else None
+
+        with self._lock:
+            self._stash.pop(key, None)
+            self._stash[key] = (expires_at, value)
+
+            if self._max_size is not None:
+                while len(self._stash) > self._max_size:
+                    self._stash.popitem(last=False)
+                    self._count('evictions')
+
+    def remove(self, key):
+        with self._lock:
+            self._stash.pop(key, None)
+
+    def keys(self):
+        with self._lock:
+            return list(self._stash.keys())
+
+    def clear(self):
+        with self._lock:
+            self._stash.clear()
+
+    def _count(self, counter):
+        if self._name is not None:
+            DIAGNOSTICS.count('cache.{}.{}'.format(self._name, counter))
@@ -0,0 +1,177 @@
+"""Content Negotiation module
+
+Picks the media type and content coding of a response from the Accept
+and Accept-Encoding headers of the request, and encodes the response
+accordingly. Compressed and MessagePack bodies are base64 encoded and
+decoded back to binary by API Gateway.
+
+Both media types share the envelope of the API, the status code and the
+body serialized in the media type: a JSON string for JSON, MessagePack
+bytes for MessagePack.
+"""
+
+import base64
+import json
+import zlib
+
+from logger import configure_logger
+from transform_utils import datetime_serialize
+
+import platform_config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+LOGGER = configure_logger(__name__)
+
+JSON = 'application/json'
+MSGPACK = 'application/msgpack'
+
+# Media types accepted for MessagePack, it has no registered type
+MSGPACK_TYPES = [MSGPACK, 'application/x-msgpack']
+
+# Content codings by order of preference when equally weighted
+ENCODINGS = ['br', 'gzip']
+
+# Request headers every negotiated response depends on, including
+# the uncompressed JSON and 304 responses
+VARY = 'Accept, Accept-Encoding'
+
+
+def negotiate_media_type(accept):
+    """ Returns MSGPACK if the client opted in to MessagePack (and prefers
+    it over JSON) and msgpack is installed, JSON otherwise.
+    """
+    if msgpack is None or not accept:
+        return JSON
+
+    weights = _parse_weights(accept)
+    msgpack_weight = max(weights.get(media_type, 0) for media_type in MSGPACK_TYPES)
+    json_weight = max(weights.get(media_type, 0) for media_type in [JSON, 'application/*', '*/*'])
+
+    return MSGPACK if msgpack_weight > 0 and msgpack_weight >= json_weight else JSON
+
+
+def negotiate_encoding(accept_encoding, size=None):
+    """ Returns the preferred content coding of an Accept-Encoding header
+    among the ones available, or None for the identity coding. Bodies of
+    less than PLATFORM_COMPRESSION_MIN_SIZE bytes aren't compressed.
+    """
+    if not accept_encoding:
+        return None
+
+    if size is not None and size < platform_config.PLATFORM_COMPRESSION_MIN_SIZE:
+        return None
+
+    weights = _parse_weights(accept_encoding)
+    available = [encoding for encoding in ENCODINGS
+                 if encoding != 'br' or brotli is not None]
+
+    best, best_weight = None, 0
+    for encoding in available:
+        weight = weights.get(encoding, weights.get('*', 0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+
+    return best
+
+
+def variant(media_type, encoding):
+    """ Returns the suffix identifying a representation in its ETag
+    """
+    parts = []
+    if media_type != JSON:
+        parts.append('msgpack')
+    if encoding:
+        parts.append(encoding)
+
+    return '-'.join(parts)
+
+
+def encode(response, data, media_type, encoding):
+    """ Encodes a response in the negotiated media type and content coding.
+    Returns the response unchanged for uncompressed JSON, its Vary
+    header is set by response_builder.success.
+
+    Args:
+        response (dict): Response with the JSON body, status and headers.
+        data: Data the body was serialized from.
+        media_type (string): JSON or MSGPACK.
+        encoding (string): Content coding or None.
+    Returns:
+        Dict: Response with a base64 body, isBase64Encoded and the
+        Content-Type and Content-Encoding headers.
+    """
+    if media_type == JSON and not encoding:
+        return response
+
+    if media_type == JSON:
+        payload = json.dumps(
+            {'body': response['body'], 'statusCode': response['statusCode']}
+        ).encode('utf-8')
+    else:
+        body = msgpack.packb(data, default=datetime_serialize, use_bin_type=True)
+        payload = msgpack.packb(
+            {'body': body, 'statusCode': response['statusCode']},
+            use_bin_type=True)
+
+    if encoding:
+        compressed = compress(payload, encoding)
+        LOGGER.debug(
+            'Compressed response from %s to %s bytes with %s',
+            len(payload),
+            len(compressed),
+            encoding)
+        payload = compressed
+
+    headers = dict(response.get('headers', {}))
+    headers['Content-Type'] = media_type
+    if encoding:
+        headers['Content-Encoding'] = encoding
+
+    return {
+        'body': base64.b64encode(payload).decode('utf-8'),
+        'statusCode': response['statusCode'],
+        'headers': headers,
+        'isBase64Encoded': True
+    }
+
+
+def compress(payload, encoding):
+    if encoding == 'br':
+        return brotli.compress(payload, quality=platform_config.PLATFORM_COMPRESSION_LEVEL)
+
+    # gzip container with a zero mtime so equal bodies compress equally
+    compressor = zlib.compressobj(platform_config.PLATFORM_COMPRESSION_LEVEL, zlib.DEFLATED, 31)
+
+    return compressor.compress(payload) + compressor.flush()
+
+
+def _parse_weights(header):
+    weights = {}
+
+    for part in header.split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+
+        weight = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+
+        weights[token] = max(weight, weights.get(token, 0.0))
+
+    return weights
@@ -0,0 +1,211 @@
+"""Diagnostics module
+
+Long-lived latency histograms and counters of a warm container, kept
+across invocations until the container is recycled. Histograms cover
+each AWS API operation (aws.<service>.<Operation>) and each StackManager
+method, counters the AWS retries and throttled attempts and the cache
+evictions and expirations. Snapshots are labelled with the id of the
+container and the time it started.
+
+Histograms are HDR-style: values are counted in log-linear buckets with
+a bounded relative error, so recording is O(1) and memory stays small
+whatever the number of values.
+"""
+
+import functools
+import math
+import os
+import threading
+import time
+import uuid
+
+# Error codes of throttled AWS API calls
+THROTTLING_CODES = frozenset([
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestLimitExceeded',
+    'RequestThrottled',
+    'TooManyRequestsException'
+])
+
+PERCENTILES = [50, 90, 99, 99.9]
+
+
+class Histogram:
+    """Histogram of integer values with significant_digits of precision,
+    e.g. latencies in microseconds.
+
+    Args:
+        significant_digits (int): Decimal digits of precision, 2 keeps
+            the relative error of the reported values under 1%.
+    Basic Usage:
+        >>> histogram = Histogram()
+        >>> histogram.record(1530)
+        >>> histogram.percentile(99)
+    """
+
+    def __init__(self, significant_digits=2):
+        self._sub_bucket_bits = int(math.ceil(math.log2(2 * 10 ** significant_digits)))
+        self._sub_bucket_half_bits = self._sub_bucket_bits - 1
+        self._counts = {}
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value):
+        bucket = max(value.bit_length() - self._sub_bucket_bits, 0)
+
+        return (bucket << self._sub_bucket_half_bits) + (value >> bucket)
+
+    def _highest_value(self, index):
+        """ Returns the highest value counted in the bucket of an index
+        """
+        bucket = max((index >> self._sub_bucket_half_bits) - 1, 0)
+        sub_bucket = index - (bucket << self._sub_bucket_half_bits)
+
+        return ((sub_bucket + 1) << bucket) - 1
+
+    def record(self, value):
+        value = max(int(value), 0)
+        index = self._index(value)
+
+        with self._lock:
+            self._counts[index] = self._counts.get(index, 0) + 1
+            self.count += 1
+            self.total += value
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, percent):
+        """ Returns the value under which percent of the values are,
+        within the precision of the histogram.
+        """
+        with self._lock:
+            if not self.count:
+                return None
+
+            rank = max(int(math.ceil(percent / 100 * self.count)), 1)
+            seen = 0
+            for index in sorted(self._counts):
+                seen += self._counts[index]
+                if seen >= rank:
+                    return min(self._highest_value(index), self.max)
+
+        return self.max
+
+    def summary(self, scale=1):
+        """ Returns the count, min, mean, max and percentiles of the values,
+        divided by scale (e.g. 1000 for microseconds to milliseconds).
+        """
+        if not self.count:
+            return {'count': 0}
+
+        summary = {
+            'count': self.count,
+            'min': self.min / scale,
+            'mean': round(self.total / self.count / scale, 3),
+            'max': self.max / scale
+        }
+        for percent in PERCENTILES:
+            summary['p{}'.format(percent)] = self.percentile(percent) / scale
+
+        return summary
+
+
+class Diagnostics:
+    """Histograms and counters of the container by name"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        # The log stream of a Lambda function is unique to its container
+        self.container_id = os.getenv('AWS_LAMBDA_LOG_STREAM_NAME') or uuid.uuid4().hex
+
+    def histogram(self, name):
+        histogram = self._histograms.get(name)
+
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram())
+
+        return histogram
+
+    def record_latency(self, name, seconds):
+        """ Records a latency in the histogram of a name, in microseconds
+        """
+        self.histogram(name).record(seconds * 1000000)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self):
+        """ Returns the histogram summaries in milliseconds and the counters
+        """
+        with self._lock:
+            histograms = dict(self._histograms)
+            counters = dict(self._counters)
+
+        return {
+            'container_id': self.container_id,
+            'started_at': self.started_at,
+            'uptime_seconds': round(time.time() - self.started_at, 3),
+            'latency_ms': {
+                name: histogram.summary(scale=1000)
+                for name, histogram in sorted(histograms.items())
+            },
+            'counters': counters
+        }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+
+# Diagnostics of the container, shared across warm invocations
+DIAGNOSTICS = Diagnostics()
+
+
+def timed(func):
+    """ Decorator recording the latency of a function in the histogram
+    named after its qualified name, e.g. StackManager.list_stacks.
+    """
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started_at = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            DIAGNOSTICS.record_latency(name, time.perf_counter() - started_at)
+
+    return wrapper
+
+
+def record_call(service, operation, seconds, parsed=None):
+    """ Records an AWS API call, its retries and whether it was throttled
+    """
+    DIAGNOSTICS.record_latency('aws.{}.{}'.format(service, operation), seconds)
+
+    if parsed:
+        retries = parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+        if retries:
+            DIAGNOSTICS.count('aws.retries', retries)
+        if parsed.get('Error', {}).get('Code') in THROTTLING_CODES:
+            DIAGNOSTICS.count('aws.throttled_calls')
+
+
+def record_retry_attempt(response=None, **kwargs):
+    """ Counts the throttled attempts botocore is about to retry
+    (needs-retry event), the retried calls themselves succeed.
+    """
+    if response is not None and response[1].get('Error', {}).get('Code') in THROTTLING_CODES:
+        DIAGNOSTICS.count('aws.throttled_attempts')
@@ -1,35 +1,147 @@
 import random
-import boto3
+import threading
 
+from cache import Cache
+from exceptions import LimitExceeded
 from logger import configure_logger
+from metrics import METRICS
+from paginator import paginator
 
+import aws_clients
 import platform_config
+import priority_ledger
 
 LOGGER = configure_logger(__name__)
 
+# Highest rule priority accepted by an Application Load Balancer listener
+MAX_RULE_PRIORITY = 50000
 
-def get_random_rule_priority(listener_arn):
-    """ Returns a random available rule priority number for a given ALB Listener Arn
+# Number of random slots tried before scanning the bitmap for a free one
+RANDOM_PROBES = 8
+
+# Number of priorities tried before giving up on claiming one
+CLAIM_ATTEMPTS = 10
+
+
+class PriorityBitmap:
+    """Compact bitmap of the rule priorities (1 - MAX_RULE_PRIORITY)
+    in use on a listener.
+    """
+
+    def __init__(self, priorities=(), size=MAX_RULE_PRIORITY):
+        self._size = size
+        self._bits = bytearray((size >> 3) + 1)
+        self.used = 0
+
+        for priority in priorities:
+            self.mark(priority)
+
+    def is_used(self, priority):
+        return bool(self._bits[priority >> 3] & (1 << (priority & 7)))
+
+    def mark(self, priority):
+        if not 1 <= priority <= self._size or self.is_used(priority):
+            return
+        self._bits[priority >> 3] |= 1 << (priority & 7)
+        self.used += 1
+
+    def allocate(self):
+        """ Picks a random free priority and marks it as used.
+        Random probes find a free slot in O(1) on a sparse listener,
+        a scan from a random offset covers busy listeners.
+        """
+        if self.used >= self._size:
+            raise LimitExceeded('No free rule priority on listener.')
+
+        for _ in range(RANDOM_PROBES):
+            priority = random.randint(1, self._size)
+            if not self.is_used(priority):
+                self.mark(priority)
+                return priority
+
+        start = random.randint(1, self._size)
+        for offset in range(self._size):
+            priority = (start + offset - 1) % self._size + 1
+            if not self.is_used(priority):
+                self.mark(priority)
+                return priority
+
+        raise LimitExceeded('No free rule priority on listener.')
+
+
+# Listener occupancy shared across warm invocations of the container
+OCCUPANCY_CACHE = Cache(
+    ttl=platform_config.PLATFORM_RULE_PRIORITY_TTL,
+    max_size=32,
+    name='rule_priority')
+
+_LOCK = threading.Lock()
+
+
+def get_listener_occupancy(listener_arn):
+    """ Returns a bitmap of the rule priorities in use on a listener,
+    reading every page of its rules.
     """
-    client = boto3.client('elbv2', region_name=platform_config.PLATFORM_REGION)
-    rules = {}
+    client = aws_clients.get_client('elbv2')
 
     try:
-        rules = client.describe_rules(
-            ListenerArn=listener_arn,
-        )['Rules']
+        priorities = [
+            int(rule['Priority'])
+            for rule in paginator(client.describe_rules, ListenerArn=listener_arn)
+            if rule['Priority'].isdigit()
+        ]
     except Exception as ex:
         LOGGER.exception(ex)
         raise
 
-    priorities = [int(rule['Priority']) for rule in rules if rule['Priority'].isdigit()]
+    LOGGER.debug(
+        'Listener %s has %s prioritized rules',
+        listener_arn,
+        len(priorities))
 
-    if not priorities:
-        return 1
+    return PriorityBitmap(priorities)
 
-    allocated_set = set(priorities)
-    possible_range_set = set(range(50000))
-    available_range_set = possible_range_set.difference(allocated_set)
-    random_rule_priority = random.sample(available_range_set, 1)[0]
 
-    return random_rule_priority
+def get_random_rule_priority(listener_arn):
+    """ Returns a random available rule priority number for a given ALB Listener Arn
+    """
+    with _LOCK:
+        occupancy = OCCUPANCY_CACHE.check(listener_arn)
+        METRICS.cache_lookup('RulePriority', occupancy is not None)
+
+        if occupancy is None:
+            occupancy = get_listener_occupancy(listener_arn)
+            OCCUPANCY_CACHE.add(listener_arn, occupancy)
+
+        return occupancy.allocate()
+
+
+def claim_rule_priority(listener_arn, owner='', ledger=None):
+    """ Returns an available rule priority for a given ALB Listener Arn
+    that has been reserved in the priority ledger, so parallel creates
+    never hand the same priority to CloudFormation.
+    """
+    ledger = ledger or priority_ledger.get_ledger()
+
+    for _ in range(CLAIM_ATTEMPTS):
+        priority = get_random_rule_priority(listener_arn)
+
+        if ledger.claim(listener_arn, priority, owner):
+            return priority
+
+        LOGGER.debug('Priority %s is already claimed, retrying.', priority)
+
+    raise LimitExceeded('Unable to claim a free rule priority on listener.')
+
+
+def release_rule_priority(listener_arn, priority, ledger=None):
+    """ Releases a rule priority claimed by claim_rule_priority, e.g.
+    when the stack it was claimed for failed or was deleted. Failures are
+    only logged, the claim then expires on its own.
+    """
+    ledger = ledger or priority_ledger.get_ledger()
+
+    try:
+        ledger.release(listener_arn, priority)
+    except Exception as ex:
+        LOGGER.warning('Unable to release priority %s: %s', priority, ex)
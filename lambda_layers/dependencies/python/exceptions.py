@@ -1,3 +1,5 @@
+import math
+
 
 class Error(Exception):
     """Base class for other exceptions"""
@@ -57,6 +59,16 @@ class InsufficientCapabilities(Error):
     pass
 
 
+class Throttled(Error):
+    """Raised when calls to an AWS API are rejected client-side
+    because it is throttling the account, retry_after is the
+    number of seconds to wait before retrying."""
+
+    def __init__(self, message='Throttled.', retry_after=1):
+        Error.__init__(self, message)
+        self.retry_after = max(int(math.ceil(retry_after)), 1)
+
+
 class UnknownError(Error):
     """Raised for unhandled exceptions or errors
     that should be hidden from the client"""
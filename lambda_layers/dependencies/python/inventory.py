@@ -0,0 +1,69 @@
+"""Stack Inventory module
+
+Keeps the stacks belonging to a group, indexed by the platform
+groups tag and product type tag, in memory for warm invocations.
+Filtered listings are kept next to the group under their query so
+the following pages of a query are served without another lookup.
+"""
+
+from cache import Cache
+from logger import configure_logger
+from metrics import METRICS
+
+import platform_config
+
+LOGGER = configure_logger(__name__)
+
+
+class StackInventory:
+    """Class used for caching filtered stacks per group and product type
+    """
+
+    def __init__(self, ttl, max_size):
+        self._cache = Cache(ttl=ttl, max_size=max_size, name='inventory')
+
+    def get(self, groups, stack_type, query=None):
+        """Returns the cached stacks for a group, type and optional
+        query or None
+        """
+        stacks = self._cache.check(_key(groups, stack_type, query))
+        METRICS.cache_lookup('Inventory', stacks is not None)
+        LOGGER.debug(
+            'Inventory %s for %s (%s) %s',
+            'miss' if stacks is None else 'hit',
+            groups,
+            stack_type,
+            query or '')
+
+        return stacks
+
+    def put(self, groups, stack_type, stacks, query=None):
+        """Stores the stacks for a group, type and optional query
+        """
+        self._cache.add(_key(groups, stack_type, query), stacks)
+
+    def invalidate(self, groups, stack_type=None):
+        """Removes cached stacks for a group, along with the queries
+        on them. Invalidates every type for the group if stack_type is
+        not given.
+        """
+        LOGGER.debug('Invalidating inventory for %s (%s)', groups, stack_type)
+
+        for key in self._cache.keys():
+            if key[0] != groups:
+                continue
+            if stack_type is None or key[1] in (stack_type, 'any'):
+                self._cache.remove(key)
+
+    def clear(self):
+        self._cache.clear()
+
+
+def _key(groups, stack_type, query):
+    return groups, stack_type, tuple(sorted((query or {}).items()))
+
+
+# Module level inventory shared across warm invocations of the container
+INVENTORY = StackInventory(
+    platform_config.PLATFORM_INVENTORY_TTL,
+    platform_config.PLATFORM_INVENTORY_MAX_SIZE)
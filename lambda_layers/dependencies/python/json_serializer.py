@@ -0,0 +1,80 @@
+"""JSON Serializer module
+
+Serializers used for response bodies. The stdlib serializer is used
+unless orjson, provided by the encoding layer, is opted in with
+PLATFORM_JSON_SERIALIZER.
+Both render datetimes with transform_utils.datetime_serialize, but
+orjson writes compact JSON without the separator spaces of the stdlib,
+so the bodies and their ETags differ byte for byte between the two.
+"""
+
+import json
+
+from logger import configure_logger
+from transform_utils import datetime_serialize
+
+import platform_config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LOGGER = configure_logger(__name__)
+
+
+class StdlibSerializer:
+    """Serializer built on the json module of the standard library"""
+
+    name = 'json'
+
+    @staticmethod
+    def dumps(obj):
+        return json.dumps(obj, default=datetime_serialize)
+
+
+class OrjsonSerializer:
+    """Serializer built on orjson. Datetimes are passed through to
+    datetime_serialize to keep their format, everything else is encoded
+    natively. Objects orjson can't encode (e.g. integers over 64 bits)
+    fall back to the stdlib serializer.
+    """
+
+    name = 'orjson'
+
+    @staticmethod
+    def dumps(obj):
+        try:
+            return orjson.dumps(
+                obj,
+                default=datetime_serialize,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+            ).decode('utf-8')
+        except orjson.JSONEncodeError:
+            LOGGER.debug('orjson failed to encode, using the stdlib serializer.')
+            return StdlibSerializer.dumps(obj)
+
+
+SERIALIZERS = {
+    StdlibSerializer.name: StdlibSerializer,
+    OrjsonSerializer.name: OrjsonSerializer
+}
+
+
+def get_serializer(name=None):
+    """ Returns the serializer configured by PLATFORM_JSON_SERIALIZER
+    ('json', 'orjson' or 'auto'), 'auto' picks orjson when installed.
+    """
+    name = name or platform_config.PLATFORM_JSON_SERIALIZER
+
+    if name == 'auto':
+        name = OrjsonSerializer.name if orjson is not None else StdlibSerializer.name
+
+    if name == OrjsonSerializer.name and orjson is None:
+        LOGGER.warning('orjson is not installed, using the stdlib serializer.')
+        name = StdlibSerializer.name
+
+    return SERIALIZERS.get(name, StdlibSerializer)
+
+
+SERIALIZER = get_serializer()
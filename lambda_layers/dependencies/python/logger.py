@@ -1,24 +1,195 @@
+"""Logger module
+
+Loggers of the platform modules, all sharing a single handler. The level
+is set by PLATFORM_LOG_LEVEL and records are written as text or, with
+PLATFORM_LOG_FORMAT=json, as one JSON object per line. A sample of the
+requests (PLATFORM_LOG_DEBUG_SAMPLE_RATE) is logged at DEBUG whatever
+the level, see request_logging.
+
+Records are formatted by the caller and written to stdout by a background
+thread (PLATFORM_LOG_QUEUE), the queue is drained at the end of every
+request so nothing is lost when the execution environment is frozen.
+
+The environment is read directly here as platform_config uses this module.
+"""
+
+import atexit
+import datetime
+import functools
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
 
+TEXT_FORMAT = '%(asctime)s | %(levelname)s | %(name)s | %(message)s'
 
-def configure_logger(logger_name):
-    """Configures a generic logger which can be imported and used as needed
+
+def parse_level(name, default=logging.INFO):
+    """ Returns the numeric level of a level name, default if unknown
     """
+    level = logging.getLevelName(str(name).upper())
+
+    return level if isinstance(level, int) else default
+
+
+LOG_LEVEL = parse_level(os.getenv('PLATFORM_LOG_LEVEL', 'INFO'))
+LOG_FORMAT = os.getenv('PLATFORM_LOG_FORMAT', 'text')
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv('PLATFORM_LOG_DEBUG_SAMPLE_RATE', '0'))
+LOG_QUEUE = os.getenv('PLATFORM_LOG_QUEUE', 'true').lower() == 'true'
+
+# Attributes of the request being handled, added to the JSON records.
+# Lambda handles one request at a time per process, so they are shared
+# with the worker threads of the request.
+_REQUEST = {}
+
+_LOGGERS = set()
+_LOCK = threading.RLock()
+_HANDLER = None
+_QUEUE = None
+_LISTENER = None
+_level = LOG_LEVEL
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.datetime.utcfromtimestamp(record.created).isoformat() + 'Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        entry.update(_REQUEST)
+
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str)
+
+
+def get_formatter(log_format=None):
+    if (log_format or LOG_FORMAT) == 'json':
+        return JsonFormatter()
+
+    return logging.Formatter(TEXT_FORMAT)
+
+
+def get_handler():
+    """ Returns the handler shared by the platform loggers, a QueueHandler
+    feeding a stdout listener thread unless PLATFORM_LOG_QUEUE is false.
+    """
+    global _HANDLER, _QUEUE, _LISTENER
+
+    with _LOCK:
+        if _HANDLER is None:
+            if LOG_QUEUE:
+                _QUEUE = queue.Queue()
+                _LISTENER = logging.handlers.QueueListener(_QUEUE, logging.StreamHandler())
+                _LISTENER.start()
+                atexit.register(_stop_listener)
+
+                # QueueHandler.prepare formats with this formatter before
+                # enqueueing, the listener only writes the message
+                _HANDLER = logging.handlers.QueueHandler(_QUEUE)
+            else:
+                _HANDLER = logging.StreamHandler()
+
+            _HANDLER.setFormatter(get_formatter())
+
+    return _HANDLER
+
 
-    # Create logger and define INFO as the log level
+def _stop_listener():
+    global _LISTENER
+
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        _LISTENER = None
+
+
+def configure_logger(logger_name):
+    """Configures a generic logger which can be imported and used as needed.
+    Configuring a logger again doesn't attach another handler.
+    """
     logger = logging.getLogger(logger_name)
-    logger.setLevel(logging.DEBUG)
-    logger.propagate = False
+    handler = get_handler()
 
-    # Define our logging formatter
-    formatter = logging.Formatter(
-        '%(asctime)s | %(levelname)s | %(name)s | %(message)s')
+    with _LOCK:
+        logger.setLevel(_level)
+        logger.propagate = False
 
-    # Create our stream handler and apply the formatting
-    stream_handler = logging.StreamHandler()
-    stream_handler.setFormatter(formatter)
+        if handler not in logger.handlers:
+            logger.addHandler(handler)
 
-    # Add the stream handler to the logger
-    logger.addHandler(stream_handler)
+        _LOGGERS.add(logger)
 
     return logger
+
+
+def set_level(level):
+    """ Sets the level of every platform logger
+    """
+    global _level
+
+    with _LOCK:
+        if level == _level:
+            return
+
+        _level = level
+        for logger in _LOGGERS:
+            logger.setLevel(level)
+
+
+def start_request(context=None, sample_rate=None):
+    """ Records the request id for the JSON records and decides if the
+    request is logged at DEBUG.
+    """
+    sample_rate = LOG_DEBUG_SAMPLE_RATE if sample_rate is None else sample_rate
+    sampled = sample_rate > 0 and random.random() < sample_rate
+
+    _REQUEST.clear()
+    request_id = getattr(context, 'aws_request_id', None)
+    if request_id:
+        _REQUEST['request_id'] = request_id
+    if sampled:
+        _REQUEST['debug_sampled'] = True
+
+    set_level(logging.DEBUG if sampled else LOG_LEVEL)
+
+    return sampled
+
+
+def end_request():
+    _REQUEST.clear()
+    set_level(LOG_LEVEL)
+    flush()
+
+
+def flush():
+    """ Waits until the queued records are written
+    """
+    if _LISTENER is not None:
+        _QUEUE.join()
+
+
+def request_logging(handler):
+    """ Decorator of the Lambda handlers, logs a sample of the requests
+    at DEBUG and flushes the records before returning.
+
+    Basic Usage:
+        >>> @request_logging
+        ... def get(event, _context):
+    """
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        start_request(context)
+        try:
+            return handler(event, context)
+        finally:
+            end_request()
+
+    return wrapper
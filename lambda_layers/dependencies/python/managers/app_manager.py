@@ -1,16 +1,11 @@
-import boto3
-
-from aws_xray_sdk.core import patch_all
 from logger import configure_logger
 
-import platform_config
+from botocore.exceptions import ClientError
+
 import transform_utils
 import elb_helper
 
 from managers.stack_manager import StackManager
-from parameter_store import ParameterStore
-
-patch_all()
 
 LOGGER = configure_logger(__name__)
 
@@ -21,6 +16,10 @@ Application Stack Manager
 
 
 class AppManager(StackManager):
+    _required_parameters = [
+        'platform/loadbalancer/listener-arn'
+    ]
+
     def __init__(self, event):
         self._stack_type = 'app'
 
@@ -29,6 +28,79 @@ class AppManager(StackManager):
             event=event,
             stack_type=self._stack_type
         )
+        # (listener arn, priority) claimed by _generate_params
+        self._claimed_priority = None
+        # Priority of the stack being updated, kept by _generate_params
+        self._current_priority = None
+
+    def create_stack(self, stack_name, payload):
+        """ Creates the app stack, releasing the rule priority claimed
+        for it if the stack is not created.
+        """
+        try:
+            stack = StackManager.create_stack(self, stack_name, payload)
+        except Exception:
+            self._release_claimed_priority()
+            raise
+
+        if stack is None:
+            self._release_claimed_priority()
+
+        return stack
+
+    def update_stack(self, payload):
+        """ Updates the app stack keeping its rule priority. A priority
+        is only claimed for a stack without one, and released again if
+        the stack is not updated.
+        """
+        stack_name = transform_utils.add_prefix(self._params['name'])
+        self._current_priority = self._stack_priority(stack_name)
+
+        try:
+            stack = StackManager.update_stack(self, payload)
+        except Exception:
+            self._release_claimed_priority()
+            raise
+
+        if stack is None:
+            self._release_claimed_priority()
+
+        return stack
+
+    def _release_claimed_priority(self):
+        if self._claimed_priority is not None:
+            elb_helper.release_rule_priority(*self._claimed_priority)
+            self._claimed_priority = None
+
+    def _stack_priority(self, stack_name):
+        """ Returns the rule priority parameter of an existing stack
+        or None. The stack is usually described already by the
+        permission check of the request.
+        """
+        try:
+            stacks = self._describe_stacks(stack_name)
+        except ClientError as e:
+            # update_stack reports the missing stack
+            LOGGER.debug('Unable to describe %s: %s', stack_name, e)
+            return None
+
+        return _priority(stacks[0]) if stacks else None
+
+    def _release_resources(self, stack):
+        """ Releases the rule priority of a deleted app stack.
+        """
+        priority = _priority(stack)
+
+        if priority is None:
+            return
+
+        try:
+            listener_arn = self._load_parameters()['platform']['loadbalancer']['listener-arn']
+        except Exception as ex:
+            LOGGER.warning('Unable to load the listener to release the priority: %s', ex)
+            return
+
+        elb_helper.release_rule_priority(listener_arn, priority)
 
     def _generate_params(self, payload):
         """ Dynamically generates a CloudFormation compatible
@@ -36,12 +108,7 @@ class AppManager(StackManager):
         """
         params = {}
         LOGGER.debug('Generating parameters.')
-        parameter_store = ParameterStore(
-            platform_config.PLATFORM_REGION,
-            boto3
-        )
-
-        ssm_params = parameter_store.get_parameters()
+        ssm_params = self._load_parameters()
         LOGGER.debug(
             'Loaded SSM Dictionary into Config: %s',
             ssm_params)
@@ -49,9 +116,14 @@ class AppManager(StackManager):
         config = payload['config']
         params.update(config)
 
-        # dynamically generate the priorty param to insert
-        params['Priority'] = str(elb_helper.get_random_rule_priority(
-            ssm_params['platform']['loadbalancer']['listener-arn']))
+        # keep the priority of an updated stack, otherwise dynamically
+        # generate and reserve the priorty param to insert
+        priority = self._current_priority
+        if priority is None:
+            listener_arn = ssm_params['platform']['loadbalancer']['listener-arn']
+            priority = elb_helper.claim_rule_priority(listener_arn, owner=self._user)
+            self._claimed_priority = (listener_arn, priority)
+        params['Priority'] = str(priority)
 
         params = transform_utils.dict_to_kv(
             params,
@@ -64,3 +136,13 @@ class AppManager(StackManager):
             params)
 
         return params
+
+
+def _priority(stack):
+    params = transform_utils.kv_to_dict(
+        stack.get('Parameters', []),
+        'ParameterKey',
+        'ParameterValue')
+    priority = params.get('Priority', '')
+
+    return int(priority) if priority.isdigit() else None
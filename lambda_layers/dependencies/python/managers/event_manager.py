@@ -1,13 +1,16 @@
-from aws_xray_sdk.core import patch_all
+import collections
+import datetime
+
+from exceptions import Throttled
 from logger import configure_logger
 from paginator import paginator
 
+import platform_config
+import stack_filter
 import transform_utils
 
 from managers.stack_manager import StackManager
 
-patch_all()
-
 LOGGER = configure_logger(__name__)
 
 
@@ -26,39 +29,88 @@ class EventManager(StackManager):
             stack_type=self._stack_type
         )
 
-    def get_stack_events(self, max_items=10):
-        """ Return stack events for the queried stack.
+    def get_stack_events(self, max_items=10, since_event_id=None, since=None):
+        """ Return stack events for the queried stack, newest first, with
+        the cursor to poll the next events with.
+
+        Without a cursor the newest max_items events are returned. With
+        since_event_id or since the events newer than the cursor are
+        returned, paginating until the cursor is reached. When there are
+        more than PLATFORM_MAX_PAGE_SIZE of them only the oldest ones are
+        returned and has_more is set, polling again with the returned
+        cursor continues after them so no event is skipped.
 
         Args:
-            max_items (int): Number of events to return per page.
+            max_items (int): Number of events to return without a cursor.
+            since_event_id (string): EventId of the newest event already seen.
+            since (string): ISO 8601 timestamp, older events are skipped.
         Basic Usage:
-            >>> get_stack_events()
+            >>> events, cursor, has_more = get_stack_events(since_event_id='a1b2c3d4-...')
         Returns:
-            List: List of dicts representing AWS Stacks and information
+            Tuple: List of dicts representing AWS Stack Events and information,
+            the EventId of the newest event returned (or already seen) and
+            whether newer events are left, or None if the events can't be fetched
             [
                 {
                     'StackName': 'mystack',
-                    'StackStatus': 'status'
+                    'EventId': 'a1b2c3d4-...',
+                    'ResourceStatus': 'status'
                 }
-            ]
+            ], 'a1b2c3d4-...', False
         """
         name = transform_utils.add_prefix(self._params['name'])
         LOGGER.debug(
             'Getting events for stack %s:',
             name)
-        events = []
+
+        if since is not None:
+            since = stack_filter.parse_datetime(since, 'since')
+
+        tailing = bool(since_event_id) or since is not None
+        pagination = {} if tailing else {'MaxItems': max_items}
+        # Newest first, a full deque drops the newest events so the
+        # oldest ones after the cursor are kept
+        events = collections.deque(
+            maxlen=platform_config.PLATFORM_MAX_PAGE_SIZE if tailing else None)
+        has_more = False
+        cursor = since_event_id
 
         try:
             for event in paginator(
                     self.client.describe_stack_events,
                     StackName=name,
-                    PaginationConfig={
-                        'MaxItems': max_items
-                    }
+                    PaginationConfig=pagination
             ):
+                if since_event_id and event['EventId'] == since_event_id:
+                    break
+                if since is not None and _timestamp(event) <= since:
+                    # The newest event already seen is the cursor of an empty poll
+                    cursor = event['EventId']
+                    break
+                if len(events) == events.maxlen:
+                    has_more = True
                 events.append(event)
+        except Throttled:
+            raise
         except Exception as ex:
             LOGGER.exception(ex)
             return None
 
-        return events
+        LOGGER.debug(
+            'Found %s new events for stack %s',
+            len(events),
+            name)
+
+        if events:
+            cursor = events[0]['EventId']
+
+        return list(events), cursor, has_more
+
+
+def _timestamp(event):
+    timestamp = event['Timestamp']
+
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
+
+    return timestamp
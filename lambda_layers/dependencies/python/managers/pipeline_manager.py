@@ -1,15 +1,13 @@
-import boto3
+from concurrent.futures import ThreadPoolExecutor
 
-from aws_xray_sdk.core import patch_all
+from exceptions import Throttled
 from logger import configure_logger
 
-import platform_config
+import aws_clients
+import throttling
 import transform_utils
 
 from managers.stack_manager import StackManager
-from parameter_store import ParameterStore
-
-patch_all()
 
 LOGGER = configure_logger(__name__)
 
@@ -22,9 +20,7 @@ Application Stack Manager
 class PipelineManager(StackManager):
     def __init__(self, event):
         self._stack_type = 'pipeline'
-        self.codepipeline = boto3.client(
-            'codepipeline',
-            region_name=platform_config.PLATFORM_REGION)
+        self.codepipeline = throttling.guard_client(aws_clients.get_client('codepipeline'))
 
         StackManager.__init__(
             self,
@@ -56,6 +52,8 @@ class PipelineManager(StackManager):
 
         try:
             states = self.codepipeline.get_pipeline_state(name=pipeline_name)
+        except Throttled:
+            raise
         except Exception as ex:
             LOGGER.exception(ex)
             return None
@@ -64,6 +62,86 @@ class PipelineManager(StackManager):
 
         return states
 
+    def list_pipeline_executions(self, pipeline_name, max_results):
+        """ Returns a summary of the most recent executions of a pipeline.
+
+        Basic Usage:
+            >>> list_pipeline_executions('mypipeline', 5)
+        Returns:
+            List: List of dicts representing AWS CodePipeline executions
+            [
+                {
+                    'pipelineExecutionId': 'string',
+                    'status': 'Succeeded',
+                    'startTime': datetime(2015, 1, 1),
+                ...
+        """
+        LOGGER.debug(
+            'Listing executions of Pipeline %s',
+            pipeline_name)
+
+        try:
+            executions = self.codepipeline.list_pipeline_executions(
+                pipelineName=pipeline_name,
+                maxResults=max_results)
+        except Throttled:
+            raise
+        except Exception as ex:
+            LOGGER.exception(ex)
+            return None
+
+        return executions['pipelineExecutionSummaries']
+
+    def get_pipeline_overview(self, max_executions=None):
+        """ Resolves the pipeline of the stack and fetches its state and,
+        when max_executions is given, its recent executions concurrently.
+        The state depends on the pipeline name in the stack outputs, so
+        the outputs are resolved first.
+
+        Basic Usage:
+            >>> overview = get_pipeline_overview()
+            >>> overview['actions'][('ApprovalStage', 'Approval')]
+        Returns:
+            Dict: Dict with the stack outputs, the stage states, the
+            action states indexed by (stageName, actionName) and the
+            executions (None unless requested)
+            {
+                'outputs': {'PipelineName': 'mypipeline'},
+                'states': [...],
+                'actions': {('Source', 'GitHub'): {...}},
+                'executions': None
+            }
+        """
+        outputs = self.get_stack_outputs()
+        pipeline_name = outputs['PipelineName']
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            states = executor.submit(self.get_pipeline_state, pipeline_name)
+            executions = executor.submit(
+                self.list_pipeline_executions,
+                pipeline_name,
+                max_executions) if max_executions else None
+
+            states = states.result() or []
+
+            return {
+                'outputs': outputs,
+                'states': states,
+                'actions': self.index_actions(states),
+                'executions': executions.result() if executions else None
+            }
+
+    @staticmethod
+    def index_actions(states):
+        """ Indexes the action states of the stage states of a pipeline
+        by (stageName, actionName).
+        """
+        return {
+            (state['stageName'], action['actionName']): action
+            for state in states
+            for action in state.get('actionStates', [])
+        }
+
     def put_approval_result(
             self,
             pipeline_name,
@@ -114,15 +192,6 @@ class PipelineManager(StackManager):
         """
         params = {}
         LOGGER.debug('Generating parameters.')
-        parameter_store = ParameterStore(
-            platform_config.PLATFORM_REGION,
-            boto3
-        )
-
-        ssm_params = parameter_store.get_parameters()
-        LOGGER.debug(
-            'Loaded SSM Dictionary into Config: %s',
-            ssm_params)
 
         # mark parameters that should be re-used in CloudFormation
         # and modify depending on payload.
@@ -1,15 +1,8 @@
-import boto3
-
-from aws_xray_sdk.core import patch_all
 from logger import configure_logger
 
-import platform_config
 import transform_utils
 
 from managers.stack_manager import StackManager
-from parameter_store import ParameterStore
-
-patch_all()
 
 LOGGER = configure_logger(__name__)
 
@@ -35,15 +28,6 @@ class ServiceManager(StackManager):
         """
         params = {}
         LOGGER.debug('Generating parameters.')
-        parameter_store = ParameterStore(
-            platform_config.PLATFORM_REGION,
-            boto3
-        )
-
-        ssm_params = parameter_store.get_parameters()
-        LOGGER.debug(
-            'Loaded SSM Dictionary into Config: %s',
-            ssm_params)
 
         config = payload['config']
         params.update(config)
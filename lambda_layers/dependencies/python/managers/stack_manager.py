@@ -1,22 +1,30 @@
+import bisect
+import itertools
+import operator
+
 from abc import ABCMeta, abstractmethod
 
 from exceptions import AlreadyExists, InvalidInput, NoSuchObject, \
     PermissionDenied, InsufficientCapabilities, LimitExceeded, \
-    UnknownParameter, UnknownError
+    Throttled, UnknownParameter, UnknownError
 
-import boto3
 from botocore.exceptions import ValidationError, ClientError
 
-from aws_xray_sdk.core import patch_all
+from diagnostics import timed
 from logger import configure_logger
+from metrics import METRICS
+from paginator import paginator, encode_token, decode_token, parse_limit
+from inventory import INVENTORY
+from parameter_store import PARAMETER_CACHE
 
+import aws_clients
 import platform_config
+import stack_filter
 import stack_validator
 import template_generator
+import throttling
 import transform_utils
 
-patch_all()
-
 LOGGER = configure_logger(__name__)
 
 
@@ -28,49 +36,102 @@ CloudFormation Stack Manager
 class StackManager():
     __metaclass__ = ABCMeta
 
+    # Names of the platform parameters (relative to the platform
+    # namespace in SSM) each stack type needs to generate its params.
+    _required_parameters = []
+
     def __init__(self, event, stack_type):
         self.event = event
-        self.client = boto3.client(
-            'cloudformation',
-            region_name=platform_config.PLATFORM_REGION)
+        self.client = throttling.guard_client(aws_clients.get_client('cloudformation'))
         self._user, self._groups, self._roles = platform_config.get_user_context(
             self.event)
         self._params = platform_config.get_request_params(self.event)
         self._stack_type = stack_type
+        self._stack_filter = stack_filter.compile_filter(
+            self._groups,
+            self._stack_type)
+        # describe_stacks responses memoized for the invocation by stack name
+        self._described_stacks = {}
 
-    def list_stacks(self, keys):
+    @timed
+    def list_stacks(self, keys, limit=None, next_token=None, filters=None):
         """ List of stacks validating they are stacks in the platform
         and belongs to the user performing the request and returns the chosen
-        keys (arg) for those stacks.
+        keys (arg) for those stacks, sorted by StackName. The next_token
+        holds the last StackName returned, so pages neither skip nor repeat
+        stacks when the lookup order or the inventory changes in between.
 
         Args:
-            stack_type (string): Filter based on stack type, valid options are
-                'app','pipeline' or 'any'
+            keys (list): Keys to return for each stack.
+            limit (int): Optional maximum number of stacks to return.
+            next_token (string): Optional token returned by a previous
+                call to continue listing from.
+            filters (dict): Optional query parameters to filter on,
+                see stack_filter.compile_query.
         Basic Usage:
-            >>> list_stacks('app')
+            >>> stacks, next_token = list_stacks(['StackName'], limit=50)
         Returns:
-            List: List of dicts representing AWS Stacks and information
+            Tuple: List of dicts representing AWS Stacks and information
+            and the token for the next page (None on the last page)
             [
                 {
                     'StackName': 'mystack',
                     'StackStatus': 'status'
                 }
-            ]
+            ], 'eyJhZnRlciI6ICJteXN0YWNrIn0='
         """
         LOGGER.debug('Listing stacks of type %s', self._stack_type)
 
-        try:
-            stacks = self.client.describe_stacks()
-        except Exception as ex:
-            LOGGER.exception(ex)
-            raise UnknownError from ex
-
-        stacks = stacks['Stacks']
-        stacks = self.filter_stacks(stacks)
-        stacks = self.filter_keys(stacks, keys)
-
-        return stacks
-
+        limit = parse_limit(limit, platform_config.PLATFORM_MAX_PAGE_SIZE)
+        after = decode_token(next_token)
+        query = stack_filter.parse_query(filters)
+
+        # The query is compiled into the ownership predicate, so every
+        # stack is evaluated once whether it comes from the inventory
+        # or from CloudFormation.
+        predicate = self._stack_filter
+        if query:
+            predicate = stack_filter.compile_filter(self._groups, self._stack_type, query)
+
+        # Pages 2..n of a query are served from the result cached by
+        # the first page instead of filtering or scanning again.
+        stacks = INVENTORY.get(self._groups, self._stack_type, query) if query else None
+
+        if stacks is None:
+            stacks = INVENTORY.get(self._groups, self._stack_type)
+            if stacks is not None and query:
+                # The inventory is sorted, filtering keeps the order
+                stacks = list(self.filter_stacks(stacks, predicate))
+                INVENTORY.put(self._groups, self._stack_type, stacks, query)
+
+        if stacks is None:
+            # Stream the candidate stacks through the filter so only
+            # the matching stacks are held in memory.
+            try:
+                stacks = sorted(
+                    self.filter_stacks(self._lookup_stacks(), predicate),
+                    key=operator.itemgetter('StackName'))
+            except UnknownError:
+                raise
+            except Exception as ex:
+                LOGGER.exception(ex)
+                raise UnknownError from ex
+
+            # A filtered list is only kept under its query, it would
+            # otherwise be served to the next unfiltered request
+            INVENTORY.put(self._groups, self._stack_type, stacks, query)
+
+        start = 0
+        if after is not None:
+            start = bisect.bisect_right([stack['StackName'] for stack in stacks], after)
+
+        end = len(stacks) if limit is None else start + limit
+        page = stacks[start:end]
+        next_token = encode_token(page[-1]['StackName']) if end < len(stacks) else None
+
+        return list(self.filter_keys(page, keys)), next_token
+
+    @timed
     def create_stack(self, stack_name, payload):
         """ Creates a new stack.
         """
@@ -124,8 +185,10 @@ class StackManager():
 
             raise UnknownError from ex
         else:
+            INVENTORY.invalidate(self._groups, self._stack_type)
             return stack
 
+    @timed
     def describe_stack(self):
         """ Describe a stack validating it is in the platform
         and belongs to the user performing the request.
@@ -145,18 +208,41 @@ class StackManager():
         LOGGER.debug('Describing stack %s', stack_name)
 
         try:
-            stacks = self.client.describe_stacks(StackName=stack_name)
+            stacks = self._describe_stacks(stack_name)
         except Exception as ex:
             LOGGER.exception(
                 'Unknown error.', exc_info=True)
 
             raise UnknownError from ex
 
-        stacks = stacks['Stacks']
-        stacks = self.filter_stacks(stacks)
+        stacks = list(self.filter_stacks(stacks))
 
         return stacks
 
+    @timed
+    def get_stack_outputs(self):
+        """ Returns the outputs of the requested stack validating it is
+        in the platform and belongs to the user performing the request.
+
+        Basic Usage:
+            >>> get_stack_outputs()
+        Returns:
+            Dict: Dict of output keys and values
+            {
+                'PipelineName': 'mypipeline'
+            }
+        """
+        stacks = self.describe_stack()
+
+        if not stacks:
+            raise NoSuchObject
+
+        return transform_utils.kv_to_dict(
+            stacks[0].get('Outputs', []),
+            'OutputKey',
+            'OutputValue')
+
+    @timed
     def update_stack(self, payload):
         """ Updates a CloudFormation stack.
         """
@@ -219,8 +305,11 @@ class StackManager():
                 exc_info=True)
             raise UnknownError from ex
         else:
+            INVENTORY.invalidate(self._groups, self._stack_type)
+            self._described_stacks.pop(stack_name, None)
             return stack
 
+    @timed
     def delete_stack(self):
         """ Deletes a CloudFormation stack.
         """
@@ -257,11 +346,18 @@ class StackManager():
                 exc_info=True)
             raise UnknownError from ex
         else:
+            INVENTORY.invalidate(self._groups, self._stack_type)
+            stacks = self._described_stacks.pop(stack_name, None)
+            if stacks:
+                self._release_resources(stacks[0])
             return True
 
-    def filter_stacks(self, list_of_dicts_of_stacks):
-        """ Filters a list of stacks validating they are stacks in the
-        platform and belongs to the user performing the request.
+    def filter_stacks(self, list_of_dicts_of_stacks, predicate=None):
+        """ Filters an iterable of stacks validating they are stacks in the
+        platform and belongs to the user performing the request. Stacks are
+        yielded as they are evaluated so pages can be streamed through.
+        A predicate compiled by stack_filter.compile_filter, e.g. with the
+        query of a list request, replaces the ownership check.
 
         Basic Usage:
             >>> stacks = [
@@ -272,7 +368,7 @@ class StackManager():
                 ]
             >>> filter_stacks(stacks, keys, 'app')
         Returns:
-            List: List of dicts representing AWS Stacks and information
+            Generator: Generator of dicts representing AWS Stacks and information
             {
                 'Stacks':
                 [
@@ -284,44 +380,39 @@ class StackManager():
                 ]
             ]
         """
-        data = []
+        predicate = predicate or self._stack_filter
+        scanned = 0
+        returned = 0
 
         try:
             for stack in list_of_dicts_of_stacks:
-                stack_tags = transform_utils.kv_to_dict(stack['Tags'], 'Key', 'Value')
-                LOGGER.debug('(filter_stacks) Evaluating Stack: %s', stack)
+                scanned += 1
+                # Only the name, the full stack is large on big accounts
+                LOGGER.debug('(filter_stacks) Evaluating Stack: %s', stack.get('StackName'))
 
-                if not stack_validator.is_part_of_platform(stack_tags):
-                    LOGGER.debug(
-                        '%s is not part of the platform.',
-                        stack['StackName'])
-                    continue
-                if not self._is_requested_type(stack_tags):
+                if not predicate(stack):
                     LOGGER.debug(
-                        '%s is not not the correct type (%s)',
+                        '%s is not a platform %s owned by requester or filtered out.',
                         stack['StackName'],
                         self._stack_type)
                     continue
-                if not stack_validator.is_owned_by_group(self._groups, stack_tags):
-                    LOGGER.debug(
-                        '%s is not owned by requester.',
-                        stack['StackName'])
-                    continue
 
                 LOGGER.debug(
                     '%s passed checks. Adding to return data.',
                     stack['StackName'])
-                data.append(stack)
+                returned += 1
+                yield stack
         except Exception as ex:
             LOGGER.exception(ex)
 
             raise UnknownError from ex
-        else:
-            return data
+        finally:
+            METRICS.count('StacksScanned', scanned)
+            METRICS.count('StacksReturned', returned)
 
     def filter_keys(self, list_of_dicts_of_stacks, list_of_keys_to_save):
-        """ Filters a list of stacks and returns the chosen keys (arg) for
-        those stacks.
+        """ Filters an iterable of stacks and yields the chosen keys (arg)
+        for those stacks.
 
         Basic Usage:
             >>> stacks = [
@@ -334,7 +425,7 @@ class StackManager():
             >>> keys = ['StackName','StackStatus']
             >>> filter_stacks(stacks, keys)
         Returns:
-            List: List of dicts representing AWS Stacks and information
+            Generator: Generator of dicts representing AWS Stacks and information
             [
                 {
                     'StackName': 'mystack',
@@ -342,8 +433,6 @@ class StackManager():
                 }
             ]
         """
-        data = []
-
         try:
             for stack in list_of_dicts_of_stacks:
                 filtered_stack = {}
@@ -354,16 +443,15 @@ class StackManager():
                     else:
                         filtered_stack[key] = stack[key]
 
-                data.append(filtered_stack)
+                yield filtered_stack
         except KeyError as ex:
             LOGGER.exception(ex)
             raise
         except Exception as ex:
             LOGGER.exception(ex)
             raise UnknownError from ex
-        else:
-            return data
 
+    @timed
     def has_permissions(self, stack_name):
         """ Check if the authenticated user has permissions to the
         requested stack.
@@ -378,34 +466,129 @@ class StackManager():
         LOGGER.debug('Validating permissions for: %s', stack_name)
 
         try:
-            stacks = self.client.describe_stacks(StackName=stack_name)
+            stacks = self._describe_stacks(stack_name)
         except ClientError as e:
             LOGGER.exception(e)
 
             if e.response['Error']['Code'] == 'ValidationError' and \
                     'does not exist' in e.response['Error']['Message']:
                 return False
+        except Throttled:
+            raise
         except Exception as ex:
             LOGGER.exception(ex)
             LOGGER.debug('Unknown error occurred. Denying user permission to this resource.')
             return False
         else:
-            stack = stacks['Stacks'][0]
+            stack = stacks[0]
             stack_tags = transform_utils.kv_to_dict(stack['Tags'], 'Key', 'Value')
             return stack_validator.is_owned_by_group(self._groups, stack_tags)
 
         return False
 
-    def _is_requested_type(self, tags):
+    def _describe_stacks(self, stack_name):
+        """ Returns the described stacks for a stack name, calling
+        CloudFormation only once per stack name for the invocation.
         """
-        Validate that the stack is of the requested type.
+        if stack_name not in self._described_stacks:
+            self._described_stacks[stack_name] = \
+                self.client.describe_stacks(StackName=stack_name)['Stacks']
+
+        return self._described_stacks[stack_name]
+
+    def _lookup_stacks(self):
+        """ Returns an iterable of candidate stacks for the group performing
+        the request. Uses the Resource Groups Tagging API to only describe
+        the stacks tagged for the group and type when there are at most
+        PLATFORM_STACK_LOOKUP_MAX_DESCRIBES of them, and scans every stack
+        in the region otherwise or if the lookup is disabled or fails.
+
+        Returns:
+            Iterable: Iterable of dicts representing AWS Stacks
         """
-        LOGGER.debug(
-            'Validating type %s is %s:',
-            tags[platform_config.PLATFORM_TAGS['PRODUCT_TYPE']],
-            self._stack_type)
-        return self._stack_type == 'any' or \
-            tags[platform_config.PLATFORM_TAGS['PRODUCT_TYPE']] == self._stack_type
+        if platform_config.PLATFORM_STACK_LOOKUP == 'tags':
+            max_describes = platform_config.PLATFORM_STACK_LOOKUP_MAX_DESCRIBES
+
+            try:
+                # One ARN past the limit is enough to know the group is too large
+                stack_arns = list(itertools.islice(
+                    self._find_stack_arns_by_tags(), max_describes + 1))
+            except Exception as ex:
+                LOGGER.warning(
+                    'Tag lookup failed, falling back to full scan: %s',
+                    ex)
+            else:
+                if len(stack_arns) <= max_describes:
+                    return self._describe_stacks_by_arn(stack_arns)
+
+                LOGGER.debug(
+                    'More than %s tagged stacks, falling back to full scan',
+                    max_describes)
+
+        return paginator(self.client.describe_stacks)
+
+    def _find_stack_arns_by_tags(self):
+        """ Yields the ARNs of the stacks tagged with the groups and
+        product type of the request.
+        """
+        tag_filters = [
+            {
+                'Key': platform_config.PLATFORM_TAGS['GROUPS'],
+                'Values': [self._groups]
+            }
+        ]
+
+        if self._stack_type != 'any':
+            tag_filters.append(
+                {
+                    'Key': platform_config.PLATFORM_TAGS['PRODUCT_TYPE'],
+                    'Values': [self._stack_type]
+                })
+
+        tagging = aws_clients.get_client('resourcegroupstaggingapi')
+
+        for resource in paginator(
+                tagging.get_resources,
+                TagFilters=tag_filters,
+                ResourceTypeFilters=['cloudformation:stack']):
+            yield resource['ResourceARN']
+
+    def _describe_stacks_by_arn(self, stack_arns):
+        """ Yields the stacks for a list of stack ARNs skipping
+        stacks that have been deleted.
+        """
+        for stack_arn in stack_arns:
+            try:
+                stacks = self.client.describe_stacks(StackName=stack_arn)['Stacks']
+            except ClientError as e:
+                if e.response['Error']['Code'] == 'ValidationError' and \
+                        'does not exist' in e.response['Error']['Message']:
+                    continue
+                raise
+
+            for stack in stacks:
+                if stack['StackStatus'] != 'DELETE_COMPLETE':
+                    yield stack
+
+    @timed
+    def _load_parameters(self):
+        """ Returns the nested platform parameters declared in
+        _required_parameters, fetched with batched lookups.
+
+        Returns:
+            Dict: Dict representing the platform parameters
+            {
+                'platform': {
+                    'loadbalancer': {
+                        'listener-arn': 'arn:aws:...'
+                    }
+                }
+            }
+        """
+        if not self._required_parameters:
+            return {}
+
+        return PARAMETER_CACHE.get_parameters(self._required_parameters)
 
     @abstractmethod
     def _generate_params(self, payload):
@@ -414,6 +597,12 @@ class StackManager():
         """
         pass
 
+    def _release_resources(self, stack):
+        """ Releases what was reserved for a deleted stack, overridden by
+        the stack types reserving resources in _generate_params.
+        """
+        pass
+
     def _generate_tags(self, payload):
         """ Dynamically generates a CloudFormation compatible
         dict with the params passed in from a request payload.
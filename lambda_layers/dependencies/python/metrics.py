@@ -0,0 +1,262 @@
+"""Metrics module
+
+Performance metrics of an invocation, emitted once at its end as
+CloudWatch Embedded Metric Format (EMF) log lines, which CloudWatch
+turns into metrics without API calls. Recorded metrics:
+
+    HandlerLatency      Duration of the handler
+    ColdStart           1 on the first invocation of the container
+    AWSCalls            AWS API calls, AWSCallErrors the failed ones
+    <service>.<Operation>.Calls / .Latency for each AWS API operation
+    StacksScanned       Stacks evaluated by filter_stacks
+    StacksReturned      Stacks that passed the filter
+    ScanAmplification   StacksScanned / StacksReturned, only when stacks
+                        are returned so empty groups don't raise it
+    <cache>CacheHit / <cache>CacheMiss for the in-memory caches
+
+Metrics carry a Function dimension and are also aggregated without
+dimensions, for alarms across the API.
+
+Every PLATFORM_DIAGNOSTICS_INTERVAL seconds a container also emits the
+snapshot of its diagnostics, see diagnostics, with a ContainerUptime
+metric. The snapshot is kept as properties of the log line, so the
+diagnostics of every container can be queried with Logs Insights.
+"""
+
+import collections
+import functools
+import json
+import threading
+import time
+
+from logger import configure_logger
+
+import diagnostics
+import platform_config
+
+LOGGER = configure_logger(__name__)
+
+# Values of a metric in one EMF document, as limited by CloudWatch
+MAX_VALUES = 100
+
+_COLD_START = True
+
+# Time the diagnostics of the container were last emitted at
+_DIAGNOSTICS_EMITTED_AT = None
+
+
+class Metrics:
+    """Metrics recorded during an invocation, shared by its threads"""
+
+    def __init__(self):
+        self._values = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, name, value, unit='None'):
+        """ Records a value of a metric
+        """
+        with self._lock:
+            self._values.setdefault(name, (unit, []))[1].append(value)
+
+    def count(self, name, value=1):
+        """ Adds to a counter, counters have a single value per invocation
+        """
+        with self._lock:
+            values = self._values.setdefault(name, ('Count', [0]))[1]
+            values[0] += value
+
+    def cache_lookup(self, cache, hit):
+        self.count('{}CacheHit'.format(cache), 1 if hit else 0)
+        self.count('{}CacheMiss'.format(cache), 0 if hit else 1)
+
+    def get(self, name):
+        with self._lock:
+            unit_values = self._values.get(name)
+
+            return list(unit_values[1]) if unit_values else []
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def documents(self, function, properties=None, timestamp=None):
+        """ Returns the EMF documents of the recorded metrics. Metrics with
+        more than MAX_VALUES values are split across documents.
+        """
+        with self._lock:
+            values = collections.OrderedDict(
+                (name, (unit, list(metric_values)))
+                for name, (unit, metric_values) in self._values.items())
+
+        scanned = values.get('StacksScanned')
+        returned = values.get('StacksReturned', ('Count', [0]))[1][0]
+        if scanned and returned:
+            values['ScanAmplification'] = ('None', [scanned[1][0] / returned])
+
+        timestamp = int((timestamp or time.time()) * 1000)
+        chunks = max([1] + [
+            (len(metric_values) + MAX_VALUES - 1) // MAX_VALUES
+            for _, metric_values in values.values()
+        ])
+        documents = []
+
+        for chunk in range(chunks):
+            document = {}
+            definitions = []
+
+            for name, (unit, metric_values) in values.items():
+                chunk_values = metric_values[chunk * MAX_VALUES:(chunk + 1) * MAX_VALUES]
+                if not chunk_values:
+                    continue
+                document[name] = chunk_values[0] if len(chunk_values) == 1 else chunk_values
+                definitions.append({'Name': name, 'Unit': unit})
+
+            document['_aws'] = {
+                'Timestamp': timestamp,
+                'CloudWatchMetrics': [{
+                    'Namespace': platform_config.PLATFORM_METRICS_NAMESPACE,
+                    'Dimensions': [['Function'], []],
+                    'Metrics': definitions
+                }]
+            }
+            document['Function'] = function
+            if chunk == 0:
+                document.update(properties or {})
+
+            documents.append(document)
+
+        return documents
+
+
+# Metrics of the invocation being handled. Lambda handles one request
+# at a time per process, so they are shared with its worker threads.
+METRICS = Metrics()
+
+
+def instrument_client(client):
+    """ Records the count and latency of the API calls of a boto3 client.
+    The calls are timed from the parameter validation to the parsed
+    response, including the retries. Objects that aren't botocore
+    clients, e.g. test doubles, are returned unchanged.
+    """
+    events = getattr(getattr(client, 'meta', None), 'events', None)
+    if events is None:
+        return client
+
+    events.register('before-parameter-build', _start_call, unique_id='platform-metrics-start')
+    events.register('after-call', _end_call, unique_id='platform-metrics-end')
+    events.register('after-call-error', _end_call, unique_id='platform-metrics-error')
+    events.register('needs-retry', diagnostics.record_retry_attempt, unique_id='platform-diagnostics-retry')
+
+    return client
+
+
+def _start_call(context, **kwargs):
+    context['metrics_started_at'] = time.perf_counter()
+
+
+def _end_call(event_name, context, http_response=None, parsed=None, **kwargs):
+    started_at = context.pop('metrics_started_at', None)
+    if started_at is None:
+        return
+
+    # event_name is e.g. after-call.cloudformation.DescribeStacks
+    _, service, operation = event_name.split('.', 2)
+    name = '{}.{}'.format(service, operation)
+    elapsed = time.perf_counter() - started_at
+
+    METRICS.count('AWSCalls')
+    METRICS.count('{}.Calls'.format(name))
+    METRICS.put('{}.Latency'.format(name), elapsed * 1000, 'Milliseconds')
+    diagnostics.record_call(service, operation, elapsed, parsed)
+
+    if http_response is None or http_response.status_code >= 300:
+        METRICS.count('AWSCallErrors')
+
+
+def emit(function, properties=None):
+    """ Writes the recorded metrics as EMF lines to stdout and resets them
+    """
+    for document in METRICS.documents(function, properties):
+        print(json.dumps(document, default=str), flush=True)
+
+    METRICS.reset()
+
+
+def diagnostics_document(function, snapshot, timestamp=None):
+    """ Returns the EMF document of a snapshot of the diagnostics of
+    a container
+    """
+    return {
+        'ContainerUptime': snapshot['uptime_seconds'],
+        '_aws': {
+            'Timestamp': int((timestamp or time.time()) * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': platform_config.PLATFORM_METRICS_NAMESPACE,
+                'Dimensions': [['Function'], []],
+                'Metrics': [{'Name': 'ContainerUptime', 'Unit': 'Seconds'}]
+            }]
+        },
+        'Function': function,
+        'diagnostics': snapshot
+    }
+
+
+def emit_diagnostics(function):
+    """ Writes the diagnostics of the container as an EMF line to stdout
+    when PLATFORM_DIAGNOSTICS_INTERVAL seconds have passed since they
+    were last written, or since the container started.
+    """
+    global _DIAGNOSTICS_EMITTED_AT
+
+    now = time.time()
+    emitted_at = _DIAGNOSTICS_EMITTED_AT or diagnostics.DIAGNOSTICS.started_at
+
+    if now - emitted_at < platform_config.PLATFORM_DIAGNOSTICS_INTERVAL:
+        return
+
+    _DIAGNOSTICS_EMITTED_AT = now
+    document = diagnostics_document(function, diagnostics.DIAGNOSTICS.snapshot(), now)
+    print(json.dumps(document, default=str), flush=True)
+
+
+def handler_metrics(handler):
+    """ Decorator of the Lambda handlers, records the latency and cold
+    start of the invocation and emits its metrics, and periodically the
+    diagnostics of the container.
+
+    Basic Usage:
+        >>> @handler_metrics
+        ... def get(event, _context):
+    """
+    function = '{}.{}'.format(handler.__module__, handler.__name__)
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        global _COLD_START
+
+        if not platform_config.PLATFORM_METRICS_ENABLED:
+            return handler(event, context)
+
+        cold_start, _COLD_START = _COLD_START, False
+        METRICS.reset()
+        METRICS.count('ColdStart', 1 if cold_start else 0)
+        started_at = time.perf_counter()
+
+        try:
+            return handler(event, context)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            METRICS.put('HandlerLatency', elapsed * 1000, 'Milliseconds')
+            diagnostics.DIAGNOSTICS.record_latency(function, elapsed)
+            properties = {'cold_start': cold_start}
+            if getattr(context, 'aws_request_id', None):
+                properties['request_id'] = context.aws_request_id
+
+            try:
+                emit(function, properties)
+                emit_diagnostics(function)
+            except Exception as ex:
+                LOGGER.warning('Unable to emit metrics: %s', ex)
+
+    return wrapper
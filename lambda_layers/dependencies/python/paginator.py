@@ -1,5 +1,11 @@
 # Paginator used with certain boto3 calls when pagination is required
 
+import base64
+import binascii
+import json
+
+from exceptions import InvalidInput
+
 
 def paginator(method, **kwargs):
     client = method.__self__
@@ -7,3 +13,49 @@ def paginator(method, **kwargs):
     for page in iterator.paginate(**kwargs).result_key_iters():
         for result in page:
             yield result
+
+
+def encode_token(last_key):
+    """ Encodes the sort key of the last returned result into an opaque
+    pagination token, the next page starts after it
+    """
+    token = json.dumps({'after': last_key}).encode('utf-8')
+
+    return base64.urlsafe_b64encode(token).decode('utf-8')
+
+
+def decode_token(token):
+    """ Decodes an opaque pagination token into the sort key of the
+    last returned result. Empty tokens start from the first result
+    and return None.
+    """
+    if not token:
+        return None
+
+    try:
+        last_key = json.loads(base64.urlsafe_b64decode(token.encode('utf-8')))['after']
+    except (binascii.Error, ValueError, TypeError, KeyError) as ex:
+        raise InvalidInput('Invalid next_token.') from ex
+
+    if not isinstance(last_key, str):
+        raise InvalidInput('Invalid next_token.')
+
+    return last_key
+
+
+def parse_limit(limit, max_limit):
+    """ Validates a requested page size. Empty limits return None
+    meaning that every result is returned.
+    """
+    if limit is None or limit == '':
+        return None
+
+    try:
+        limit = int(limit)
+    except (ValueError, TypeError) as ex:
+        raise InvalidInput('Invalid limit.') from ex
+
+    if limit < 1 or limit > max_limit:
+        raise InvalidInput('limit must be between 1 and {}.'.format(max_limit))
+
+    return limit
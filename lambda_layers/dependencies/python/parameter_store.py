@@ -4,27 +4,47 @@
 """Parameter Store module
 """
 
+import threading
+
+from cache import Cache
 from exceptions import ParameterNotFound
 from paginator import paginator
 from logger import configure_logger
+from metrics import METRICS
 
+import aws_clients
 import platform_config
 import transform_utils
 
 LOGGER = configure_logger(__name__)
 
+# Maximum number of names accepted by a single GetParameters call
+GET_PARAMETERS_BATCH_SIZE = 10
+
 
 class ParameterStore:
     """Class used for modeling Parameters
     """
 
-    def __init__(self, region, role):
-        self.client = role.client('ssm', region_name=region)
+    def __init__(self, region, role=None):
+        # Use the shared client unless a specific role (session) is given
+        if role is None:
+            self.client = aws_clients.get_client('ssm', region)
+        else:
+            self.client = role.client('ssm', region_name=region)
 
-    def get_parameters(self):
-        """Returns a Dict with platform parameters under the platform namespace
+    def get_parameters(self, names=None):
+        """Returns a Dict with platform parameters under the platform namespace.
+        Only the given names (relative to the namespace) are fetched if
+        names is set, otherwise the whole namespace is read recursively.
         """
-        params = self.fetch_parameters_by_path('/{}'.format(platform_config.PLATFORM_PREFIX))
+        if names is None:
+            params = self.fetch_parameters_by_path('/{}'.format(platform_config.PLATFORM_PREFIX))
+        else:
+            params = self.fetch_parameters([
+                '/{}/{}'.format(platform_config.PLATFORM_PREFIX, name)
+                for name in names
+            ])
         LOGGER.debug(
             'Got params from SSM: %s',
             params)
@@ -48,13 +68,16 @@ class ParameterStore:
                 Type='String',
                 Overwrite=True
             )
+            PARAMETER_CACHE.patch(name, value)
 
     def delete_parameter(self, name):
         try:
             LOGGER.debug('Deleting Parameter %s', name)
-            return self.client.delete_parameter(
+            response = self.client.delete_parameter(
                 Name=name
             )
+            PARAMETER_CACHE.remove(name)
+            return response
         except self.client.exceptions.ParameterNotFound:
             LOGGER.debug('Attempted to delete Parameter %s but it was not found', name)
             pass
@@ -75,6 +98,30 @@ class ParameterStore:
                 'Parameter Path {0} Not Found'.format(path)
             )
 
+    def fetch_parameters(self, names):
+        """Gets Parameters by name from Parameter Store in batches
+        of up to 10 names per call
+        """
+        params = []
+
+        for i in range(0, len(names), GET_PARAMETERS_BATCH_SIZE):
+            batch = names[i:i + GET_PARAMETERS_BATCH_SIZE]
+            LOGGER.debug('Fetching Parameters %s', batch)
+            response = self.client.get_parameters(
+                Names=batch,
+                WithDecryption=False
+            )
+
+            if response.get('InvalidParameters'):
+                raise ParameterNotFound(
+                    'Parameters {0} Not Found'.format(
+                        ', '.join(response['InvalidParameters']))
+                )
+
+            params.extend(response['Parameters'])
+
+        return params
+
     def fetch_parameter(self, name, with_decryption=False):
         """Gets a Parameter from Parameter Store (Returns the Value)
         """
@@ -89,3 +136,93 @@ class ParameterStore:
             raise ParameterNotFound(
                 'Parameter {0} Not Found'.format(name)
             )
+
+
+class ParameterCache:
+    """Class used for caching the platform parameters between
+    invocations of a warm container.
+
+    Args:
+        ttl (int): Number of seconds the parameters are valid for.
+    Basic Usage:
+        >>> ssm_params = PARAMETER_CACHE.get_parameters()
+    """
+
+    _KEY = 'parameters'
+
+    def __init__(self, ttl):
+        self._cache = Cache(ttl=ttl, name='parameters')
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_parameters(self, names=None, refresh=False):
+        """Returns the nested platform parameters, loading them from
+        Parameter Store when they are missing, expired or a refresh
+        is requested. Only the given names are loaded if names is set.
+        """
+        key = self._KEY if names is None else tuple(sorted(names))
+        params = None if refresh else self._cache.check(key)
+        hit = params is not None
+
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        METRICS.cache_lookup('Parameter', hit)
+        LOGGER.debug('Parameter cache %s', 'hit' if hit else 'miss')
+
+        if not hit:
+            params = ParameterStore(platform_config.PLATFORM_REGION).get_parameters(names)
+            self._cache.add(key, params)
+
+        return params
+
+    def refresh(self, names=None):
+        """Reloads the parameters from Parameter Store
+        """
+        return self.get_parameters(names, refresh=True)
+
+    def patch(self, name, value):
+        """Updates a parameter in the cached parameters in place
+        instead of reloading them
+        """
+        for key in self._keys_covering(name):
+            params = self._cache.check(key)
+            if params is not None:
+                transform_utils.insert_nested(params, name, value)
+
+    def remove(self, name):
+        """Removes a parameter from the cached parameters in place
+        """
+        for key in self._keys_covering(name):
+            params = self._cache.check(key)
+            if params is not None:
+                transform_utils.delete_nested(params, name)
+
+    def _keys_covering(self, name):
+        prefix = '/{}/'.format(platform_config.PLATFORM_PREFIX)
+
+        if not name.startswith(prefix):
+            return
+
+        for key in self._cache.keys():
+            if key == self._KEY or name[len(prefix):] in key:
+                yield key
+
+    def invalidate(self):
+        """Drops the cached parameters, they are loaded on next use
+        """
+        self._cache.clear()
+
+    def stats(self):
+        """Returns the hit and miss counts of the cache
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+# Module level cache shared across warm invocations of the container
+PARAMETER_CACHE = ParameterCache(platform_config.PLATFORM_PARAMETER_TTL)
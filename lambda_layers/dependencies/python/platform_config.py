@@ -11,6 +11,78 @@ PLATFORM_ECS_CLUSTER = os.getenv('PLATFORM_ECS_CLUSTER', '{}-{}'.format(PLATFORM
 PLATFORM_DEPLOYMENT_ROLE = os.getenv('PLATFORM_DEPLOYMENT_ROLE', 'deployment_role')
 PLATFORM_BUCKET = os.getenv('PLATFORM_BUCKET', None)
 
+# In-memory stack inventory, a TTL of 0 disables caching
+PLATFORM_INVENTORY_TTL = int(os.getenv('PLATFORM_INVENTORY_TTL', '30'))
+PLATFORM_INVENTORY_MAX_SIZE = int(os.getenv('PLATFORM_INVENTORY_MAX_SIZE', '256'))
+
+# Seconds the platform parameters from SSM are cached for
+PLATFORM_PARAMETER_TTL = int(os.getenv('PLATFORM_PARAMETER_TTL', '300'))
+
+# Seconds the rule priorities in use on a listener are cached for
+PLATFORM_RULE_PRIORITY_TTL = int(os.getenv('PLATFORM_RULE_PRIORITY_TTL', '60'))
+
+# Rule priority reservation ledger, 'ssm', 'sqlite' or 'memory'.
+# Claims are held until CloudFormation had time to create the rule.
+PLATFORM_PRIORITY_LEDGER = os.getenv('PLATFORM_PRIORITY_LEDGER', 'ssm')
+PLATFORM_PRIORITY_LEDGER_PATH = os.getenv('PLATFORM_PRIORITY_LEDGER_PATH', '/tmp/priority_ledger.db')
+PLATFORM_PRIORITY_CLAIM_TTL = int(os.getenv('PLATFORM_PRIORITY_CLAIM_TTL', '1800'))
+
+# Stack lookup backend, 'scan' pages through every stack in the region
+# and 'tags' finds the stacks of the group with the Resource Groups
+# Tagging API. Tagged stacks are described one call each, so groups with
+# more than PLATFORM_STACK_LOOKUP_MAX_DESCRIBES stacks are scanned
+# instead. The tagging API is eventually consistent, just created stacks
+# can be missing from its results.
+PLATFORM_STACK_LOOKUP = os.getenv('PLATFORM_STACK_LOOKUP', 'scan')
+PLATFORM_STACK_LOOKUP_MAX_DESCRIBES = int(os.getenv('PLATFORM_STACK_LOOKUP_MAX_DESCRIBES', '10'))
+
+# Largest page size accepted by the list endpoints
+PLATFORM_MAX_PAGE_SIZE = int(os.getenv('PLATFORM_MAX_PAGE_SIZE', '100'))
+
+# Batch endpoints, items processed at once and items accepted per request
+PLATFORM_BATCH_MAX_WORKERS = int(os.getenv('PLATFORM_BATCH_MAX_WORKERS', '8'))
+PLATFORM_BATCH_MAX_ITEMS = int(os.getenv('PLATFORM_BATCH_MAX_ITEMS', '50'))
+
+# Serializer of response bodies, 'json', 'orjson' or 'auto' to use orjson when installed.
+# orjson writes compact JSON, opting in changes every body and ETag.
+PLATFORM_JSON_SERIALIZER = os.getenv('PLATFORM_JSON_SERIALIZER', 'json')
+
+# Response compression, bodies smaller than the minimum size are sent uncompressed
+PLATFORM_COMPRESSION_MIN_SIZE = int(os.getenv('PLATFORM_COMPRESSION_MIN_SIZE', '1024'))
+PLATFORM_COMPRESSION_LEVEL = int(os.getenv('PLATFORM_COMPRESSION_LEVEL', '6'))
+
+# Libraries patched for X-Ray tracing on first use of an AWS client
+PLATFORM_TRACING_LIBRARIES = os.getenv('PLATFORM_TRACING_LIBRARIES', 'botocore').split(',')
+
+# Embedded metrics emitted by the handlers at the end of every invocation
+PLATFORM_METRICS_ENABLED = os.getenv('PLATFORM_METRICS_ENABLED', 'true').lower() == 'true'
+PLATFORM_METRICS_NAMESPACE = os.getenv('PLATFORM_METRICS_NAMESPACE', '{}-api'.format(PLATFORM_PREFIX))
+
+# Seconds between the diagnostics snapshots emitted by each container
+PLATFORM_DIAGNOSTICS_INTERVAL = int(os.getenv('PLATFORM_DIAGNOSTICS_INTERVAL', '300'))
+
+# Client-side throttling of the CloudFormation and CodePipeline calls of
+# a container: calls per second and burst of the token bucket (a rate of 0
+# disables it), seconds a call waits for a token, base and cap in seconds
+# of the backoff of throttled attempts, and throttled calls in a row
+# opening the circuit breaker for a cooldown in seconds. The bucket is off
+# by default, a request can make hundreds of calls (e.g. a scan of a large
+# region) and queueing them would outlast the 29s API Gateway timeout.
+PLATFORM_THROTTLE_RATE = float(os.getenv('PLATFORM_THROTTLE_RATE', '0'))
+PLATFORM_THROTTLE_BURST = int(os.getenv('PLATFORM_THROTTLE_BURST', '20'))
+PLATFORM_THROTTLE_MAX_WAIT = float(os.getenv('PLATFORM_THROTTLE_MAX_WAIT', '2'))
+PLATFORM_THROTTLE_BACKOFF_BASE = float(os.getenv('PLATFORM_THROTTLE_BACKOFF_BASE', '0.1'))
+PLATFORM_THROTTLE_BACKOFF_CAP = float(os.getenv('PLATFORM_THROTTLE_BACKOFF_CAP', '5'))
+PLATFORM_BREAKER_THRESHOLD = int(os.getenv('PLATFORM_BREAKER_THRESHOLD', '3'))
+PLATFORM_BREAKER_COOLDOWN = float(os.getenv('PLATFORM_BREAKER_COOLDOWN', '10'))
+
+# Shared boto3 client configuration
+PLATFORM_CLIENT_MAX_POOL_CONNECTIONS = int(os.getenv('PLATFORM_CLIENT_MAX_POOL_CONNECTIONS', '25'))
+PLATFORM_CLIENT_CONNECT_TIMEOUT = int(os.getenv('PLATFORM_CLIENT_CONNECT_TIMEOUT', '5'))
+PLATFORM_CLIENT_READ_TIMEOUT = int(os.getenv('PLATFORM_CLIENT_READ_TIMEOUT', '30'))
+PLATFORM_CLIENT_RETRY_MODE = os.getenv('PLATFORM_CLIENT_RETRY_MODE', 'standard')
+PLATFORM_CLIENT_MAX_ATTEMPTS = int(os.getenv('PLATFORM_CLIENT_MAX_ATTEMPTS', '3'))
+
 # Tags for the platform
 PLATFORM_TAGS = {}
 PLATFORM_TAGS['PRODUCT_TYPE'] = os.getenv('PLATFORM_TAGS_PRODUCT_TYPE', '{}-{}'.format(PLATFORM_PREFIX, 'product-type'))
@@ -43,3 +115,15 @@ def get_request_params(event):
         params = event['params']
 
     return params
+
+
+def get_request_headers(event):
+    """
+    Get the headers sent in the request
+    """
+    headers = {}
+
+    if 'headers' in event:
+        headers = event['headers']
+
+    return headers
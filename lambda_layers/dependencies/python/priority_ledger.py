@@ -0,0 +1,206 @@
+"""Priority Ledger module
+
+Reservation ledger for ALB listener rule priorities. A priority is
+claimed with a conditional write before it is handed to CloudFormation
+so parallel creates never pick the same priority. Claims expire once
+the stack has had time to create the listener rule.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from logger import configure_logger
+
+import aws_clients
+import platform_config
+
+LOGGER = configure_logger(__name__)
+
+
+class InMemoryLedgerStore:
+    """Ledger store keeping claims in the memory of the container.
+    Only safe within a single container, used for tests and local runs.
+    """
+
+    def __init__(self):
+        self._claims = {}
+        self._lock = threading.Lock()
+
+    def claim(self, key, owner, expires_at):
+        with self._lock:
+            claim = self._claims.get(key)
+
+            if claim is not None and claim['expires_at'] > time.time():
+                return False
+
+            self._claims[key] = {'owner': owner, 'expires_at': expires_at}
+            return True
+
+    def release(self, key):
+        with self._lock:
+            self._claims.pop(key, None)
+
+
+class SqliteLedgerStore:
+    """Ledger store keeping claims in a sqlite database. Safe across
+    processes sharing the database file.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path,
+            timeout=10,
+            isolation_level=None,
+            check_same_thread=False)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS claims '
+            '(key TEXT PRIMARY KEY, owner TEXT, expires_at REAL)')
+
+    def claim(self, key, owner, expires_at):
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                cursor.execute(
+                    'DELETE FROM claims WHERE key = ? AND expires_at <= ?',
+                    (key, time.time()))
+                cursor.execute(
+                    'INSERT OR IGNORE INTO claims (key, owner, expires_at) VALUES (?, ?, ?)',
+                    (key, owner, expires_at))
+                claimed = cursor.rowcount == 1
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+            cursor.execute('COMMIT')
+
+            return claimed
+
+    def release(self, key):
+        with self._lock:
+            self._connection.execute('DELETE FROM claims WHERE key = ?', (key,))
+
+
+class SsmLedgerStore:
+    """Ledger store keeping claims as Standard tier SSM parameters. A
+    claim is created with Overwrite disabled, which only succeeds if no
+    one else holds the claim. Standard parameters have no expiration
+    policies, an expired claim is taken over by overwriting it and only
+    the first overwrite of the expired version gets the claim.
+    """
+
+    def __init__(self, namespace):
+        self._namespace = namespace
+        self.client = aws_clients.get_client('ssm')
+
+    def _put(self, name, value, overwrite):
+        return self.client.put_parameter(
+            Name=name,
+            Description='Gurum Platform Priority Claim',
+            Value=value,
+            Type='String',
+            Overwrite=overwrite,
+            Tier='Standard'
+        )['Version']
+
+    def claim(self, key, owner, expires_at):
+        name = '{}/{}'.format(self._namespace, key)
+        value = json.dumps({'owner': owner, 'expires_at': expires_at})
+
+        try:
+            self._put(name, value, overwrite=False)
+        except self.client.exceptions.ParameterAlreadyExists:
+            pass
+        else:
+            return True
+
+        try:
+            claimed = self.client.get_parameter(Name=name)['Parameter']
+        except self.client.exceptions.ParameterNotFound:
+            return False
+
+        if json.loads(claimed['Value'])['expires_at'] > time.time():
+            return False
+
+        # A concurrent take over also bumps the version
+        return self._put(name, value, overwrite=True) == claimed['Version'] + 1
+
+    def release(self, key):
+        try:
+            self.client.delete_parameter(Name='{}/{}'.format(self._namespace, key))
+        except self.client.exceptions.ParameterNotFound:
+            pass
+
+
+class PriorityLedger:
+    """Class used for reserving rule priorities on a listener
+
+    Args:
+        store: Ledger store performing the conditional writes.
+        ttl (int): Number of seconds a claim is held for.
+    Basic Usage:
+        >>> ledger = get_ledger()
+        >>> ledger.claim(listener_arn, 1234, owner='user@example.com')
+        True
+    """
+
+    def __init__(self, store, ttl):
+        self._store = store
+        self._ttl = ttl
+
+    def claim(self, listener_arn, priority, owner=''):
+        """Claims a priority on a listener, returns False if it is
+        already claimed.
+        """
+        claimed = self._store.claim(
+            self._key(listener_arn, priority),
+            owner,
+            time.time() + self._ttl)
+
+        LOGGER.debug(
+            'Claim of priority %s on %s %s',
+            priority,
+            listener_arn,
+            'succeeded' if claimed else 'failed')
+
+        return claimed
+
+    def release(self, listener_arn, priority):
+        """Releases a claimed priority
+        """
+        self._store.release(self._key(listener_arn, priority))
+
+    @staticmethod
+    def _key(listener_arn, priority):
+        listener = hashlib.sha1(listener_arn.encode('utf-8')).hexdigest()[:16]
+
+        return '{}/{}'.format(listener, priority)
+
+
+_LEDGER = None
+_LOCK = threading.Lock()
+
+
+def get_ledger():
+    """ Returns the ledger configured by PLATFORM_PRIORITY_LEDGER
+    ('ssm', 'sqlite' or 'memory').
+    """
+    global _LEDGER
+
+    with _LOCK:
+        if _LEDGER is None:
+            backend = platform_config.PLATFORM_PRIORITY_LEDGER
+
+            if backend == 'memory':
+                store = InMemoryLedgerStore()
+            elif backend == 'sqlite':
+                store = SqliteLedgerStore(platform_config.PLATFORM_PRIORITY_LEDGER_PATH)
+            else:
+                store = SsmLedgerStore('/{}-priority-ledger'.format(platform_config.PLATFORM_PREFIX))
+
+            _LEDGER = PriorityLedger(store, platform_config.PLATFORM_PRIORITY_CLAIM_TTL)
+
+    return _LEDGER
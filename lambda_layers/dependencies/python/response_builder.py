@@ -1,20 +1,101 @@
+import hashlib
 import json
 
-from transform_utils import datetime_serialize
+from json_serializer import SERIALIZER
 
+import content_negotiation
+import platform_config
 
-def success(data, code=200):
-    return {
+
+def success(data, code=200, event=None, cache_control=None):
+    """ Builds a successful response. When the request event is passed
+    the response carries an ETag of the body, and a request sending the
+    same ETag in If-None-Match gets an empty 304 response instead. The
+    body is encoded as negotiated with the Accept and Accept-Encoding
+    headers of the request, see content_negotiation.
+    """
+    body = prepareBody(data)
+
+    if event is None and cache_control is None:
+        return {
+            "body": body,
+            "statusCode": code
+        }
+
+    request_headers = platform_config.get_request_headers(event) if event is not None else {}
+    media_type = content_negotiation.negotiate_media_type(request_headers.get('Accept'))
+    encoding = content_negotiation.negotiate_encoding(
+        request_headers.get('Accept-Encoding'),
+        len(body) if isinstance(body, str) else None)
+
+    headers = {}
+    headers['ETag'] = etag(body, content_negotiation.variant(media_type, encoding))
+    headers['Vary'] = content_negotiation.VARY
+
+    if cache_control:
+        headers['Cache-Control'] = cache_control
+
+    if etag_matches(request_headers.get('If-None-Match'), headers['ETag']):
+        return {
+            "body": "",
+            "statusCode": 304,
+            "headers": headers
+        }
+
+    return content_negotiation.encode(
+        {
+            "body": body,
+            "statusCode": code,
+            "headers": headers
+        },
+        data,
+        media_type,
+        encoding)
+
+
+def error(data, code=500, headers=None):
+    response = {
         "body": prepareBody(data),
         "statusCode": code
     }
 
+    if headers:
+        response["headers"] = headers
 
-def error(data, code=500):
-    raise Exception(json.dumps({
-        "body": prepareBody(data),
-        "statusCode": code
-    }))
+    raise Exception(json.dumps(response))
+
+
+def etag(body, variant=''):
+    """ Returns a strong ETag of a response body, the variant tells
+    apart the encodings of a same body.
+    """
+    digest = hashlib.sha256(
+        body if isinstance(body, bytes) else str(body).encode('utf-8'))
+
+    if variant:
+        return '"{}-{}"'.format(digest.hexdigest()[:32], variant)
+
+    return '"{}"'.format(digest.hexdigest()[:32])
+
+
+def etag_matches(if_none_match, current):
+    """ Returns True if an If-None-Match header matches the ETag,
+    weak comparison as required for If-None-Match.
+    """
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == '*':
+        return True
+
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == current:
+            return True
+
+    return False
 
 
 def prepareBody(data):
@@ -22,4 +103,4 @@ def prepareBody(data):
 
 
 def serializeDict(obj):
-    return json.dumps(obj, default=datetime_serialize)
+    return SERIALIZER.dumps(obj)
@@ -0,0 +1,145 @@
+"""Stack Filter module
+
+Compiles the platform ownership checks and the optional query
+parameters of a list request into a single predicate that is
+evaluated once per stack.
+"""
+
+import datetime
+
+from exceptions import InvalidInput
+from logger import configure_logger
+
+import platform_config
+
+LOGGER = configure_logger(__name__)
+
+# Query parameters understood by compile_query
+QUERY_PARAMS = ['status', 'flavor', 'owner', 'updated_since']
+
+
+def compile_filter(groups, stack_type, query=None):
+    """ Compiles a predicate validating a stack is part of the platform,
+    of the requested type, owned by the group and matches the query.
+
+    Args:
+        groups (string): Group that must own the stack.
+        stack_type (string): Requested type or 'any'.
+        query (dict): Optional query parameters, see compile_query.
+    Basic Usage:
+        >>> predicate = compile_filter('team1', 'app', {'status': 'CREATE_COMPLETE'})
+        >>> matching = [stack for stack in stacks if predicate(stack)]
+    Returns:
+        Function: Function taking a stack dict and returning a Boolean.
+    """
+    version_tag = platform_config.PLATFORM_TAGS['VERSION']
+    type_tag = platform_config.PLATFORM_TAGS['PRODUCT_TYPE']
+    groups_tag = platform_config.PLATFORM_TAGS['GROUPS']
+    any_type = stack_type == 'any'
+    matches_query = compile_query(query)
+
+    def predicate(stack):
+        tags = _tags(stack)
+
+        if version_tag not in tags:
+            return False
+        if not any_type and tags.get(type_tag) != stack_type:
+            return False
+        if tags.get(groups_tag) != groups:
+            return False
+
+        return matches_query is None or matches_query(stack, tags)
+
+    return predicate
+
+
+def compile_query(query):
+    """ Compiles the query parameters of a list request into a predicate.
+    Unknown and empty parameters are ignored.
+
+    Supported parameters:
+        status: Comma separated list of stack statuses.
+        flavor: Product flavor tag of the stack.
+        owner: Owner tag of the stack.
+        updated_since: ISO 8601 date or datetime, stacks last updated
+            (or created) before it are excluded.
+    Returns:
+        Function: Function taking a stack dict (and optionally its tags
+            as a dict) and returning a Boolean, or None if there is
+            nothing to filter on.
+    """
+    query = parse_query(query)
+
+    if not query:
+        return None
+
+    LOGGER.debug('Compiling query %s', query)
+
+    checks = []
+
+    if 'status' in query:
+        statuses = frozenset(
+            status.strip().upper() for status in query['status'].split(','))
+        checks.append(lambda stack, tags: stack.get('StackStatus') in statuses)
+
+    if 'flavor' in query:
+        flavor_tag = platform_config.PLATFORM_TAGS['PRODUCT_FLAVOR']
+        flavor = query['flavor']
+        checks.append(lambda stack, tags: tags.get(flavor_tag) == flavor)
+
+    if 'owner' in query:
+        owner_tag = platform_config.PLATFORM_TAGS['OWNER']
+        owner = query['owner']
+        checks.append(lambda stack, tags: tags.get(owner_tag) == owner)
+
+    if 'updated_since' in query:
+        updated_since = parse_datetime(query['updated_since'], 'updated_since')
+        checks.append(
+            lambda stack, tags: _last_updated(stack) >= updated_since)
+
+    def matches_query(stack, tags=None):
+        if tags is None:
+            tags = _tags(stack)
+
+        for check in checks:
+            if not check(stack, tags):
+                return False
+        return True
+
+    return matches_query
+
+
+def parse_query(query):
+    """ Returns the query parameters of a list request compile_query
+    filters on, dropping the unknown and empty ones.
+    """
+    return {key: value for key, value in (query or {}).items()
+            if key in QUERY_PARAMS and value}
+
+
+def _tags(stack):
+    return {tag['Key']: tag['Value'] for tag in stack.get('Tags', [])}
+
+
+def _last_updated(stack):
+    updated = stack.get('LastUpdatedTime') or stack['CreationTime']
+
+    if updated.tzinfo is None:
+        updated = updated.replace(tzinfo=datetime.timezone.utc)
+
+    return updated
+
+
+def parse_datetime(value, name):
+    """ Parses the ISO 8601 date or datetime of a query parameter,
+    datetimes without a timezone are in UTC.
+    """
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (ValueError, AttributeError) as ex:
+        raise InvalidInput('Invalid {}, expected ISO 8601.'.format(name)) from ex
+
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+
+    return parsed
@@ -1,4 +1,3 @@
-import boto3
 from logger import configure_logger
 
 LOGGER = configure_logger(__name__)
@@ -19,6 +18,8 @@ class STS:
             RoleArn=role_arn, RoleSessionName=role_session_name
         )
 
+        import boto3
+
         return boto3.Session(
             aws_access_key_id=sts_response['Credentials']['AccessKeyId'],
             aws_secret_access_key=sts_response['Credentials']['SecretAccessKey'],
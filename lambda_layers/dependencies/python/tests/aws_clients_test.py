@@ -0,0 +1,36 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+
+from pytest import fixture
+
+import aws_clients
+
+
+@fixture(autouse=True)
+def reset():
+    aws_clients.reset()
+    yield
+    aws_clients.reset()
+
+
+def test_get_client_is_shared():
+    client = aws_clients.get_client('cloudformation', 'eu-west-1')
+
+    assert aws_clients.get_client('cloudformation', 'eu-west-1') is client
+    assert aws_clients.get_client('cloudformation', 'us-east-1') is not client
+
+
+def test_get_client_uses_config():
+    client = aws_clients.get_client('ssm', 'eu-west-1')
+
+    assert client.meta.config.max_pool_connections == \
+        aws_clients.get_client_config().max_pool_connections
+
+
+def test_register_client():
+    stub = object()
+    aws_clients.register_client('elbv2', stub)
+
+    assert aws_clients.get_client('elbv2') is stub
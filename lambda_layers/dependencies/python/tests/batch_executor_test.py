@@ -0,0 +1,103 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+
+import threading
+import time
+
+from pytest import raises
+
+import batch_executor
+import platform_config
+
+from exceptions import AlreadyExists, InvalidInput, NoSuchObject
+
+
+def test_run_batch_keeps_order_and_continues_on_failure():
+    def func(name):
+        if name == 'exists':
+            raise AlreadyExists
+        if name == 'missing':
+            raise NoSuchObject
+        if name == 'broken':
+            raise Exception('boom')
+        return name.upper()
+
+    results = batch_executor.run_batch(
+        func,
+        ['app1', 'exists', 'missing', 'broken', 'app2'],
+        max_workers=2,
+        messages={AlreadyExists: 'An app with that name already exists.'})
+
+    assert results == [
+        {'status_code': 200, 'result': 'APP1'},
+        {'status_code': 409, 'error': 'An app with that name already exists.'},
+        {'status_code': 400, 'error': 'NoSuchObject'},
+        {'status_code': 500, 'error': 'boom'},
+        {'status_code': 200, 'result': 'APP2'}
+    ]
+
+
+def test_run_batch_bounds_concurrency():
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def func(item):
+        with lock:
+            running.append(item)
+            peak.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.remove(item)
+
+    batch_executor.run_batch(func, list(range(12)), max_workers=3)
+
+    assert max(peak) <= 3
+
+
+def test_get_batch_items():
+    assert batch_executor.get_batch_items({'names': ['a', 'b']}, 'names') == ['a', 'b']
+
+    with raises(InvalidInput):
+        batch_executor.get_batch_items({'names': []}, 'names')
+    with raises(InvalidInput):
+        batch_executor.get_batch_items({'items': 'a'}, 'items')
+    with raises(InvalidInput):
+        batch_executor.get_batch_items([], 'items')
+
+
+def test_get_batch_items_limit(monkeypatch):
+    monkeypatch.setattr(platform_config, 'PLATFORM_BATCH_MAX_ITEMS', 2)
+
+    with raises(InvalidInput):
+        batch_executor.get_batch_items({'names': ['a', 'b', 'c']}, 'names')
+
+
+def test_get_item_names():
+    assert batch_executor.get_item_names(['a', {'name': 'b'}]) == ['a', 'b']
+
+    with raises(InvalidInput):
+        batch_executor.get_item_names([{'config': []}])
+
+
+def test_get_max_workers(monkeypatch):
+    monkeypatch.setattr(platform_config, 'PLATFORM_BATCH_MAX_WORKERS', 4)
+
+    assert batch_executor.get_max_workers({}) == 4
+    assert batch_executor.get_max_workers({'max_concurrency': 2}) == 2
+    assert batch_executor.get_max_workers({'max_concurrency': 100}) == 4
+    assert batch_executor.get_max_workers({'max_concurrency': 0}) == 1
+
+    with raises(InvalidInput):
+        batch_executor.get_max_workers({'max_concurrency': 'many'})
+
+
+def test_get_item_event():
+    event = {'claims': {'email': 'user@example.com'}, 'params': {}, 'body-json': ['{}']}
+
+    assert batch_executor.get_item_event(event, 'app1') == {
+        'claims': {'email': 'user@example.com'},
+        'params': {'name': 'app1'}
+    }
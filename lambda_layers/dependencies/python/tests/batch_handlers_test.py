@@ -0,0 +1,108 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+
+import importlib.util
+import json
+import os
+from unittest import mock
+
+from pytest import fixture, raises
+
+from exceptions import AlreadyExists
+
+SRC = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'src')
+
+
+def load_handler(path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SRC, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return module
+
+
+batch_apps = load_handler(os.path.join('apps', 'batch_apps.py'), 'batch_apps')
+batch_services = load_handler(os.path.join('services', 'batch_services.py'), 'batch_services')
+
+
+def batch_event(payload):
+    return {
+        'claims': {
+            'email': 'user@example.com',
+            'groups': 'team1',
+            'roles': 'admin'
+        },
+        'body-json': [json.dumps(payload)]
+    }
+
+
+@fixture(params=[
+    (batch_apps, 'AppManager', 'apps'),
+    (batch_services, 'ServiceManager', 'services')
+], ids=['apps', 'services'])
+def handler(request):
+    module, manager_class, result_key = request.param
+
+    with mock.patch.object(module, manager_class) as manager:
+        yield module, manager, result_key
+
+
+def test_batch_post(handler):
+    module, manager, result_key = handler
+    manager.return_value.create_stack.side_effect = [{'StackId': 'id'}, AlreadyExists]
+
+    response = module.post(batch_event({'items': [
+        {'name': 'first', 'config': {}},
+        {'name': 'taken', 'config': {}}
+    ]}), None)
+
+    assert json.loads(response['body'])[result_key] == [
+        {'status_code': 200, 'result': {'StackId': 'id'}, 'name': 'first'},
+        {'status_code': 409, 'error': module.MESSAGES[AlreadyExists], 'name': 'taken'}
+    ]
+    assert manager.call_args_list[0][0][0]['params'] == {'name': 'first'}
+    assert manager.return_value.create_stack.call_args_list[0][0][0] == 'gurum-first'
+    assert manager.return_value.create_stack.call_args_list[0][0][1]['version'] == 'latest'
+
+
+def test_batch_rejects_items_that_are_not_objects(handler):
+    module, manager, result_key = handler
+
+    response = module.post(batch_event({'items': ['bare']}), None)
+
+    assert json.loads(response['body'])[result_key] == [
+        {'status_code': 400, 'error': 'Every item must be an object.', 'name': 'bare'}
+    ]
+    manager.assert_not_called()
+
+
+def test_batch_invalid_batch(handler):
+    module, manager, _ = handler
+
+    with raises(Exception) as ex:
+        module.delete(batch_event({'names': []}), None)
+
+    assert json.loads(str(ex.value))['statusCode'] == 400
+    manager.assert_not_called()
+
+
+def test_batch_delete(handler):
+    module, manager, result_key = handler
+
+    response = module.delete(batch_event({'names': ['first', 'second']}), None)
+
+    assert [item['status_code'] for item in json.loads(response['body'])[result_key]] == [200, 200]
+    assert [call[0][0]['params']['name'] for call in manager.call_args_list] == ['first', 'second']
+    assert manager.return_value.delete_stack.call_count == 2
+
+
+def test_batch_services_patch_requires_bindings():
+    with mock.patch.object(batch_services, 'ServiceManager') as manager:
+        response = batch_services.patch(batch_event({'items': [{'name': 'first', 'config': {}}]}), None)
+
+    assert json.loads(response['body'])['services'] == [
+        {'status_code': 400, 'error': 'ServiceBindings not provided in payload.', 'name': 'first'}
+    ]
+    manager.return_value.update_stack.assert_not_called()
@@ -3,6 +3,9 @@
 
 # pylint: skip-file
 
+import time
+from unittest import mock
+
 from pytest import fixture
 from cache import Cache
 
@@ -19,3 +22,36 @@ def test_add(cls):
 def test_check(cls):
     cls.add('my_key', 'my_value')
     assert cls.check('my_key') == 'my_value'
+
+
+def test_check_missing_key(cls):
+    assert cls.check('my_key') is None
+
+
+def test_check_expired():
+    cache = Cache(ttl=10)
+    cache.add('my_key', 'my_value')
+
+    with mock.patch('cache.time.monotonic', return_value=time.monotonic() + 10):
+        assert cache.check('my_key') is None
+
+
+def test_ttl_zero_disables_cache():
+    cache = Cache(ttl=0)
+    cache.add('my_key', 'my_value')
+    assert cache.keys() == []
+
+
+def test_max_size_evicts_oldest():
+    cache = Cache(max_size=2)
+    cache.add('first', 1)
+    cache.add('second', 2)
+    cache.add('third', 3)
+    assert cache.check('first') is None
+    assert cache.check('third') == 3
+
+
+def test_remove(cls):
+    cls.add('my_key', 'my_value')
+    cls.remove('my_key')
+    assert cls.check('my_key') is None
@@ -0,0 +1,109 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+
+import base64
+import gzip
+import json
+import os
+
+import yaml
+from pytest import mark
+
+import content_negotiation
+import response_builder
+
+SWAGGER = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', 'src', 'swagger.yaml')
+
+data = {'apps': [{'name': 'app{}'.format(i), 'tasks': '2'} for i in range(100)]}
+
+requires_msgpack = mark.skipif(content_negotiation.msgpack is None, reason='msgpack not installed')
+requires_brotli = mark.skipif(content_negotiation.brotli is None, reason='brotli not installed')
+
+
+def test_negotiate_encoding():
+    assert content_negotiation.negotiate_encoding(None) is None
+    assert content_negotiation.negotiate_encoding('identity') is None
+    assert content_negotiation.negotiate_encoding('gzip, deflate') == 'gzip'
+    assert content_negotiation.negotiate_encoding('gzip;q=0') is None
+    assert content_negotiation.negotiate_encoding('*') in content_negotiation.ENCODINGS
+
+
+def test_negotiate_encoding_skips_small_bodies():
+    assert content_negotiation.negotiate_encoding('gzip', size=10) is None
+
+
+@requires_brotli
+def test_negotiate_encoding_prefers_brotli():
+    assert content_negotiation.negotiate_encoding('gzip, br') == 'br'
+    assert content_negotiation.negotiate_encoding('gzip, br;q=0.5') == 'gzip'
+
+
+def test_negotiate_media_type_defaults_to_json():
+    assert content_negotiation.negotiate_media_type(None) == content_negotiation.JSON
+    assert content_negotiation.negotiate_media_type('application/json') == content_negotiation.JSON
+
+
+@requires_msgpack
+def test_negotiate_media_type_msgpack():
+    assert content_negotiation.negotiate_media_type('application/msgpack') == content_negotiation.MSGPACK
+    assert content_negotiation.negotiate_media_type(
+        'application/json, application/msgpack;q=0.5') == content_negotiation.JSON
+
+
+def test_success_gzip():
+    event = {'headers': {'Accept-Encoding': 'gzip'}}
+
+    response = response_builder.success(data, event=event)
+
+    assert response['isBase64Encoded']
+    assert response['headers']['Content-Encoding'] == 'gzip'
+    assert response['headers']['ETag'].endswith('-gzip"')
+    assert response['headers']['Vary'] == 'Accept, Accept-Encoding'
+
+    payload = json.loads(gzip.decompress(base64.b64decode(response['body'])))
+    assert payload['statusCode'] == 200
+    assert json.loads(payload['body']) == data
+
+
+def test_success_gzip_is_deterministic():
+    event = {'headers': {'Accept-Encoding': 'gzip'}}
+
+    assert response_builder.success(data, event=event) == response_builder.success(data, event=event)
+
+
+def test_success_identity():
+    response = response_builder.success(data, event={'headers': {'Accept-Encoding': ''}})
+
+    assert 'isBase64Encoded' not in response
+    assert response['headers']['Vary'] == 'Accept, Accept-Encoding'
+    assert json.loads(response['body']) == data
+
+
+@requires_msgpack
+def test_success_msgpack():
+    event = {'headers': {'Accept': 'application/msgpack'}}
+
+    response = response_builder.success(data, event=event)
+
+    assert response['headers']['Content-Type'] == content_negotiation.MSGPACK
+    payload = content_negotiation.msgpack.unpackb(base64.b64decode(response['body']), raw=False)
+    assert set(payload) == {'body', 'statusCode'}
+    assert content_negotiation.msgpack.unpackb(payload['body'], raw=False) == data
+
+
+def test_swagger_binary_mapping_scoped_to_get():
+    with open(SWAGGER) as swagger_file:
+        swagger = yaml.safe_load(swagger_file)
+
+    for path, methods in swagger['paths'].items():
+        for method, operation in methods.items():
+            default = operation['x-amazon-apigateway-integration']['responses']['default']
+            expected = 'CONVERT_TO_BINARY' if method == 'get' else None
+
+            assert default.get('contentHandling') == expected, (path, method)
+
+    binary_media_types = swagger['x-amazon-apigateway-binary-media-types']
+    for media_type in [content_negotiation.JSON] + content_negotiation.MSGPACK_TYPES:
+        assert media_type in binary_media_types
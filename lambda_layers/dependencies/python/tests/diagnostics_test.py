@@ -0,0 +1,124 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+
+import time
+from unittest import mock
+
+import boto3
+from botocore.stub import Stubber
+from pytest import approx, fixture
+
+import diagnostics
+import metrics
+
+from cache import Cache
+from diagnostics import DIAGNOSTICS, Histogram
+
+
+@fixture(autouse=True)
+def reset_diagnostics():
+    DIAGNOSTICS.reset()
+    yield
+    DIAGNOSTICS.reset()
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for value in range(1, 100001):
+        histogram.record(value)
+
+    assert histogram.count == 100000
+    assert histogram.percentile(50) == approx(50000, rel=0.01)
+    assert histogram.percentile(99) == approx(99000, rel=0.01)
+    assert histogram.percentile(99.9) == approx(99900, rel=0.01)
+    assert histogram.percentile(100) == 100000
+
+
+def test_histogram_summary():
+    histogram = Histogram()
+    assert histogram.summary() == {'count': 0}
+
+    for value in [1000, 2000, 3000, 250000]:
+        histogram.record(value)
+
+    summary = histogram.summary(scale=1000)
+
+    assert summary['count'] == 4
+    assert summary['min'] == 1
+    assert summary['max'] == 250
+    assert summary['p50'] == approx(2, rel=0.01)
+    assert summary['p99.9'] == 250
+
+
+def test_timed():
+    class Manager:
+        @diagnostics.timed
+        def list_stacks(self):
+            return []
+
+    Manager().list_stacks()
+    Manager().list_stacks()
+
+    latency = DIAGNOSTICS.snapshot()['latency_ms']
+
+    assert latency['test_timed.<locals>.Manager.list_stacks']['count'] == 2
+
+
+def test_record_call_counts_retries_and_throttles():
+    diagnostics.record_call('cloudformation', 'DescribeStacks', 0.05, {
+        'ResponseMetadata': {'RetryAttempts': 2}
+    })
+    diagnostics.record_call('cloudformation', 'DescribeStacks', 0.1, {
+        'Error': {'Code': 'Throttling'},
+        'ResponseMetadata': {'RetryAttempts': 4}
+    })
+
+    snapshot = DIAGNOSTICS.snapshot()
+
+    assert snapshot['latency_ms']['aws.cloudformation.DescribeStacks']['count'] == 2
+    assert snapshot['counters'] == {'aws.retries': 6, 'aws.throttled_calls': 1}
+
+
+def test_instrumented_client_records_latency():
+    client = metrics.instrument_client(boto3.client('cloudformation', region_name='eu-west-1'))
+
+    with Stubber(client) as stubber:
+        stubber.add_response('describe_stacks', {'Stacks': []})
+        client.describe_stacks()
+
+    latency = DIAGNOSTICS.snapshot()['latency_ms']
+
+    assert latency['aws.cloudformation.DescribeStacks']['count'] == 1
+
+
+def test_cache_counters():
+    cache = Cache(ttl=10, max_size=1, name='test')
+    cache.add('a', 1)
+    cache.add('b', 2)
+
+    with mock.patch('cache.time.monotonic', return_value=time.monotonic() + 10):
+        cache.check('b')
+
+    Cache(max_size=1).add('a', 1)
+
+    assert DIAGNOSTICS.snapshot()['counters'] == {
+        'cache.test.evictions': 1,
+        'cache.test.expirations': 1
+    }
+
+
+def test_snapshot_labelled_with_container():
+    snapshot = DIAGNOSTICS.snapshot()
+
+    assert snapshot['container_id'] == DIAGNOSTICS.container_id
+    assert snapshot['started_at'] == DIAGNOSTICS.started_at
+
+
+def test_handler_metrics_ignores_diagnostics_requests():
+    @metrics.handler_metrics
+    def get(event, _context):
+        return {'statusCode': 200}
+
+    assert get({'_diagnostics': True}, None) == {'statusCode': 200}
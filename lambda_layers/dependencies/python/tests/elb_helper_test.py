@@ -4,11 +4,14 @@
 # pylint: skip-file
 
 from pytest import raises, fixture
-from unittest import mock
 
-from datetime import datetime
+import boto3
+from botocore.stub import Stubber
+
+import aws_clients
 import elb_helper
-import random
+
+from exceptions import LimitExceeded
 
 listener_arn = 'arn:aws:elasticloadbalancing:eu-west-1:012345678901:listener/app/gurum-platform/4ee400231fc306f9/d20a7078382ce4e'
 rules = {
@@ -18,21 +21,63 @@ rules = {
         },
         {
             "Priority": "26934"
+        },
+        {
+            "Priority": "default"
         }
     ]
 }
 
-@mock.patch('elb_helper.boto3.client')
+
+@fixture
+def client():
+    client = boto3.client('elbv2', region_name='eu-west-1')
+    aws_clients.register_client('elbv2', client)
+    elb_helper.OCCUPANCY_CACHE.clear()
+    yield client
+    elb_helper.OCCUPANCY_CACHE.clear()
+    aws_clients.reset()
+
+
 def test_get_random_rule_priority(client):
-    client().describe_rules.return_value = rules
+    with Stubber(client) as stubber:
+        stubber.add_response('describe_rules', rules)
+
+        result = elb_helper.get_random_rule_priority(listener_arn)
+
+    assert result >= 1 and result <= 50000
+    assert result not in (2280, 26934)
 
-    result = elb_helper.get_random_rule_priority(listener_arn)
-    assert result >= 0 and result < 50000
 
-@mock.patch('elb_helper.boto3.client')
 def test_uniqueness(client):
-    client().describe_rules.return_value = rules
+    with Stubber(client) as stubber:
+        stubber.add_response('describe_rules', rules)
+
+        result1 = elb_helper.get_random_rule_priority(listener_arn)
+        result2 = elb_helper.get_random_rule_priority(listener_arn)
+
+        stubber.assert_no_pending_responses()
 
-    result1 = elb_helper.get_random_rule_priority(listener_arn)
-    result2 = elb_helper.get_random_rule_priority(listener_arn)
     assert result1 != result2
+
+
+def test_reads_every_page(client):
+    with Stubber(client) as stubber:
+        stubber.add_response('describe_rules', dict(rules, NextMarker='page-2'))
+        stubber.add_response('describe_rules', {'Rules': [{'Priority': '3'}]})
+
+        occupancy = elb_helper.get_listener_occupancy(listener_arn)
+
+        stubber.assert_no_pending_responses()
+
+    assert occupancy.used == 3
+    assert occupancy.is_used(3) and occupancy.is_used(26934)
+
+
+def test_allocate_on_busy_listener():
+    occupancy = elb_helper.PriorityBitmap(range(1, 50000))
+
+    assert occupancy.allocate() == 50000
+
+    with raises(LimitExceeded):
+        occupancy.allocate()
@@ -0,0 +1,110 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+
+from datetime import datetime, timezone
+
+from pytest import fixture, raises
+
+import boto3
+from botocore.stub import Stubber
+
+import aws_clients
+import platform_config
+
+from exceptions import InvalidInput
+from managers.event_manager import EventManager
+
+from stubs import stack_manager_stub
+
+
+def stack_event(number):
+    return {
+        'StackId': 'arn:aws:cloudformation:eu-west-1:012345678901:stack/gurum-myapp/1',
+        'StackName': 'gurum-myapp',
+        'EventId': 'event-{}'.format(number),
+        'LogicalResourceId': 'Resource{}'.format(number),
+        'ResourceStatus': 'CREATE_COMPLETE',
+        'Timestamp': datetime(2019, 1, 1, 0, number, tzinfo=timezone.utc)
+    }
+
+
+# Newest first, as returned by describe_stack_events
+first_page = {
+    'StackEvents': [stack_event(number) for number in range(9, 4, -1)],
+    'NextToken': 'page-2'
+}
+
+
+@fixture
+def client():
+    return boto3.client('cloudformation', region_name='eu-west-1')
+
+
+@fixture
+def cls(client):
+    aws_clients.register_client('cloudformation', client)
+
+    yield EventManager(stack_manager_stub.event)
+
+    aws_clients.reset()
+
+
+def test_get_stack_events_since_event_id_stops_at_cursor(cls, client):
+    with Stubber(client) as stubber:
+        stubber.add_response('describe_stack_events', first_page, {'StackName': 'gurum-myapp'})
+
+        events, cursor, has_more = cls.get_stack_events(since_event_id='event-7')
+
+        stubber.assert_no_pending_responses()
+
+    assert [event['EventId'] for event in events] == ['event-9', 'event-8']
+    assert cursor == 'event-9'
+    assert not has_more
+
+
+def test_get_stack_events_since_timestamp(cls, client):
+    with Stubber(client) as stubber:
+        stubber.add_response('describe_stack_events', first_page, {'StackName': 'gurum-myapp'})
+
+        events, cursor, _ = cls.get_stack_events(since='2019-01-01T00:06:00Z')
+
+    assert [event['EventId'] for event in events] == ['event-9', 'event-8', 'event-7']
+    assert cursor == 'event-9'
+
+
+def test_get_stack_events_without_new_events(cls, client):
+    with Stubber(client) as stubber:
+        stubber.add_response('describe_stack_events', first_page, {'StackName': 'gurum-myapp'})
+        stubber.add_response('describe_stack_events', first_page, {'StackName': 'gurum-myapp'})
+
+        assert cls.get_stack_events(since_event_id='event-9') == ([], 'event-9', False)
+        # A poll by timestamp gets the newest event already seen as cursor
+        assert cls.get_stack_events(since='2019-01-01T00:10:00Z') == ([], 'event-9', False)
+
+
+def test_get_stack_events_keeps_oldest_new_events(cls, client, monkeypatch):
+    monkeypatch.setattr(platform_config, 'PLATFORM_MAX_PAGE_SIZE', 2)
+    second_page = {'StackEvents': [stack_event(number) for number in range(4, 0, -1)]}
+
+    with Stubber(client) as stubber:
+        stubber.add_response('describe_stack_events', first_page, {'StackName': 'gurum-myapp'})
+        stubber.add_response(
+            'describe_stack_events',
+            second_page,
+            {'StackName': 'gurum-myapp', 'NextToken': 'page-2'})
+
+        events, cursor, has_more = cls.get_stack_events(since_event_id='event-2')
+
+        stubber.assert_no_pending_responses()
+
+    # The next poll with the cursor returns event-5 to event-9
+    assert [event['EventId'] for event in events] == ['event-4', 'event-3']
+    assert cursor == 'event-4'
+    assert has_more
+
+
+def test_get_stack_events_invalid_since(cls):
+    with raises(InvalidInput):
+        cls.get_stack_events(since='yesterday')
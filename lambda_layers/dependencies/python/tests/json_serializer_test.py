@@ -0,0 +1,57 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+
+import json
+from datetime import datetime, timezone
+
+from pytest import mark
+
+import json_serializer
+
+payload = {
+    'apps': [
+        {
+            'name': 'app1',
+            'created_at': datetime(2019, 1, 2, 3, 4, 5),
+            'updated_at': datetime(2019, 1, 2, 3, 4, 5, 678, tzinfo=timezone.utc),
+            'tasks': 2,
+            'healthy': True,
+            'error_details': None
+        }
+    ]
+}
+
+requires_orjson = mark.skipif(json_serializer.orjson is None, reason='orjson not installed')
+
+
+def test_stdlib_serializer_datetime_format():
+    body = json_serializer.StdlibSerializer.dumps(payload)
+
+    assert '"created_at": "2019-01-02 03:04:05"' in body
+    assert '"updated_at": "2019-01-02 03:04:05"' in body
+
+
+@requires_orjson
+def test_orjson_serializer_matches_stdlib():
+    stdlib = json_serializer.StdlibSerializer.dumps(payload)
+    native = json_serializer.OrjsonSerializer.dumps(payload)
+
+    assert json.loads(native) == json.loads(stdlib)
+    assert '"created_at":"2019-01-02 03:04:05"' in native
+
+
+@requires_orjson
+def test_orjson_serializer_falls_back_to_stdlib():
+    body = json_serializer.OrjsonSerializer.dumps({'count': 2 ** 70})
+
+    assert body == json_serializer.StdlibSerializer.dumps({'count': 2 ** 70})
+
+
+def test_get_serializer():
+    assert json_serializer.get_serializer('json') is json_serializer.StdlibSerializer
+
+    expected = json_serializer.StdlibSerializer if json_serializer.orjson is None \
+        else json_serializer.OrjsonSerializer
+    assert json_serializer.get_serializer('auto') is expected
@@ -0,0 +1,91 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+
+import json
+import logging
+import sys
+from types import SimpleNamespace
+
+import logger
+
+
+def test_configure_logger_attaches_one_handler():
+    first = logger.configure_logger('logger_test.once')
+    second = logger.configure_logger('logger_test.once')
+
+    assert first is second
+    assert first.handlers == [logger.get_handler()]
+    assert not first.propagate
+
+
+def test_parse_level():
+    assert logger.parse_level('debug') == logging.DEBUG
+    assert logger.parse_level('WARNING') == logging.WARNING
+    assert logger.parse_level('verbose') == logging.INFO
+
+
+def test_json_formatter():
+    record = logging.LogRecord('logger_test', logging.INFO, __file__, 1, 'Found %s stacks', (3,), None)
+    logger._REQUEST['request_id'] = 'abc-123'
+    try:
+        entry = json.loads(logger.JsonFormatter().format(record))
+    finally:
+        logger._REQUEST.clear()
+
+    assert entry['level'] == 'INFO'
+    assert entry['logger'] == 'logger_test'
+    assert entry['message'] == 'Found 3 stacks'
+    assert entry['request_id'] == 'abc-123'
+    assert entry['timestamp'].endswith('Z')
+
+
+def test_json_formatter_exception():
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        record = logging.LogRecord('logger_test', logging.ERROR, __file__, 1, 'Failed', None, sys.exc_info())
+
+    entry = json.loads(logger.JsonFormatter().format(record))
+
+    assert 'ValueError: boom' in entry['exception']
+
+
+def test_sampled_request_logs_debug():
+    log = logger.configure_logger('logger_test.sampled')
+    context = SimpleNamespace(aws_request_id='abc-123')
+
+    assert logger.start_request(context, sample_rate=1.0)
+    assert log.isEnabledFor(logging.DEBUG)
+    assert logger._REQUEST == {'request_id': 'abc-123', 'debug_sampled': True}
+
+    logger.end_request()
+    assert log.getEffectiveLevel() == logger.LOG_LEVEL
+    assert logger._REQUEST == {}
+
+
+def test_unsampled_request_keeps_level():
+    log = logger.configure_logger('logger_test.unsampled')
+
+    assert not logger.start_request(None, sample_rate=0)
+    assert log.getEffectiveLevel() == logger.LOG_LEVEL
+    logger.end_request()
+
+
+def test_request_logging_resets_after_errors():
+    calls = []
+
+    @logger.request_logging
+    def get(event, _context):
+        calls.append(event)
+        raise ValueError('boom')
+
+    try:
+        get({'params': {}}, None)
+    except ValueError:
+        pass
+
+    assert calls == [{'params': {}}]
+    assert get.__name__ == 'get'
+    assert logger._level == logger.LOG_LEVEL
@@ -0,0 +1,167 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+
+import json
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import boto3
+from botocore.stub import Stubber
+from pytest import fixture, raises
+
+import metrics
+import platform_config
+
+from metrics import METRICS
+
+
+@fixture(autouse=True)
+def reset_metrics(monkeypatch):
+    # Diagnostics are only emitted when a test asks for them
+    monkeypatch.setattr(metrics, '_DIAGNOSTICS_EMITTED_AT', time.time())
+    METRICS.reset()
+    yield
+    METRICS.reset()
+
+
+def test_documents():
+    METRICS.count('StacksScanned', 40)
+    METRICS.count('StacksReturned', 4)
+    METRICS.put('HandlerLatency', 12.5, 'Milliseconds')
+
+    document, = METRICS.documents('list_apps.get', {'cold_start': True}, timestamp=1)
+
+    assert document['Function'] == 'list_apps.get'
+    assert document['StacksScanned'] == 40
+    assert document['ScanAmplification'] == 10
+    assert document['HandlerLatency'] == 12.5
+    assert document['cold_start'] is True
+    assert document['_aws'] == {
+        'Timestamp': 1000,
+        'CloudWatchMetrics': [{
+            'Namespace': platform_config.PLATFORM_METRICS_NAMESPACE,
+            'Dimensions': [['Function'], []],
+            'Metrics': [
+                {'Name': 'StacksScanned', 'Unit': 'Count'},
+                {'Name': 'StacksReturned', 'Unit': 'Count'},
+                {'Name': 'HandlerLatency', 'Unit': 'Milliseconds'},
+                {'Name': 'ScanAmplification', 'Unit': 'None'}
+            ]
+        }]
+    }
+
+
+def test_documents_without_returned_stacks():
+    METRICS.count('StacksScanned', 40)
+    METRICS.count('StacksReturned', 0)
+
+    document, = METRICS.documents('list_apps.get', {})
+
+    assert document['StacksScanned'] == 40
+    assert 'ScanAmplification' not in document
+
+
+def test_documents_split_values():
+    for value in range(250):
+        METRICS.put('cloudformation.DescribeStacks.Latency', value, 'Milliseconds')
+    METRICS.count('AWSCalls', 250)
+
+    documents = METRICS.documents('list_apps.get', {'request_id': 'abc'})
+
+    assert [len(document['cloudformation.DescribeStacks.Latency']) for document in documents] == [100, 100, 50]
+    assert documents[0]['AWSCalls'] == 250
+    assert 'AWSCalls' not in documents[1]
+    assert 'request_id' not in documents[2]
+
+
+def test_cache_lookup():
+    METRICS.cache_lookup('Inventory', True)
+    METRICS.cache_lookup('Inventory', False)
+    METRICS.cache_lookup('Inventory', True)
+
+    assert METRICS.get('InventoryCacheHit') == [2]
+    assert METRICS.get('InventoryCacheMiss') == [1]
+
+
+def test_instrument_client_records_calls():
+    client = metrics.instrument_client(boto3.client('cloudformation', region_name='eu-west-1'))
+
+    with Stubber(client) as stubber:
+        stubber.add_response('describe_stacks', {'Stacks': []})
+        stubber.add_client_error('describe_stacks', 'ValidationError', http_status_code=400)
+
+        client.describe_stacks()
+        with raises(client.exceptions.ClientError):
+            client.describe_stacks(StackName='missing')
+
+    assert METRICS.get('AWSCalls') == [2]
+    assert METRICS.get('AWSCallErrors') == [1]
+    assert METRICS.get('cloudformation.DescribeStacks.Calls') == [2]
+    assert len(METRICS.get('cloudformation.DescribeStacks.Latency')) == 2
+
+
+def test_instrument_client_ignores_other_objects():
+    stub = object()
+
+    assert metrics.instrument_client(stub) is stub
+
+
+def test_handler_metrics_emits_once_per_invocation(capsys):
+    @metrics.handler_metrics
+    def get(event, _context):
+        METRICS.count('StacksScanned', 3)
+        return {'statusCode': 200}
+
+    with mock.patch.object(metrics, '_COLD_START', True):
+        get({}, SimpleNamespace(aws_request_id='abc-123'))
+        get({}, None)
+
+    first, second = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+    assert first['Function'] == 'metrics_test.get'
+    assert first['ColdStart'] == 1
+    assert first['cold_start'] is True
+    assert first['request_id'] == 'abc-123'
+    assert first['StacksScanned'] == 3
+    assert 'HandlerLatency' in first
+    assert second['ColdStart'] == 0
+    assert METRICS.get('StacksScanned') == []
+
+
+def test_handler_metrics_disabled(monkeypatch, capsys):
+    monkeypatch.setattr(platform_config, 'PLATFORM_METRICS_ENABLED', False)
+
+    @metrics.handler_metrics
+    def get(event, _context):
+        return {'statusCode': 200}
+
+    assert get({}, None) == {'statusCode': 200}
+    assert capsys.readouterr().out == ''
+
+
+def test_handler_metrics_emits_diagnostics_periodically(monkeypatch, capsys):
+    monkeypatch.setattr(platform_config, 'PLATFORM_DIAGNOSTICS_INTERVAL', 60)
+    monkeypatch.setattr(metrics, '_DIAGNOSTICS_EMITTED_AT', None)
+    monkeypatch.setattr(metrics.diagnostics.DIAGNOSTICS, 'started_at', time.time() - 61)
+
+    @metrics.handler_metrics
+    def get(event, _context):
+        return {'statusCode': 200}
+
+    get({}, None)
+    get({}, None)
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    documents = [line for line in lines if 'diagnostics' in line]
+
+    assert len(lines) == 3
+    assert len(documents) == 1
+    assert documents[0]['Function'] == 'metrics_test.get'
+    assert documents[0]['ContainerUptime'] >= 61
+    assert documents[0]['diagnostics']['container_id'] == metrics.diagnostics.DIAGNOSTICS.container_id
+    assert documents[0]['_aws']['CloudWatchMetrics'][0]['Metrics'] == [
+        {'Name': 'ContainerUptime', 'Unit': 'Seconds'}
+    ]
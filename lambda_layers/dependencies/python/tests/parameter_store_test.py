@@ -0,0 +1,130 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+
+from pytest import fixture, raises
+
+import boto3
+from botocore.stub import Stubber
+
+import aws_clients
+from exceptions import ParameterNotFound
+from parameter_store import ParameterCache, ParameterStore, PARAMETER_CACHE
+
+listener_arn = 'arn:aws:elasticloadbalancing:eu-west-1:012345678901:listener/app/gurum-platform/4ee400231fc306f9/d20a7078382ce4e'
+parameters = {
+    'Parameters': [
+        {
+            'Name': '/gurum/platform/loadbalancer/listener-arn',
+            'Value': listener_arn
+        }
+    ]
+}
+
+
+@fixture
+def client():
+    client = boto3.client('ssm', region_name='eu-west-1')
+    aws_clients.register_client('ssm', client)
+    yield client
+    aws_clients.reset()
+
+
+def test_get_parameters_cached(client):
+    cache = ParameterCache(ttl=60)
+
+    with Stubber(client) as stubber:
+        stubber.add_response('get_parameters_by_path', parameters)
+
+        first = cache.get_parameters()
+        second = cache.get_parameters()
+
+        stubber.assert_no_pending_responses()
+
+    assert first['platform']['loadbalancer']['listener-arn'] == listener_arn
+    assert second is first
+    assert cache.stats() == {'hits': 1, 'misses': 1}
+
+
+def test_refresh_reloads(client):
+    cache = ParameterCache(ttl=60)
+
+    with Stubber(client) as stubber:
+        stubber.add_response('get_parameters_by_path', parameters)
+        stubber.add_response('get_parameters_by_path', parameters)
+
+        cache.get_parameters()
+        cache.refresh()
+
+        stubber.assert_no_pending_responses()
+
+    assert cache.stats() == {'hits': 0, 'misses': 2}
+
+
+def test_get_parameters_by_name(client):
+    cache = ParameterCache(ttl=60)
+
+    with Stubber(client) as stubber:
+        stubber.add_response(
+            'get_parameters',
+            parameters,
+            {
+                'Names': ['/gurum/platform/loadbalancer/listener-arn'],
+                'WithDecryption': False
+            })
+
+        result = cache.get_parameters(['platform/loadbalancer/listener-arn'])
+
+        stubber.assert_no_pending_responses()
+
+    assert result['platform']['loadbalancer']['listener-arn'] == listener_arn
+
+
+def test_fetch_parameters_batches(client):
+    names = ['/gurum/param-{}'.format(i) for i in range(12)]
+
+    with Stubber(client) as stubber:
+        for batch in [names[:10], names[10:]]:
+            stubber.add_response(
+                'get_parameters',
+                {
+                    'Parameters': [{'Name': name, 'Value': 'v'} for name in batch]
+                },
+                {'Names': batch, 'WithDecryption': False})
+
+        result = ParameterStore('eu-west-1').fetch_parameters(names)
+
+        stubber.assert_no_pending_responses()
+
+    assert [param['Name'] for param in result] == names
+
+
+def test_fetch_parameters_not_found(client):
+    with Stubber(client) as stubber:
+        stubber.add_response(
+            'get_parameters',
+            {'Parameters': [], 'InvalidParameters': ['/gurum/missing']})
+
+        with raises(ParameterNotFound):
+            ParameterStore('eu-west-1').fetch_parameters(['/gurum/missing'])
+
+
+def test_put_parameter_patches_cache(client):
+    cache_params = {'platform': {'loadbalancer': {'listener-arn': listener_arn}}}
+
+    with Stubber(client) as stubber:
+        stubber.add_response('get_parameters_by_path', parameters)
+        stubber.add_client_error('get_parameter', 'ParameterNotFound')
+        stubber.add_response('put_parameter', {'Version': 1})
+
+        PARAMETER_CACHE.invalidate()
+        PARAMETER_CACHE.get_parameters()
+        ParameterStore('eu-west-1').put_parameter('/gurum/platform/vpc-id', 'vpc-1')
+        result = PARAMETER_CACHE.get_parameters()
+
+        stubber.assert_no_pending_responses()
+
+    PARAMETER_CACHE.invalidate()
+    cache_params['platform']['vpc-id'] = 'vpc-1'
+    assert result == cache_params
@@ -0,0 +1,100 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+
+from pytest import fixture, raises
+from unittest import mock
+
+import boto3
+from botocore.stub import Stubber
+
+import aws_clients
+
+from exceptions import NoSuchObject
+from managers.pipeline_manager import PipelineManager
+
+from stubs import pipeline_manager_stub
+
+
+@fixture
+def client():
+    return boto3.client('cloudformation', region_name='eu-west-1')
+
+
+@fixture
+def codepipeline():
+    return boto3.client('codepipeline', region_name='eu-west-1')
+
+
+@fixture
+def cls(client, codepipeline):
+    aws_clients.register_client('cloudformation', client)
+    aws_clients.register_client('codepipeline', codepipeline)
+
+    yield PipelineManager(pipeline_manager_stub.event)
+
+    aws_clients.reset()
+
+
+def test_get_pipeline_overview(cls, client):
+    states = pipeline_manager_stub.pipeline_state['stageStates']
+    executions = pipeline_manager_stub.pipeline_executions['pipelineExecutionSummaries']
+
+    # The state and the executions are fetched on two threads, the
+    # methods are patched so the result doesn't depend on the call order
+    with Stubber(client) as cf_stubber, \
+            mock.patch.object(cls, 'get_pipeline_state', return_value=states) as get_state, \
+            mock.patch.object(cls, 'list_pipeline_executions', return_value=executions) as list_executions:
+        cf_stubber.add_response(
+            'describe_stacks',
+            {'Stacks': [pipeline_manager_stub.pipeline_stack()]},
+            {'StackName': 'gurum-mypipeline'})
+
+        overview = cls.get_pipeline_overview(max_executions=5)
+
+    get_state.assert_called_once_with('gurum-mypipeline-Pipeline')
+    list_executions.assert_called_once_with('gurum-mypipeline-Pipeline', 5)
+    assert overview['outputs'] == {'PipelineName': 'gurum-mypipeline-Pipeline'}
+    assert [state['stageName'] for state in overview['states']] == ['Source', 'ApprovalStage']
+    assert overview['actions'][('ApprovalStage', 'Approval')]['latestExecution']['token'] == 'token-1'
+    assert overview['executions'][0]['pipelineExecutionId'] == 'execution-1'
+
+
+def test_list_pipeline_executions(cls, codepipeline):
+    with Stubber(codepipeline) as cp_stubber:
+        cp_stubber.add_response(
+            'list_pipeline_executions',
+            pipeline_manager_stub.pipeline_executions,
+            {'pipelineName': 'gurum-mypipeline-Pipeline', 'maxResults': 5})
+
+        executions = cls.list_pipeline_executions('gurum-mypipeline-Pipeline', 5)
+
+    assert executions[0]['pipelineExecutionId'] == 'execution-1'
+
+
+def test_get_pipeline_overview_without_executions(cls, client, codepipeline):
+    with Stubber(client) as cf_stubber, Stubber(codepipeline) as cp_stubber:
+        cf_stubber.add_response(
+            'describe_stacks',
+            {'Stacks': [pipeline_manager_stub.pipeline_stack()]},
+            {'StackName': 'gurum-mypipeline'})
+        cp_stubber.add_response(
+            'get_pipeline_state',
+            pipeline_manager_stub.pipeline_state,
+            {'name': 'gurum-mypipeline-Pipeline'})
+
+        overview = cls.get_pipeline_overview()
+
+        cp_stubber.assert_no_pending_responses()
+
+    assert overview['executions'] is None
+    assert ('Source', 'GitHub') in overview['actions']
+
+
+def test_get_pipeline_overview_no_such_pipeline(cls, client):
+    with Stubber(client) as cf_stubber:
+        cf_stubber.add_response('describe_stacks', {'Stacks': []}, {'StackName': 'gurum-mypipeline'})
+
+        with raises(NoSuchObject):
+            cls.get_pipeline_overview()
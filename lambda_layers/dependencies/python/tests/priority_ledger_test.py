@@ -0,0 +1,130 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+
+import json
+import time
+from unittest import mock
+
+from pytest import fixture, raises
+
+import boto3
+from botocore.stub import Stubber, ANY
+
+import aws_clients
+import elb_helper
+import priority_ledger
+
+from exceptions import LimitExceeded
+
+listener_arn = 'arn:aws:elasticloadbalancing:eu-west-1:012345678901:listener/app/gurum-platform/4ee400231fc306f9/d20a7078382ce4e'
+
+
+@fixture(params=['memory', 'sqlite'])
+def ledger(request, tmp_path):
+    if request.param == 'memory':
+        store = priority_ledger.InMemoryLedgerStore()
+    else:
+        store = priority_ledger.SqliteLedgerStore(str(tmp_path / 'ledger.db'))
+
+    return priority_ledger.PriorityLedger(store, ttl=60)
+
+
+def test_claim_is_exclusive(ledger):
+    assert ledger.claim(listener_arn, 10, 'first')
+    assert not ledger.claim(listener_arn, 10, 'second')
+    assert ledger.claim(listener_arn, 11, 'second')
+
+
+def test_release(ledger):
+    ledger.claim(listener_arn, 10)
+    ledger.release(listener_arn, 10)
+
+    assert ledger.claim(listener_arn, 10)
+
+
+def test_expired_claim_can_be_taken(tmp_path):
+    ledger = priority_ledger.PriorityLedger(
+        priority_ledger.SqliteLedgerStore(str(tmp_path / 'ledger.db')), ttl=0)
+
+    assert ledger.claim(listener_arn, 10, 'first')
+    assert ledger.claim(listener_arn, 10, 'second')
+
+
+@fixture
+def ssm():
+    client = boto3.client('ssm', region_name='eu-west-1')
+    aws_clients.register_client('ssm', client)
+
+    yield client
+
+    aws_clients.reset()
+
+
+def put_parameter(overwrite):
+    return {
+        'Name': '/gurum-priority-ledger/listener/10',
+        'Description': ANY,
+        'Value': ANY,
+        'Type': 'String',
+        'Overwrite': overwrite,
+        'Tier': 'Standard'
+    }
+
+
+def claimed(expires_at, version):
+    return {'Parameter': {'Value': json.dumps({'owner': 'first', 'expires_at': expires_at}), 'Version': version}}
+
+
+def test_ssm_store_conditional_write(ssm):
+    store = priority_ledger.SsmLedgerStore('/gurum-priority-ledger')
+
+    with Stubber(ssm) as stubber:
+        stubber.add_response('put_parameter', {'Version': 1}, put_parameter(False))
+        stubber.add_client_error('put_parameter', 'ParameterAlreadyExists')
+        stubber.add_response('get_parameter', claimed(time.time() + 60, 1))
+
+        assert store.claim('listener/10', 'first', time.time() + 60)
+        assert not store.claim('listener/10', 'second', time.time() + 60)
+
+        stubber.assert_no_pending_responses()
+
+
+def test_ssm_store_takes_expired_claim(ssm):
+    store = priority_ledger.SsmLedgerStore('/gurum-priority-ledger')
+
+    with Stubber(ssm) as stubber:
+        stubber.add_client_error('put_parameter', 'ParameterAlreadyExists')
+        stubber.add_response('get_parameter', claimed(1600000000, 3))
+        stubber.add_response('put_parameter', {'Version': 4}, put_parameter(True))
+        # Another claimant overwrote the expired version first
+        stubber.add_client_error('put_parameter', 'ParameterAlreadyExists')
+        stubber.add_response('get_parameter', claimed(1600000000, 3))
+        stubber.add_response('put_parameter', {'Version': 5}, put_parameter(True))
+
+        assert store.claim('listener/10', 'second', time.time() + 60)
+        assert not store.claim('listener/10', 'third', time.time() + 60)
+
+        stubber.assert_no_pending_responses()
+
+
+def test_release_rule_priority_ignores_failures():
+    ledger = mock.Mock()
+    ledger.release.side_effect = Exception('unavailable')
+
+    elb_helper.release_rule_priority(listener_arn, 10, ledger=ledger)
+
+    ledger.release.assert_called_once_with(listener_arn, 10)
+
+
+def test_claim_rule_priority_skips_claimed(ledger):
+    elb_helper.OCCUPANCY_CACHE.add(listener_arn, elb_helper.PriorityBitmap(range(1, 49999)))
+    ledger.claim(listener_arn, 49999)
+
+    assert elb_helper.claim_rule_priority(listener_arn, ledger=ledger) == 50000
+
+    with raises(LimitExceeded):
+        elb_helper.claim_rule_priority(listener_arn, ledger=ledger)
+
+    elb_helper.OCCUPANCY_CACHE.clear()
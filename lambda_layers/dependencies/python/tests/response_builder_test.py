@@ -3,10 +3,18 @@
 
 # pylint: skip-file
 
-from pytest import fixture
+from pytest import mark, param
 import datetime
+import json
+import json_serializer
 import response_builder
 
+serializers = [
+    json_serializer.StdlibSerializer,
+    param(json_serializer.OrjsonSerializer, marks=mark.skipif(
+        json_serializer.orjson is None, reason='orjson not installed'))
+]
+
 
 def test_success_with_string_param():
     expected_response = {
@@ -17,3 +25,55 @@ def test_success_with_string_param():
     response = response_builder.success('Woo!')
 
     assert response == expected_response
+
+
+def test_success_with_etag():
+    response = response_builder.success({'apps': []}, event={}, cache_control='private, max-age=10')
+
+    assert response['body'] == '{"apps": []}'
+    assert response['statusCode'] == 200
+    assert response['headers']['ETag'] == response_builder.etag('{"apps": []}')
+    assert response['headers']['Cache-Control'] == 'private, max-age=10'
+
+
+def test_success_not_modified():
+    current = response_builder.etag('{"apps": []}')
+    event = {'headers': {'If-None-Match': 'W/"other", {}'.format(current)}}
+
+    response = response_builder.success({'apps': []}, event=event)
+
+    assert response == {
+        'body': '',
+        'statusCode': 304,
+        'headers': {'ETag': current, 'Vary': 'Accept, Accept-Encoding'}
+    }
+
+
+def test_success_modified():
+    event = {'headers': {'If-None-Match': '"stale"'}}
+
+    response = response_builder.success({'apps': []}, event=event)
+
+    assert response['statusCode'] == 200
+    assert response['body'] == '{"apps": []}'
+
+
+def test_etag_is_stable():
+    assert response_builder.etag('{"apps": []}') == response_builder.etag('{"apps": []}')
+    assert response_builder.etag('{"apps": []}') != response_builder.etag('{"apps": [1]}')
+
+
+def test_success_uses_stdlib_serializer_by_default():
+    assert response_builder.SERIALIZER is json_serializer.StdlibSerializer
+
+
+@mark.parametrize('serializer', serializers)
+def test_success_with_serializer(monkeypatch, serializer):
+    monkeypatch.setattr(response_builder, 'SERIALIZER', serializer)
+    data = {'apps': [{'name': 'app1', 'created_at': datetime.datetime(2019, 1, 2, 3, 4, 5)}]}
+
+    response = response_builder.success(data, event={})
+
+    assert response['body'] == serializer.dumps(data)
+    assert json.loads(response['body']) == {'apps': [{'name': 'app1', 'created_at': '2019-01-02 03:04:05'}]}
+    assert response['headers']['ETag'] == response_builder.etag(response['body'])
@@ -0,0 +1,68 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+
+from pytest import raises
+from datetime import datetime, timezone
+
+import stack_filter
+
+from exceptions import InvalidInput
+from stubs import stack_manager_stub
+
+
+def test_compile_filter_ownership():
+    predicate = stack_filter.compile_filter('team1', 'app')
+
+    assert predicate(stack_manager_stub.stack('gurum-app1'))
+    assert not predicate(stack_manager_stub.stack('gurum-app1', groups='team2'))
+    assert not predicate(stack_manager_stub.stack('gurum-p1', stack_type='pipeline'))
+
+
+def test_compile_filter_any_type():
+    predicate = stack_filter.compile_filter('team1', 'any')
+
+    assert predicate(stack_manager_stub.stack('gurum-p1', stack_type='pipeline'))
+
+
+def test_compile_filter_without_platform_tags():
+    predicate = stack_filter.compile_filter('team1', 'app')
+
+    assert not predicate({'StackName': 'other', 'Tags': []})
+
+
+def test_compile_filter_query():
+    predicate = stack_filter.compile_filter('team1', 'app', {'status': 'delete_complete'})
+
+    assert predicate(stack_manager_stub.deleted_stack('gurum-app1'))
+    assert not predicate(stack_manager_stub.stack('gurum-app1'))
+
+
+def test_compile_query_empty():
+    assert stack_filter.compile_query({'limit': '10', 'status': ''}) is None
+
+
+def test_compile_query_status():
+    matches_query = stack_filter.compile_query({'status': 'update_complete, create_complete'})
+
+    assert matches_query(stack_manager_stub.stack('gurum-app1'))
+
+
+def test_compile_query_updated_since():
+    stack = stack_manager_stub.stack('gurum-app1')
+    stack['LastUpdatedTime'] = datetime(2019, 6, 1, tzinfo=timezone.utc)
+
+    assert stack_filter.compile_query({'updated_since': '2019-05-01'})(stack)
+    assert not stack_filter.compile_query({'updated_since': '2019-07-01T00:00:00Z'})(stack)
+
+
+def test_compile_query_owner():
+    matches_query = stack_filter.compile_query({'owner': 'user@example.com'})
+
+    assert not matches_query(stack_manager_stub.stack('gurum-app1'))
+
+
+def test_compile_query_invalid_updated_since():
+    with raises(InvalidInput):
+        stack_filter.compile_query({'updated_since': 'yesterday'})
@@ -0,0 +1,363 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+
+from pytest import fixture, raises
+from unittest import mock
+
+import boto3
+from botocore.stub import ANY, Stubber
+
+import aws_clients
+import elb_helper
+import priority_ledger
+import platform_config
+
+from exceptions import InvalidInput
+
+from inventory import INVENTORY
+from managers.app_manager import AppManager
+
+from stubs import stack_manager_stub
+
+
+@fixture(autouse=True)
+def inventory():
+    INVENTORY.clear()
+    yield INVENTORY
+    INVENTORY.clear()
+
+
+@fixture
+def client():
+    return boto3.client('cloudformation', region_name='eu-west-1')
+
+
+@fixture
+def tagging():
+    return boto3.client('resourcegroupstaggingapi', region_name='eu-west-1')
+
+
+@fixture
+def cls(client, tagging):
+    aws_clients.register_client('cloudformation', client)
+    aws_clients.register_client('resourcegroupstaggingapi', tagging)
+
+    yield AppManager(stack_manager_stub.event)
+
+    aws_clients.reset()
+
+
+@fixture
+def scan():
+    with mock.patch.object(platform_config, 'PLATFORM_STACK_LOOKUP', 'scan'):
+        yield
+
+
+@fixture
+def tags():
+    with mock.patch.object(platform_config, 'PLATFORM_STACK_LOOKUP', 'tags'):
+        yield
+
+
+def test_list_stacks_reads_every_page(cls, client, scan):
+    with Stubber(client) as stubber:
+        stubber.add_response('describe_stacks', stack_manager_stub.first_page, {})
+        stubber.add_response('describe_stacks', stack_manager_stub.second_page, {'NextToken': 'page-2'})
+
+        result, next_token = cls.list_stacks(['StackName', 'StackStatus'])
+
+        stubber.assert_no_pending_responses()
+
+    assert result == [
+        {'StackName': 'gurum-app1', 'StackStatus': 'CREATE_COMPLETE'},
+        {'StackName': 'gurum-app3', 'StackStatus': 'CREATE_COMPLETE'}
+    ]
+    assert next_token is None
+
+
+def test_list_stacks_sorted_by_name(cls, client, scan):
+    with Stubber(client) as stubber:
+        stubber.add_response('describe_stacks', {
+            'Stacks': [stack_manager_stub.stack('gurum-app3'), stack_manager_stub.stack('gurum-app1')]
+        }, {})
+
+        result, _ = cls.list_stacks(['StackName'])
+
+    assert result == [{'StackName': 'gurum-app1'}, {'StackName': 'gurum-app3'}]
+
+
+def test_list_stacks_served_from_inventory(cls, client, scan):
+    with Stubber(client) as stubber:
+        stubber.add_response('describe_stacks', stack_manager_stub.second_page, {})
+
+        first, _ = cls.list_stacks(['StackName'])
+        second, _ = cls.list_stacks(['StackName'])
+
+        stubber.assert_no_pending_responses()
+
+    assert first == second == [{'StackName': 'gurum-app3'}]
+
+
+def test_list_stacks_by_tags(cls, client, tagging, tags):
+    with Stubber(client) as cfn_stubber, Stubber(tagging) as tagging_stubber:
+        tagging_stubber.add_response(
+            'get_resources',
+            stack_manager_stub.tagged_resources,
+            stack_manager_stub.tag_filters)
+        cfn_stubber.add_response(
+            'describe_stacks',
+            {'Stacks': [stack_manager_stub.stack('gurum-app1')]},
+            {'StackName': stack_manager_stub.tagged_arns[0]})
+        cfn_stubber.add_response(
+            'describe_stacks',
+            {'Stacks': [stack_manager_stub.deleted_stack('gurum-app2')]},
+            {'StackName': stack_manager_stub.tagged_arns[1]})
+
+        result, _ = cls.list_stacks(['StackName'])
+
+        cfn_stubber.assert_no_pending_responses()
+
+    assert result == [{'StackName': 'gurum-app1'}]
+
+
+def test_list_stacks_scans_large_groups(cls, client, tagging, tags):
+    with Stubber(client) as cfn_stubber, Stubber(tagging) as tagging_stubber, \
+            mock.patch.object(platform_config, 'PLATFORM_STACK_LOOKUP_MAX_DESCRIBES', 1):
+        tagging_stubber.add_response(
+            'get_resources',
+            stack_manager_stub.tagged_resources,
+            stack_manager_stub.tag_filters)
+        cfn_stubber.add_response('describe_stacks', stack_manager_stub.second_page, {})
+
+        result, _ = cls.list_stacks(['StackName'])
+
+        cfn_stubber.assert_no_pending_responses()
+
+    assert result == [{'StackName': 'gurum-app3'}]
+
+
+def test_list_stacks_falls_back_to_scan(cls, client, tagging, tags):
+    with Stubber(client) as cfn_stubber, Stubber(tagging) as tagging_stubber:
+        tagging_stubber.add_client_error('get_resources', 'AccessDeniedException')
+        cfn_stubber.add_response('describe_stacks', stack_manager_stub.second_page, {})
+
+        result, _ = cls.list_stacks(['StackName'])
+
+        cfn_stubber.assert_no_pending_responses()
+
+    assert result == [{'StackName': 'gurum-app3'}]
+
+
+def test_list_stacks_pages_with_next_token(cls, inventory):
+    inventory.put('team1', 'app', [
+        stack_manager_stub.stack('gurum-app{}'.format(i)) for i in range(5)
+    ])
+
+    first, next_token = cls.list_stacks(['StackName'], limit='2')
+    second, next_token = cls.list_stacks(['StackName'], limit=2, next_token=next_token)
+    third, next_token = cls.list_stacks(['StackName'], limit=2, next_token=next_token)
+
+    assert first == [{'StackName': 'gurum-app0'}, {'StackName': 'gurum-app1'}]
+    assert second == [{'StackName': 'gurum-app2'}, {'StackName': 'gurum-app3'}]
+    assert third == [{'StackName': 'gurum-app4'}]
+    assert next_token is None
+
+
+def test_list_stacks_pages_by_stack_name(cls, inventory):
+    inventory.put('team1', 'app', [
+        stack_manager_stub.stack('gurum-app{}'.format(i)) for i in range(1, 4)
+    ])
+
+    first, next_token = cls.list_stacks(['StackName'], limit=2)
+
+    # A stack created before the cursor neither repeats nor skips a stack
+    inventory.put('team1', 'app', [
+        stack_manager_stub.stack('gurum-app{}'.format(i)) for i in range(4)
+    ])
+
+    second, next_token = cls.list_stacks(['StackName'], limit=2, next_token=next_token)
+
+    assert first == [{'StackName': 'gurum-app1'}, {'StackName': 'gurum-app2'}]
+    assert second == [{'StackName': 'gurum-app3'}]
+    assert next_token is None
+
+
+def test_list_stacks_filters_inventory(cls, inventory):
+    stacks = [stack_manager_stub.stack('gurum-app1'), stack_manager_stub.deleted_stack('gurum-app2')]
+    inventory.put('team1', 'app', stacks)
+
+    result, _ = cls.list_stacks(['StackName'], filters={'status': 'create_complete'})
+
+    assert result == [{'StackName': 'gurum-app1'}]
+    assert inventory.get('team1', 'app') == stacks
+
+
+def test_list_stacks_filtered_lookup_cached_per_query(cls, client, inventory, scan):
+    with Stubber(client) as stubber:
+        stubber.add_response('describe_stacks', stack_manager_stub.first_page, {})
+        stubber.add_response('describe_stacks', stack_manager_stub.second_page, {'NextToken': 'page-2'})
+
+        result, _ = cls.list_stacks(['StackName'], filters={'status': 'update_complete'})
+
+        stubber.assert_no_pending_responses()
+
+    assert result == []
+    assert inventory.get('team1', 'app') is None
+    assert inventory.get('team1', 'app', {'status': 'update_complete'}) == []
+
+
+def test_list_stacks_filtered_pages_not_rescanned(cls, inventory):
+    stacks = [stack_manager_stub.stack('gurum-app{}'.format(i)) for i in range(1, 4)]
+    inventory.put('team1', 'app', stacks)
+    query = {'status': 'create_complete'}
+
+    first, next_token = cls.list_stacks(['StackName'], limit='2', filters=query)
+
+    with mock.patch.object(cls, 'filter_stacks') as filter_stacks:
+        second, _ = cls.list_stacks(['StackName'], limit='2', next_token=next_token, filters=query)
+
+    filter_stacks.assert_not_called()
+    assert first == [{'StackName': 'gurum-app1'}, {'StackName': 'gurum-app2'}]
+    assert second == [{'StackName': 'gurum-app3'}]
+
+
+def test_list_stacks_invalid_paging(cls, inventory):
+    inventory.put('team1', 'app', [])
+
+    with raises(InvalidInput):
+        cls.list_stacks(['StackName'], limit='0')
+
+    with raises(InvalidInput):
+        cls.list_stacks(['StackName'], next_token='not-a-token')
+
+    with raises(InvalidInput):
+        cls.list_stacks(['StackName'], next_token='eyJvZmZzZXQiOiAyfQ==')
+
+
+def test_inventory_invalidated_for_group(cls, inventory):
+    inventory.put('team1', 'app', [])
+    inventory.put('team2', 'app', [])
+
+    inventory.invalidate('team1', 'app')
+
+    assert inventory.get('team1', 'app') is None
+    assert inventory.get('team2', 'app') == []
+
+
+def test_describe_and_permissions_share_one_call(cls, client):
+    with Stubber(client) as stubber:
+        stubber.add_response(
+            'describe_stacks',
+            {'Stacks': [stack_manager_stub.stack('gurum-myapp')]},
+            {'StackName': 'gurum-myapp'})
+
+        stacks = cls.describe_stack()
+        outputs = cls.get_stack_outputs()
+        allowed = cls.has_permissions('gurum-myapp')
+
+        stubber.assert_no_pending_responses()
+
+    assert stacks[0]['StackName'] == 'gurum-myapp'
+    assert outputs == {}
+    assert allowed
+
+
+def test_delete_stack_forgets_described_stack(cls, client):
+    with Stubber(client) as stubber:
+        stubber.add_response(
+            'describe_stacks',
+            {'Stacks': [stack_manager_stub.stack('gurum-myapp')]},
+            {'StackName': 'gurum-myapp'})
+        stubber.add_response('delete_stack', {}, {'StackName': 'gurum-myapp'})
+        stubber.add_client_error(
+            'describe_stacks',
+            'ValidationError',
+            'Stack with id gurum-myapp does not exist')
+
+        assert cls.delete_stack()
+        assert not cls.has_permissions('gurum-myapp')
+
+        stubber.assert_no_pending_responses()
+
+
+@fixture
+def priorities(cls):
+    listener_arn = 'arn:aws:elasticloadbalancing:eu-west-1:012345678901:listener/app/gurum/1/2'
+    ssm_params = {'platform': {'loadbalancer': {'listener-arn': listener_arn}}}
+
+    with mock.patch.object(cls, '_load_parameters', return_value=ssm_params), \
+            mock.patch.object(elb_helper, 'claim_rule_priority', return_value=10), \
+            mock.patch.object(elb_helper, 'release_rule_priority') as release:
+        yield listener_arn, release
+
+
+def test_create_stack_failure_releases_priority(cls, client, priorities):
+    listener_arn, release = priorities
+    payload = {'config': {}, 'product_flavor': 'default', 'version': 'latest'}
+
+    with Stubber(client) as stubber, \
+            mock.patch('template_generator.generate_template_url', return_value='https://template'):
+        stubber.add_client_error('create_stack', 'LimitExceededException')
+
+        with raises(Exception):
+            cls.create_stack('gurum-myapp', payload)
+
+    release.assert_called_once_with(listener_arn, 10)
+
+
+def test_delete_stack_releases_priority(cls, client, priorities):
+    listener_arn, release = priorities
+    stack = stack_manager_stub.stack('gurum-myapp')
+    stack['Parameters'] = [{'ParameterKey': 'Priority', 'ParameterValue': '10'}]
+
+    with Stubber(client) as stubber:
+        stubber.add_response('describe_stacks', {'Stacks': [stack]}, {'StackName': 'gurum-myapp'})
+        stubber.add_response('delete_stack', {}, {'StackName': 'gurum-myapp'})
+
+        assert cls.delete_stack()
+
+    release.assert_called_once_with(listener_arn, 10)
+
+
+def test_update_stack_keeps_priority(cls, client):
+    listener_arn = 'arn:aws:elasticloadbalancing:eu-west-1:012345678901:listener/app/gurum/1/2'
+    ssm_params = {'platform': {'loadbalancer': {'listener-arn': listener_arn}}}
+    store = priority_ledger.InMemoryLedgerStore()
+    ledger = priority_ledger.PriorityLedger(store, 1800)
+    payload = {'config': {}, 'upgrade_version': False, 'product_flavor': 'shared-lb', 'version': 'latest'}
+    stack = stack_manager_stub.stack('gurum-myapp')
+    stack['Parameters'] = [{'ParameterKey': 'Priority', 'ParameterValue': '10'}]
+    update = {
+        'StackName': 'gurum-myapp',
+        'UsePreviousTemplate': True,
+        'Parameters': [{'ParameterKey': 'Priority', 'ParameterValue': '10'}],
+        'Capabilities': ANY,
+        'RoleARN': ANY,
+        'Tags': ANY
+    }
+    ledger.claim(listener_arn, 10)
+
+    with Stubber(client) as stubber, \
+            mock.patch.object(priority_ledger, 'get_ledger', return_value=ledger), \
+            mock.patch.object(elb_helper, 'get_random_rule_priority', return_value=11), \
+            mock.patch.object(cls, '_load_parameters', return_value=ssm_params), \
+            mock.patch.object(platform_config, 'PLATFORM_DEPLOYMENT_ROLE', 'arn:aws:iam::012345678901:role/deploy'):
+        for _ in range(2):
+            stubber.add_response('describe_stacks', {'Stacks': [stack]}, {'StackName': 'gurum-myapp'})
+            stubber.add_response('update_stack', {'StackId': 'id'}, update)
+
+            assert cls.update_stack(payload)
+
+        stubber.assert_no_pending_responses()
+
+    assert len(store._claims) == 1
+
+
+def test_filter_keys_marks_missing_keys(cls):
+    stacks = [stack_manager_stub.stack('gurum-app1')]
+
+    result = list(cls.filter_keys(stacks, ['StackName', 'LastUpdatedTime']))
+
+    assert result == [{'StackName': 'gurum-app1', 'LastUpdatedTime': 'N/A'}]
@@ -0,0 +1,65 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Stubs for testing managers/pipeline_manager.py
+"""
+
+from datetime import datetime
+
+from stubs.stack_manager_stub import stack
+
+event = {
+    'claims': {
+        'email': 'user@example.com',
+        'groups': 'team1',
+        'roles': 'admin'
+    },
+    'params': {
+        'name': 'mypipeline'
+    }
+}
+
+
+def pipeline_stack():
+    pipeline = stack('gurum-mypipeline', stack_type='pipeline')
+    pipeline['Outputs'] = [
+        {'OutputKey': 'PipelineName', 'OutputValue': 'gurum-mypipeline-Pipeline'}
+    ]
+
+    return pipeline
+
+
+pipeline_state = {
+    'pipelineName': 'gurum-mypipeline-Pipeline',
+    'stageStates': [
+        {
+            'stageName': 'Source',
+            'actionStates': [
+                {
+                    'actionName': 'GitHub',
+                    'latestExecution': {'status': 'Succeeded'}
+                }
+            ]
+        },
+        {
+            'stageName': 'ApprovalStage',
+            'actionStates': [
+                {
+                    'actionName': 'Approval',
+                    'latestExecution': {'status': 'InProgress', 'token': 'token-1'}
+                }
+            ]
+        }
+    ]
+}
+
+pipeline_executions = {
+    'pipelineExecutionSummaries': [
+        {
+            'pipelineExecutionId': 'execution-1',
+            'status': 'InProgress',
+            'startTime': datetime(2019, 1, 1)
+        }
+    ]
+}
@@ -0,0 +1,76 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Stubs for testing managers/stack_manager.py
+"""
+
+from datetime import datetime
+
+event = {
+    'claims': {
+        'email': 'user@example.com',
+        'groups': 'team1',
+        'roles': 'admin'
+    },
+    'params': {
+        'name': 'myapp'
+    }
+}
+
+
+def stack(name, stack_type='app', groups='team1'):
+    return {
+        'StackId': 'arn:aws:cloudformation:eu-west-1:012345678901:stack/{}/1'.format(name),
+        'StackName': name,
+        'CreationTime': datetime(2019, 1, 1),
+        'StackStatus': 'CREATE_COMPLETE',
+        'Parameters': [],
+        'Tags': [
+            {'Key': 'platform-version', 'Value': 'latest'},
+            {'Key': 'product-type', 'Value': stack_type},
+            {'Key': 'groups', 'Value': groups}
+        ]
+    }
+
+
+def deleted_stack(name):
+    deleted = stack(name)
+    deleted['StackStatus'] = 'DELETE_COMPLETE'
+
+    return deleted
+
+
+first_page = {
+    'Stacks': [
+        stack('gurum-app1'),
+        stack('gurum-pipeline1', stack_type='pipeline'),
+        stack('gurum-app2', groups='team2')
+    ],
+    'NextToken': 'page-2'
+}
+
+second_page = {
+    'Stacks': [
+        stack('gurum-app3')
+    ]
+}
+
+tagged_arns = [
+    stack('gurum-app1')['StackId'],
+    stack('gurum-app2')['StackId']
+]
+
+tagged_resources = {
+    'ResourceTagMappingList': [
+        {'ResourceARN': arn} for arn in tagged_arns
+    ]
+}
+
+tag_filters = {
+    'TagFilters': [
+        {'Key': 'groups', 'Values': ['team1']},
+        {'Key': 'product-type', 'Values': ['app']}
+    ],
+    'ResourceTypeFilters': ['cloudformation:stack']
+}
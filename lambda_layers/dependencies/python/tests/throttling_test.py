@@ -0,0 +1,154 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+
+import json
+
+import boto3
+from botocore.stub import Stubber
+from pytest import fixture, raises
+
+import batch_executor
+import platform_config
+import throttling
+
+from diagnostics import DIAGNOSTICS
+from exceptions import Throttled, UnknownError
+from throttling import CircuitBreaker, TokenBucket
+
+
+@fixture(autouse=True)
+def reset_throttling(monkeypatch):
+    monkeypatch.setattr(platform_config, 'PLATFORM_BREAKER_THRESHOLD', 2)
+    monkeypatch.setattr(platform_config, 'PLATFORM_BREAKER_COOLDOWN', 30)
+    throttling.reset()
+    DIAGNOSTICS.reset()
+    yield
+    monkeypatch.undo()
+    throttling.reset()
+    DIAGNOSTICS.reset()
+
+
+@fixture
+def client():
+    return throttling.guard_client(boto3.client('cloudformation', region_name='eu-west-1'))
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=1, burst=2)
+
+    assert bucket.acquire(timeout=0) == 0
+    assert bucket.acquire(timeout=0) == 0
+    assert 0 < bucket.acquire(timeout=0) <= 1
+    assert TokenBucket(rate=0, burst=1).acquire(timeout=0) == 0
+
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker(threshold=2, cooldown=30)
+
+    assert breaker.record_failure() is False
+    breaker.record_success()
+    assert breaker.record_failure() is False
+    assert breaker.record_failure() is True
+    assert breaker.allow() is False
+    assert 29 < breaker.retry_after() <= 30
+
+
+def test_circuit_breaker_probe():
+    breaker = CircuitBreaker(threshold=1, cooldown=0)
+    breaker.record_failure()
+
+    assert breaker.allow() is True
+    assert breaker.record_failure() is True
+    assert breaker.allow() is True
+    breaker.record_success()
+    assert breaker.is_open is False
+
+
+def test_guard_opens_breaker(client):
+    with Stubber(client) as stubber:
+        stubber.add_response('describe_stacks', {'Stacks': []})
+        stubber.add_client_error('describe_stacks', 'Throttling', 'Rate exceeded', 400)
+        stubber.add_client_error('describe_stacks', 'Throttling', 'Rate exceeded', 400)
+
+        client.describe_stacks()
+        with raises(Throttled) as first:
+            client.describe_stacks()
+        with raises(Throttled) as second:
+            client.describe_stacks()
+
+    # Rejected before reaching the network
+    with raises(Throttled) as rejected:
+        client.describe_stacks()
+
+    assert first.value.retry_after == 1
+    assert second.value.retry_after == 30
+    assert 'circuit open' in str(rejected.value)
+    assert DIAGNOSTICS.snapshot()['counters'] == {
+        'throttling.cloudformation.breaker_opened': 1,
+        'throttling.cloudformation.rejected': 1
+    }
+
+
+def test_guard_keeps_other_errors(client):
+    with Stubber(client) as stubber:
+        stubber.add_client_error('describe_stacks', 'ValidationError', 'Stack does not exist', 400)
+
+        with raises(client.exceptions.ClientError):
+            client.describe_stacks(StackName='missing')
+
+
+def test_needs_retry(monkeypatch):
+    monkeypatch.setattr(platform_config, 'PLATFORM_CLIENT_MAX_ATTEMPTS', 2)
+    guard = throttling.get_guard('cloudformation')
+    throttled = (None, {'Error': {'Code': 'Throttling'}})
+
+    assert guard.needs_retry(response=(None, {'Error': {'Code': 'ValidationError'}}), attempts=1) is None
+    assert 0 <= guard.needs_retry(response=throttled, attempts=2) <= 0.4
+    assert guard.needs_retry(response=throttled, attempts=3) is None
+
+    guard.breaker.record_failure()
+    guard.breaker.record_failure()
+    with raises(Throttled):
+        guard.needs_retry(response=throttled, attempts=1)
+
+
+def test_throttled_response():
+    @throttling.throttled_response
+    def get(event, _context):
+        try:
+            raise Throttled('cloudformation is throttled.', retry_after=4.2)
+        except Throttled as ex:
+            raise UnknownError from ex
+
+    with raises(Exception) as ex:
+        get({}, None)
+
+    assert json.loads(str(ex.value)) == {
+        'body': 'cloudformation is throttled. Retry after 5 seconds.',
+        'statusCode': 503,
+        'headers': {'Retry-After': '5'}
+    }
+
+
+def test_throttled_response_keeps_other_errors():
+    @throttling.throttled_response
+    def get(event, _context):
+        raise UnknownError('boom')
+
+    with raises(UnknownError):
+        get({}, None)
+
+
+def test_run_batch_throttled_item():
+    def create(name):
+        raise Throttled('cloudformation is throttled.', retry_after=3)
+
+    result, = batch_executor.run_batch(create, ['app'], 1)
+
+    assert result == {
+        'status_code': 503,
+        'error': 'cloudformation is throttled.',
+        'retry_after': 3
+    }
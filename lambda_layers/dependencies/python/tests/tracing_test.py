@@ -0,0 +1,36 @@
+# Copyright 2019 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: skip-file
+
+from unittest import mock
+
+from pytest import fixture
+
+import tracing
+
+
+@fixture(autouse=True)
+def unpatched():
+    with mock.patch.object(tracing, '_PATCHED', False):
+        yield
+
+
+def test_patch_once_when_enabled(monkeypatch):
+    monkeypatch.setenv('AWS_XRAY_SDK_ENABLED', 'true')
+
+    with mock.patch('aws_xray_sdk.core.patch') as xray_patch:
+        tracing.patch()
+        tracing.patch()
+
+    xray_patch.assert_called_once_with(['botocore'])
+
+
+def test_patch_skipped_when_disabled(monkeypatch):
+    monkeypatch.setenv('AWS_XRAY_SDK_ENABLED', 'false')
+
+    with mock.patch('aws_xray_sdk.core.patch') as xray_patch:
+        tracing.patch()
+
+    xray_patch.assert_not_called()
+    assert tracing._PATCHED
@@ -45,3 +45,40 @@ def test_dict_to_kv():
         value_name='Value',
         clean=False) \
         == transform_utils_stub.expanded_tags
+
+
+def test_build_nested():
+    assert transform_utils.build_nested({
+        '/gurum/platform/loadbalancer/listener-arn': 'arn',
+        '/gurum/platform/loadbalancer/dns': 'dns',
+        '/gurum/products/bucket': 'bucket'
+    }) == {
+        'platform': {
+            'loadbalancer': {
+                'listener-arn': 'arn',
+                'dns': 'dns'
+            }
+        },
+        'products': {
+            'bucket': 'bucket'
+        }
+    }
+
+
+def test_insert_nested():
+    container = transform_utils.build_nested({'/gurum/platform/vpc': 'vpc-1'})
+
+    transform_utils.insert_nested(container, '/gurum/platform/subnet', 'subnet-1')
+
+    assert container == {'platform': {'vpc': 'vpc-1', 'subnet': 'subnet-1'}}
+
+
+def test_delete_nested_prunes_empty_containers():
+    container = transform_utils.build_nested({
+        '/gurum/platform/loadbalancer/listener-arn': 'arn',
+        '/gurum/products/bucket': 'bucket'
+    })
+
+    assert transform_utils.delete_nested(container, '/gurum/platform/loadbalancer/listener-arn')
+    assert not transform_utils.delete_nested(container, '/gurum/platform/missing')
+    assert container == {'products': {'bucket': 'bucket'}}
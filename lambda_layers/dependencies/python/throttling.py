@@ -0,0 +1,320 @@
+"""Throttling module
+
+Client-side protection of the AWS APIs whose limits are shared by the
+whole account, e.g. the CloudFormation Describe* APIs. The calls of a
+guarded client, paginated calls included:
+
+    - take a token from the token bucket of their service, waiting up
+      to PLATFORM_THROTTLE_MAX_WAIT seconds for one
+    - are retried by botocore with a full jitter exponential backoff
+      when throttled, instead of its own backoff
+    - raise Throttled instead of a ClientError when still throttled
+      after the retries
+    - fail fast with Throttled while the circuit breaker of their
+      service is open, i.e. for PLATFORM_BREAKER_COOLDOWN seconds after
+      PLATFORM_BREAKER_THRESHOLD throttled calls in a row. A single call
+      then probes the API, closing the breaker again if it succeeds.
+
+Buckets and breakers are kept per container, across warm invocations.
+Handlers decorated with throttled_response answer Throttled with a 503
+and a Retry-After header, so clients back off instead of the API.
+"""
+
+import functools
+import random
+import threading
+import time
+
+from diagnostics import DIAGNOSTICS, THROTTLING_CODES
+from exceptions import Throttled
+from logger import configure_logger
+
+import platform_config
+import response_builder
+
+LOGGER = configure_logger(__name__)
+
+_GUARDS = {}
+_LOCK = threading.Lock()
+
+
+class TokenBucket:
+    """Token bucket allowing rate calls per second on average and bursts
+    of up to burst calls. A rate of 0 disables the bucket.
+
+    Basic Usage:
+        >>> bucket = TokenBucket(rate=10, burst=20)
+        >>> bucket.acquire(timeout=2)
+    """
+
+    def __init__(self, rate, burst):
+        self._rate = rate
+        self._burst = max(burst, 1)
+        self._tokens = self._burst
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """ Takes a token, returns the seconds until it is available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._updated_at) * self._rate)
+            self._updated_at = now
+            self._tokens -= 1
+
+            return max(-self._tokens / self._rate, 0)
+
+    def _refund(self):
+        with self._lock:
+            self._tokens = min(self._burst, self._tokens + 1)
+
+    def acquire(self, timeout=None):
+        """ Waits for a token, up to timeout seconds. Returns the seconds
+        until a token is available if it would take longer, 0 otherwise.
+        """
+        if self._rate <= 0:
+            return 0
+
+        wait = self._reserve()
+
+        if timeout is not None and wait > timeout:
+            self._refund()
+            return wait
+
+        if wait:
+            time.sleep(wait)
+
+        return 0
+
+
+class CircuitBreaker:
+    """Circuit breaker opened by threshold failures in a row, rejecting
+    calls for cooldown seconds. A single call is then let through, its
+    success closes the breaker and its failure opens it again. A probe
+    that never completes, e.g. rejected by the token bucket, is followed
+    by another one after a cooldown.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self._threshold = threshold
+        self._cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+        self._probed_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def _reopens_at(self):
+        return max(self._opened_at, self._probed_at or 0) + self._cooldown
+
+    def retry_after(self):
+        """ Returns the seconds until the breaker lets a call through
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return 0
+
+            return max(self._reopens_at() - time.monotonic(), 0)
+
+    def allow(self):
+        """ Returns True if a call can be made
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+
+            now = time.monotonic()
+            if now < self._reopens_at():
+                return False
+
+            self._probed_at = now
+
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probed_at = None
+
+    def record_failure(self):
+        """ Records a failure, returns True if it opened the breaker
+        """
+        with self._lock:
+            self._failures += 1
+
+            if self._probed_at is None and \
+                    (self._opened_at is not None or self._failures < self._threshold):
+                return False
+
+            self._opened_at = time.monotonic()
+            self._probed_at = None
+
+            return True
+
+
+def backoff(attempts, base=None, cap=None):
+    """ Returns a full jitter exponential backoff delay in seconds for a
+    number of attempts made, i.e. a random delay up to base * 2 ** attempts
+    """
+    base = platform_config.PLATFORM_THROTTLE_BACKOFF_BASE if base is None else base
+    cap = platform_config.PLATFORM_THROTTLE_BACKOFF_CAP if cap is None else cap
+
+    return random.uniform(0, min(cap, base * 2 ** attempts))
+
+
+class _Guard:
+    """Token bucket and circuit breaker of a service, with the botocore
+    event handlers applying them to its clients
+    """
+
+    def __init__(self, service):
+        self.service = service
+        self.reset()
+
+    def reset(self):
+        self.bucket = TokenBucket(
+            platform_config.PLATFORM_THROTTLE_RATE,
+            platform_config.PLATFORM_THROTTLE_BURST)
+        self.breaker = CircuitBreaker(
+            platform_config.PLATFORM_BREAKER_THRESHOLD,
+            platform_config.PLATFORM_BREAKER_COOLDOWN)
+
+    def _reject(self, reason, retry_after):
+        DIAGNOSTICS.count('throttling.{}.rejected'.format(self.service))
+
+        raise Throttled(
+            '{} is throttled ({}).'.format(self.service, reason),
+            retry_after=retry_after)
+
+    def before_call(self, **kwargs):
+        if not self.breaker.allow():
+            self._reject('circuit open', self.breaker.retry_after())
+
+        wait = self.bucket.acquire(timeout=platform_config.PLATFORM_THROTTLE_MAX_WAIT)
+        if wait:
+            self._reject('rate limited', wait)
+
+    def after_call(self, parsed=None, **kwargs):
+        if not _is_throttled(parsed):
+            self.breaker.record_success()
+            return
+
+        if self.breaker.record_failure():
+            DIAGNOSTICS.count('throttling.{}.breaker_opened'.format(self.service))
+            LOGGER.warning(
+                'Throttled by %s, failing fast for %ss',
+                self.service,
+                platform_config.PLATFORM_BREAKER_COOLDOWN)
+
+        raise Throttled(
+            '{} is throttled ({}).'.format(self.service, parsed['Error'].get('Message', 'rate exceeded')),
+            retry_after=self.breaker.retry_after())
+
+    def needs_retry(self, response=None, attempts=1, **kwargs):
+        """ Returns the delay of the next attempt of a throttled call, or
+        None to leave the decision to the retry handler of botocore
+        """
+        if response is None or not _is_throttled(response[1]):
+            return None
+
+        if self.breaker.is_open:
+            self._reject('circuit open', self.breaker.retry_after())
+
+        # max_attempts of the botocore retries config counts the retries
+        if attempts > platform_config.PLATFORM_CLIENT_MAX_ATTEMPTS:
+            return None
+
+        return backoff(attempts)
+
+
+def _is_throttled(parsed):
+    return bool(parsed) and parsed.get('Error', {}).get('Code') in THROTTLING_CODES
+
+
+def get_guard(service):
+    guard = _GUARDS.get(service)
+
+    if guard is None:
+        with _LOCK:
+            guard = _GUARDS.setdefault(service, _Guard(service))
+
+    return guard
+
+
+def guard_client(client):
+    """ Applies the token bucket and circuit breaker of its service to
+    the calls of a boto3 client. Objects that aren't botocore clients,
+    e.g. test doubles, are returned unchanged.
+
+    Basic Usage:
+        >>> client = guard_client(aws_clients.get_client('cloudformation'))
+    """
+    events = getattr(getattr(client, 'meta', None), 'events', None)
+    if events is None:
+        return client
+
+    guard = get_guard(client.meta.service_model.service_id.hyphenize())
+
+    # Registered first to run before stubbed responses and the retry
+    # handler of botocore, whose delay would otherwise be used, and last
+    # after the call, as the other handlers are skipped once it raises
+    events.register_first('before-call.*.*', guard.before_call, unique_id='platform-throttling-before')
+    events.register_last('after-call', guard.after_call, unique_id='platform-throttling-after')
+    events.register_first('needs-retry.*.*', guard.needs_retry, unique_id='platform-throttling-retry')
+
+    return client
+
+
+def reset():
+    """ Resets the token buckets and circuit breakers of every service,
+    the guarded clients keep their guard
+    """
+    with _LOCK:
+        for guard in _GUARDS.values():
+            guard.reset()
+
+
+def find_throttled(ex):
+    """ Returns the Throttled exception that caused an exception, if any,
+    following the exceptions it was raised from or while handling.
+    """
+    seen = set()
+
+    while ex is not None and id(ex) not in seen:
+        if isinstance(ex, Throttled):
+            return ex
+        seen.add(id(ex))
+        ex = ex.__cause__ or ex.__context__
+
+    return None
+
+
+def throttled_response(handler):
+    """ Decorator of the Lambda handlers answering the requests that
+    failed because of Throttled, even when it was wrapped by another
+    exception, with a retryable 503 and a Retry-After header.
+
+    Basic Usage:
+        >>> @throttled_response
+        ... def get(event, _context):
+    """
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        try:
+            return handler(event, context)
+        except Exception as ex:
+            throttled = find_throttled(ex)
+            if throttled is None:
+                raise
+
+            return response_builder.error(
+                '{} Retry after {} seconds.'.format(throttled, throttled.retry_after),
+                503,
+                headers={'Retry-After': str(throttled.retry_after)})
+
+    return wrapper
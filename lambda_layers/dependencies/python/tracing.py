@@ -0,0 +1,49 @@
+"""Tracing module
+
+Patches the AWS SDK for X-Ray tracing once per container, on first use
+and only when tracing is enabled, so importing a handler doesn't pay for
+the X-Ray SDK.
+"""
+
+import os
+import threading
+
+from logger import configure_logger
+
+import platform_config
+
+LOGGER = configure_logger(__name__)
+
+_PATCHED = False
+_LOCK = threading.Lock()
+
+
+def is_enabled():
+    """ Returns True unless tracing is disabled with AWS_XRAY_SDK_ENABLED,
+    the switch of the X-Ray SDK itself.
+    """
+    return os.getenv('AWS_XRAY_SDK_ENABLED', 'true').lower() != 'false'
+
+
+def patch():
+    """ Patches the libraries in PLATFORM_TRACING_LIBRARIES for X-Ray,
+    the first call does the work and every following call is a no-op.
+    """
+    global _PATCHED
+
+    if _PATCHED:
+        return
+
+    with _LOCK:
+        if _PATCHED:
+            return
+
+        if is_enabled():
+            from aws_xray_sdk.core import patch as xray_patch
+
+            LOGGER.debug(
+                'Patching %s for X-Ray',
+                platform_config.PLATFORM_TRACING_LIBRARIES)
+            xray_patch(platform_config.PLATFORM_TRACING_LIBRARIES)
+
+        _PATCHED = True
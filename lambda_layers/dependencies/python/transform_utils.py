@@ -136,22 +136,67 @@ def reuse_vals(key_names):
     return my_list
 
 
-def build_nested_helper(path, value, container):
-    """ Helper function for build_nested function """
+def insert_nested(container, path, value):
+    """ Inserts the value of a SSM parameter path into a nested dict.
+    Empty segments and segments with the platform name do not create
+    a container.
+
+    Basic Usage:
+        >>> insert_nested({}, '/gurum/platform/loadbalancer/listener-arn', 'arn')
+    Returns:
+        container (dict): The patched dict.
+        {
+            'platform': {
+                'loadbalancer': {
+                    'listener-arn': 'arn'
+                }
+            }
+        }
+    """
     segs = path.split('/')
-    head = segs[0]
-    tail = segs[1:]
+    node = container
+
+    for head in segs[:-1]:
+        if not head or 'gurum' in head:
+            continue
+        node = node.setdefault(head, {})
+
+    # found end of path, write value to key
+    node[segs[-1]] = value
+
+    return container
+
+
+def delete_nested(container, path):
+    """ Removes the value of a SSM parameter path from a nested dict
+    and prunes containers that become empty.
+
+    Returns:
+        Bool: True if the path was found and removed.
+    """
+    segs = path.split('/')
+    parents = []
+    node = container
+
+    for head in segs[:-1]:
+        if not head or 'gurum' in head:
+            continue
+        if not isinstance(node.get(head), dict):
+            return False
+        parents.append((node, head))
+        node = node[head]
+
+    if segs[-1] not in node:
+        return False
+
+    del node[segs[-1]]
+
+    for parent, head in reversed(parents):
+        if parent[head]:
+            break
+        del parent[head]
 
-    if not tail:
-        # found end of path, write value to key
-        container[head] = value
-    elif not head or 'gurum' in head:
-        # don't create container if empty or is platform name
-        build_nested_helper('/'.join(tail), value, container)
-    else:
-        if head not in container:
-            container[head] = {}
-        build_nested_helper('/'.join(tail), value, container[head])
+    return True
 
 
 def build_nested(paths):
@@ -160,6 +205,6 @@ def build_nested(paths):
     container = {}
 
     for path, value in paths.items():
-        build_nested_helper(path, value, container)
+        insert_nested(container, path, value)
 
     return container
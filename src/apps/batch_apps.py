@@ -0,0 +1,74 @@
+from exceptions import AlreadyExists, NoSuchObject, PermissionDenied
+from logger import configure_logger, request_logging
+from metrics import handler_metrics
+from throttling import throttled_response
+
+import batch_executor
+import transform_utils
+
+from managers.app_manager import AppManager
+
+LOGGER = configure_logger(__name__)
+
+MESSAGES = {
+    AlreadyExists: 'An app with that name already exists.',
+    NoSuchObject: 'No such application.',
+    PermissionDenied: 'Permission denied.'
+}
+
+
+@request_logging
+@handler_metrics
+@throttled_response
+def post(event, _context):
+    """ Creates a batch of apps belonging to the authenticated user.
+    Each item is created independently, a failing item doesn't stop the batch.
+    """
+    return batch_executor.handle_batch(event, 'items', AppManager, _create_app, 'apps', MESSAGES)
+
+
+@request_logging
+@handler_metrics
+@throttled_response
+def patch(event, _context):
+    """ Validates that each app belongs to the authenticated user
+    and updates its configuration.
+    """
+    return batch_executor.handle_batch(event, 'items', AppManager, _update_app, 'apps', MESSAGES)
+
+
+@request_logging
+@handler_metrics
+@throttled_response
+def delete(event, _context):
+    """ Validates that each app belongs to the authenticated user
+    and deletes the apps.
+    """
+    return batch_executor.handle_batch(event, 'names', AppManager, _delete_app, 'apps', MESSAGES)
+
+
+def _create_app(app, payload):
+    if 'product_flavor' not in payload:
+        payload['product_flavor'] = 'ecs-fargate'
+    if 'version' not in payload:
+        payload['version'] = 'latest'
+
+    return app.create_stack(
+        transform_utils.add_prefix(payload['name']),
+        payload
+    )
+
+
+def _update_app(app, payload):
+    if 'product_flavor' not in payload:
+        payload['product_flavor'] = 'shared-lb'
+    if 'version' not in payload:
+        payload['version'] = 'latest'
+
+    return app.update_stack(payload)
+
+
+def _delete_app(app, _name):
+    app.delete_stack()
+
+    return 'Successfully deleted the app.'
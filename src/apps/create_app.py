@@ -1,19 +1,21 @@
 import json
 
 from exceptions import AlreadyExists
-from aws_xray_sdk.core import patch_all
-from logger import configure_logger
+from logger import configure_logger, request_logging
+from metrics import handler_metrics
+from throttling import throttled_response
 
 import response_builder
 import transform_utils
 
 from managers.app_manager import AppManager
 
-patch_all()
-
 LOGGER = configure_logger(__name__)
 
 
+@request_logging
+@handler_metrics
+@throttled_response
 def post(event, _context):
     """ Creates a new app belonging to the authenticated user.
     """
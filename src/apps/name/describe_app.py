@@ -1,17 +1,22 @@
 from exceptions import NoSuchObject, PermissionDenied
-from aws_xray_sdk.core import patch_all
-from logger import configure_logger
+from logger import configure_logger, request_logging
+from metrics import handler_metrics
+from throttling import throttled_response
 
 import response_builder
 import transform_utils
 
 from managers.app_manager import AppManager
 
-patch_all()
-
 LOGGER = configure_logger(__name__)
 
+# Descriptions may be reused by the browser for a few seconds
+CACHE_CONTROL = 'private, max-age=10'
+
 
+@request_logging
+@handler_metrics
+@throttled_response
 def get(event, _context):
     """ Describes detailed information about an app
     """
@@ -43,4 +48,4 @@ def get(event, _context):
                 'tags': tags
             })
 
-        return response_builder.success(data)
+        return response_builder.success(data, event=event, cache_control=CACHE_CONTROL)
@@ -0,0 +1,52 @@
+from auth import Auth
+from diagnostics import DIAGNOSTICS
+from logger import configure_logger, request_logging
+from metrics import handler_metrics
+
+import response_builder
+
+LOGGER = configure_logger(__name__)
+
+# Diagnostics change with every request
+CACHE_CONTROL = 'no-store'
+
+
+@request_logging
+@handler_metrics
+def get(event, context):
+    """ Returns the latency histograms and counters of the warm container
+    serving the request, labelled with its container id and start time.
+    Restricted to the owner role.
+
+    Other containers and functions can't be reached reliably through
+    the API, a request lands on whichever container is free. Every
+    container emits its diagnostics as EMF log lines instead, see
+    metrics.emit_diagnostics.
+
+    Basic Usage:
+        >>> GET /_diagnostics
+    Returns:
+        Dict: Dict with the function name and the diagnostics of its container
+        {
+            'function': 'gurum-api-Diagnostics-1A2B3C4D',
+            'diagnostics': {
+                'container_id': '2019/09/01/[$LATEST]0123456789abcdef',
+                'started_at': 1567296000.0,
+                'uptime_seconds': 812.4,
+                'latency_ms': {
+                    'aws.cloudformation.DescribeStacks': {'count': 52, 'p99': 182.3, ...},
+                    'StackManager.list_stacks': {...}
+                },
+                'counters': {'aws.retries': 2, 'cache.inventory.expirations': 4}
+            }
+        }
+    """
+    if not Auth(event, 'diagnostics').has_permission():
+        return response_builder.error('Permission denied.', 401)
+
+    data = {
+        'function': getattr(context, 'function_name', None),
+        'diagnostics': DIAGNOSTICS.snapshot()
+    }
+
+    return response_builder.success(data, event=event, cache_control=CACHE_CONTROL)
@@ -1,49 +1,85 @@
-from aws_xray_sdk.core import patch_all
-from logger import configure_logger
+from exceptions import InvalidInput
+from logger import configure_logger, request_logging
+from metrics import handler_metrics
+from throttling import throttled_response
 
+import platform_config
 import response_builder
 
 from managers.event_manager import EventManager
 
-patch_all()
-
 LOGGER = configure_logger(__name__)
 
+# Revalidated on every poll, unchanged state is answered with a 304
+CACHE_CONTROL = 'private, no-cache'
+
 
+@request_logging
+@handler_metrics
+@throttled_response
 def get(event, _context):
-    """ Fetches the 10 (default) latest CloudFormation Events for stack
+    """ Fetches the 10 (default) latest CloudFormation Events for stack,
+    or only the events newer than the since_event_id or since cursor.
+    When has_more is set more events are waiting, polling again with the
+    returned cursor fetches them.
 
     Args:
         name (string): Name of the stack (CloudFormation Stack)
+        since_event_id (string): Optional id of the newest event already seen
+        since (string): Optional ISO 8601 timestamp of the newest event already seen
     Basic Usage:
         >>> GET /events/my-stack
+        >>> GET /events/my-stack?since_event_id=<cursor>
     Returns:
         Dict: Dict with list of JSON objects containing event information
+        and the cursor to poll the next events with
         {
             'events'
             [
                 {
                     'name': 'mystack',
+                    'id': 'a1b2c3d4-...',
                     'timestamp': '123456'
                     ...
                 }
-            ]
+            ],
+            'cursor': 'a1b2c3d4-...',
+            'has_more': False
         }
     """
     em = EventManager(event)
     data = {}
     data['events'] = []
 
-    for stack_event in em.get_stack_events():
+    request_params = platform_config.get_request_params(event)
+    since_event_id = request_params.get('since_event_id') or None
+
+    try:
+        result = em.get_stack_events(
+            since_event_id=since_event_id,
+            since=request_params.get('since') or None)
+    except InvalidInput as ex:
+        return response_builder.error('{}'.format(ex), 400)
+
+    if result is None:
+        return response_builder.error('Unable to fetch events.')
+
+    stack_events, cursor, has_more = result
+
+    for stack_event in stack_events:
         if 'ResourceStatusReason' not in stack_event:
             stack_event['ResourceStatusReason'] = ""
         data['events'].append(
             {
                 'name': stack_event['StackName'],
+                'id': stack_event['EventId'],
                 'timestamp': stack_event['Timestamp'],
                 'resource': stack_event['LogicalResourceId'],
                 'status': stack_event['ResourceStatus'],
                 'message': stack_event['ResourceStatusReason']
             })
 
-    return response_builder.success(data)
+    data['cursor'] = cursor
+    data['has_more'] = has_more
+
+    return response_builder.success(data, event=event, cache_control=CACHE_CONTROL)
@@ -1,16 +1,23 @@
-from aws_xray_sdk.core import patch_all
-from logger import configure_logger
+from exceptions import InvalidInput
+from logger import configure_logger, request_logging
+from metrics import handler_metrics
+from throttling import throttled_response
 
+import platform_config
 import transform_utils
 import response_builder
 
 from managers.pipeline_manager import PipelineManager
 
-patch_all()
-
 LOGGER = configure_logger(__name__)
 
+# Listings may be reused by the browser for a few seconds
+CACHE_CONTROL = 'private, max-age=10'
+
 
+@request_logging
+@handler_metrics
+@throttled_response
 def get(event, _context):
     """ Returns the pipelines belonging to the authenticated user.
     It uses filter_stacks() to filter the CloudFormation stacks with type
@@ -22,10 +29,18 @@ def get(event, _context):
     data = {}
     data['pipelines'] = []
 
+    request_params = platform_config.get_request_params(event)
+
     keys = ['StackName', 'Parameters', 'CreationTime', 'LastUpdatedTime']
 
     try:
-        stacks = pm.list_stacks(keys)
+        stacks, next_token = pm.list_stacks(
+            keys,
+            limit=request_params.get('limit'),
+            next_token=request_params.get('next_token'),
+            filters=request_params)
+    except InvalidInput as ex:
+        return response_builder.error('{}'.format(ex), 400)
     except Exception as ex:
         return response_builder.error('Unknown Error: {}'.format(ex))
     else:
@@ -46,4 +61,6 @@ def get(event, _context):
                     'app': transform_utils.remove_prefix(params['ServiceProd'])
                 })
 
-        return response_builder.success(data)
+        data['next_token'] = next_token
+
+        return response_builder.success(data, event=event, cache_control=CACHE_CONTROL)
@@ -1,16 +1,18 @@
 from exceptions import NoSuchObject, PermissionDenied
-from aws_xray_sdk.core import patch_all
-from logger import configure_logger
+from logger import configure_logger, request_logging
+from metrics import handler_metrics
+from throttling import throttled_response
 
 import response_builder
 
 from managers.pipeline_manager import PipelineManager
 
-patch_all()
-
 LOGGER = configure_logger(__name__)
 
 
+@request_logging
+@handler_metrics
+@throttled_response
 def delete(event, _context):
     """ Validates that the pipeline belongs to the authenticated user
     and deletes the pipeline.
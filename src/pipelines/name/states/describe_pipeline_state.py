@@ -1,16 +1,23 @@
-from aws_xray_sdk.core import patch_all
-from logger import configure_logger
+from exceptions import InvalidInput, NoSuchObject
+from logger import configure_logger, request_logging
+from metrics import handler_metrics
+from throttling import throttled_response
+from paginator import parse_limit
 
+import platform_config
 import response_builder
-import transform_utils
 
 from managers.pipeline_manager import PipelineManager
 
-patch_all()
-
 LOGGER = configure_logger(__name__)
 
+# Revalidated on every poll, unchanged state is answered with a 304
+CACHE_CONTROL = 'private, no-cache'
+
 
+@request_logging
+@handler_metrics
+@throttled_response
 def get(event, _context):
     """ Describes detailed information about a pipeline
     """
@@ -19,17 +26,21 @@ def get(event, _context):
     data = {}
     data['states'] = []
 
+    request_params = platform_config.get_request_params(event)
+
     try:
-        stacks = pm.describe_stack()
+        max_executions = parse_limit(
+            request_params.get('executions'),
+            platform_config.PLATFORM_MAX_PAGE_SIZE)
+        overview = pm.get_pipeline_overview(max_executions=max_executions)
+    except InvalidInput as ex:
+        return response_builder.error('{}'.format(ex), 400)
+    except NoSuchObject:
+        return response_builder.error('No such pipeline.', 400)
     except Exception as ex:
         return response_builder.error('Unknown Error: {}'.format(ex))
     else:
-        stack = stacks[0]
-        outputs = transform_utils.kv_to_dict(stack['Outputs'], 'OutputKey', 'OutputValue') if 'Outputs' in stack else []
-
-        states = pm.get_pipeline_state(outputs['PipelineName'])
-
-        for state in states:
+        for state in overview['states']:
             keys = ['actionName', 'latestExecution']
             actions = pm.filter_keys(state['actionStates'], keys)
 
@@ -51,4 +62,7 @@ def get(event, _context):
                     }
                 )
 
-        return response_builder.success(data)
+        if overview['executions'] is not None:
+            data['executions'] = overview['executions']
+
+        return response_builder.success(data, event=event, cache_control=CACHE_CONTROL)
@@ -1,18 +1,20 @@
 import json
 
-from aws_xray_sdk.core import patch_all
-from logger import configure_logger
+from exceptions import NoSuchObject
+from logger import configure_logger, request_logging
+from metrics import handler_metrics
+from throttling import throttled_response
 
 import response_builder
-import transform_utils
 
 from managers.pipeline_manager import PipelineManager
 
-patch_all()
-
 LOGGER = configure_logger(__name__)
 
 
+@request_logging
+@handler_metrics
+@throttled_response
 def put(event, _context):
     """ Send an approval result to the approval stage of a pipeline.
     """
@@ -24,48 +26,45 @@ def put(event, _context):
     payload = json.loads(event['body-json'][0])
 
     try:
-        stacks = pm.describe_stack()
+        overview = pm.get_pipeline_overview()
+    except NoSuchObject:
+        return response_builder.error('No such pipeline.', 400)
     except Exception as ex:
         return response_builder.error('Unknown Error: {}'.format(ex))
     else:
-        stack = stacks[0]
-        outputs = transform_utils.kv_to_dict(stack['Outputs'], 'OutputKey', 'OutputValue') if 'Outputs' in stack else []
-
-        states = pm.get_pipeline_state(outputs['PipelineName'])
-
-        for state in states:
-            keys = ['actionName', 'latestExecution']
-            actions = pm.filter_keys(state['actionStates'], keys)
-
-            for action in actions:
-                latest_execution = action['latestExecution']
-                status = latest_execution['status'] if 'status' in latest_execution else 'N/A'
-                percent_complete = latest_execution['percentComplete'] if 'percentComplete' in latest_execution else 'N/A'
-                last_status_change = latest_execution['lastStatusChange'] if 'lastStatusChange' in latest_execution else 'N/A'
-
-                if state['stageName'] == 'ApprovalStage' and action['actionName'] == 'Approval':
-                    token = latest_execution['token']
-                    summary = payload['summary']
-                    status = payload['status']
-
-                    approval_result = pm.put_approval_result(
-                        pipeline_name=outputs['PipelineName'],
-                        stage_name=state['stageName'],
-                        action_name=action['actionName'],
-                        summary=summary,
-                        status=status,
-                        token=token
-                        )
-
-                    data['states'].append(
-                        {
-                            'stage_name': state['stageName'],
-                            'name': action['actionName'],
-                            'status': status,
-                            'percent_complete': percent_complete,
-                            'last_status_change': last_status_change,
-                            'error_details': approval_result
-                        }
-                    )
+        action = overview['actions'].get(('ApprovalStage', 'Approval'))
+
+        if action is None:
+            return response_builder.success(data)
+
+        latest_execution = action.get('latestExecution', {})
+        percent_complete = latest_execution['percentComplete'] if 'percentComplete' in latest_execution else 'N/A'
+        last_status_change = latest_execution['lastStatusChange'] if 'lastStatusChange' in latest_execution else 'N/A'
+
+        if 'token' not in latest_execution:
+            return response_builder.error('No pending approval.', 400)
+
+        summary = payload['summary']
+        status = payload['status']
+
+        approval_result = pm.put_approval_result(
+            pipeline_name=overview['outputs']['PipelineName'],
+            stage_name='ApprovalStage',
+            action_name='Approval',
+            summary=summary,
+            status=status,
+            token=latest_execution['token']
+            )
+
+        data['states'].append(
+            {
+                'stage_name': 'ApprovalStage',
+                'name': 'Approval',
+                'status': status,
+                'percent_complete': percent_complete,
+                'last_status_change': last_status_change,
+                'error_details': approval_result
+            }
+        )
 
         return response_builder.success(data)
@@ -1,19 +1,21 @@
 import json
 
 from exceptions import NoSuchObject, PermissionDenied
-from aws_xray_sdk.core import patch_all
-from logger import configure_logger
+from logger import configure_logger, request_logging
+from metrics import handler_metrics
+from throttling import throttled_response
 
 import transform_utils
 import response_builder
 
 from managers.pipeline_manager import PipelineManager
 
-patch_all()
-
 LOGGER = configure_logger(__name__)
 
 
+@request_logging
+@handler_metrics
+@throttled_response
 def patch(event, _context):
     """ Updates the pipeline belonging to the authenticated user.
     """
@@ -0,0 +1,78 @@
+from exceptions import AlreadyExists, InvalidInput, NoSuchObject, PermissionDenied
+from logger import configure_logger, request_logging
+from metrics import handler_metrics
+from throttling import throttled_response
+
+import batch_executor
+import transform_utils
+
+from managers.service_manager import ServiceManager
+
+LOGGER = configure_logger(__name__)
+
+MESSAGES = {
+    AlreadyExists: 'A service with that name already exists.',
+    NoSuchObject: 'No such service.',
+    PermissionDenied: 'Permission denied.'
+}
+
+
+@request_logging
+@handler_metrics
+@throttled_response
+def post(event, _context):
+    """ Creates a batch of services belonging to the authenticated user.
+    Each item is created independently, a failing item doesn't stop the batch.
+    """
+    return batch_executor.handle_batch(event, 'items', ServiceManager, _create_service, 'services', MESSAGES)
+
+
+@request_logging
+@handler_metrics
+@throttled_response
+def patch(event, _context):
+    """ Updates a batch of services belonging to the authenticated user.
+    """
+    return batch_executor.handle_batch(event, 'items', ServiceManager, _update_service, 'services', MESSAGES)
+
+
+@request_logging
+@handler_metrics
+@throttled_response
+def delete(event, _context):
+    """ Deletes a batch of services belonging to the authenticated user.
+    """
+    return batch_executor.handle_batch(event, 'names', ServiceManager, _delete_service, 'services', MESSAGES)
+
+
+def _create_service(sm, payload):
+    if 'product_flavor' not in payload:
+        payload['product_flavor'] = 's3'
+    if 'version' not in payload:
+        payload['version'] = 'latest'
+
+    return sm.create_stack(
+        transform_utils.add_prefix(payload['name']),
+        payload
+    )
+
+
+def _update_service(sm, payload):
+    if 'product_flavor' not in payload:
+        payload['product_flavor'] = 's3'
+    if 'version' not in payload:
+        payload['version'] = 'latest'
+    if 'ServiceBindings' not in payload:
+        raise InvalidInput('ServiceBindings not provided in payload.')
+
+    for binding in payload['ServiceBindings'].split(','):
+        if not sm.has_permissions(binding):
+            raise InvalidInput('{} doesn\'t exist or not enough permissions.'.format(binding))
+
+    return sm.update_stack(payload)
+
+
+def _delete_service(sm, _name):
+    sm.delete_stack()
+
+    return 'Successfully deleted the service.'
@@ -1,18 +1,20 @@
 import json
 
 from exceptions import NoSuchObject, PermissionDenied, UnknownParameter
-from aws_xray_sdk.core import patch_all
-from logger import configure_logger
+from logger import configure_logger, request_logging
+from metrics import handler_metrics
+from throttling import throttled_response
 
 import response_builder
 
 from managers.service_manager import ServiceManager
 
-patch_all()
-
 LOGGER = configure_logger(__name__)
 
 
+@request_logging
+@handler_metrics
+@throttled_response
 def patch(event, _context):
     """ Updates the service belonging to the authenticated user.
     """